@@ -8,7 +8,7 @@ from PIL import Image
 import io
 import base64
 from utils.database import (
-    create_tables, add_user, verify_user, get_user_role,
+    ensure_schema, add_user, verify_user, get_user_role,
     get_student_profile, get_alumni_profile, update_user_profile,
     get_all_users, get_confessions, add_confession,
     get_events, add_event, register_for_event,
@@ -20,9 +20,11 @@ from utils.database import (
     like_confession, update_confession_status,
     get_announcements, add_announcement,
     add_contribution, get_contributions,
-    get_notifications, mark_all_notifications_read,
+    get_notifications, get_notification_digest, mark_all_notifications_read,
+    get_badge_counts,
     add_job_posting, get_job_postings, apply_for_job,
-    get_user_statistics, get_platform_statistics, get_growth_data
+    get_user_statistics, get_platform_statistics, get_growth_data,
+    request_scope
 )
 
 # Page configuration
@@ -47,8 +49,8 @@ if 'chat_with' not in st.session_state:
 if 'current_group' not in st.session_state:
     st.session_state.current_group = None
 
-# Create database tables
-create_tables()
+# Create or upgrade database tables (once per process)
+ensure_schema()
 
 # Custom CSS
 def load_css():
@@ -379,27 +381,38 @@ def logout():
     st.session_state.current_group = None
     st.rerun()
 
+# Sidebar icon and plural label per notification type
+NOTIFICATION_TYPES = {
+    'message': ('💬', 'messages'),
+    'friend_request': ('👥', 'friend requests'),
+    'event': ('📅', 'event updates'),
+    'confession': ('💭', 'confession updates'),
+    'announcement': ('📢', 'announcements'),
+    'system': ('⚙️', 'system notices'),
+}
+
 def display_notifications():
-    """Display notifications in sidebar"""
-    notifications = get_notifications(st.session_state.user_id, unread_only=True)
-    if notifications:
+    """Display unread notifications in sidebar, one line per type"""
+    digest = get_notification_digest(st.session_state.user_id)
+    if digest:
         st.sidebar.markdown("### 🔔 Notifications")
-        for notif in notifications[:5]:  # Show only 5 latest
+        for group in digest:
+            icon, label = NOTIFICATION_TYPES.get(group['type'], ('🔔', 'notifications'))
             with st.sidebar.container():
                 col1, col2 = st.sidebar.columns([4, 1])
                 with col1:
-                    st.sidebar.markdown(f"**{notif['title']}**")
-                    st.sidebar.caption(notif['message'][:50] + "...")
+                    if group['notifications'] == 1:
+                        count = f" ({group['events']})" if group['events'] > 1 else ""
+                        st.sidebar.markdown(f"{icon} **{group['title']}**{count}")
+                        st.sidebar.caption(group['message'][:50] + "...")
+                    else:
+                        st.sidebar.markdown(f"{icon} **{group['events']} new {label}**")
+                        st.sidebar.caption("Latest: " + group['message'][:50] + "...")
                 with col2:
-                    if st.sidebar.button("✓", key=f"read_{notif['id']}"):
+                    if st.sidebar.button("✓", key=f"read_{group['type']}"):
                         mark_all_notifications_read(st.session_state.user_id)
                         st.rerun()
                 st.sidebar.markdown("---")
-        
-        if len(notifications) > 5:
-            if st.sidebar.button("View All Notifications"):
-                # You can implement a notifications page
-                st.info("Notifications page coming soon!")
 
 def main():
     """Main application controller"""
@@ -465,8 +478,18 @@ def main():
                     ("⚙️ System Settings", "Admin/Settings")
                 ]
             
+            # Unread/pending counts shown next to page names
+            badges = get_badge_counts(st.session_state.user_id)
+            page_badges = {
+                "Chat": badges['unread_messages'],
+                "Friends": badges['pending_friend_requests'],
+            }
+            
             st.markdown("### 📍 Navigation")
             for page_name, page_key in pages:
+                count = page_badges.get(page_key.split("/")[-1], 0)
+                if count:
+                    page_name = f"{page_name} ({count})"
                 if st.button(page_name, key=page_key, use_container_width=True):
                     st.session_state.current_page = page_key
                     st.session_state.chat_with = None
@@ -474,7 +497,8 @@ def main():
                     st.rerun()
             
             # Display notifications
-            display_notifications()
+            if badges['unread_notifications']:
+                display_notifications()
             
             st.markdown("---")
             if st.button("🚪 Logout", type="secondary", use_container_width=True):
@@ -565,4 +589,7 @@ def main():
             st.info("This page is under development.")
 
 if __name__ == "__main__":
-    main()
+    # Reads repeated within one script run (sidebar, notifications, page)
+    # are answered once
+    with request_scope():
+        main()
@@ -0,0 +1,292 @@
+"""
+MES-Connect SQLite Connection Pool
+"""
+
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Optional, Dict, Any, Callable
+from records import record_factory
+
+# Applied once when a connection is opened, not on every borrow
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,        # milliseconds
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,        # negative = KiB, i.e. ~16 MB per connection
+    'mmap_size': 134217728,      # 128 MB
+}
+
+# Read-only connections inherit the journal mode set by the writer
+READ_ONLY_PRAGMAS = {name: value for name, value in DEFAULT_PRAGMAS.items() if name != 'journal_mode'}
+READ_ONLY_PRAGMAS['query_only'] = 1
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection became available in time"""
+
+class PoolQueueFullError(sqlite3.OperationalError):
+    """Raised when too many callers are already waiting for a connection"""
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execute + fetch time to its connection's hook"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = None
+
+    def _flush(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            hook = getattr(self.connection, 'statement_hook', None)
+            if hook is not None:
+                hook(self.connection, *pending)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, time.perf_counter() - start]
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, seq_of_parameters[0] if seq_of_parameters else (), time.perf_counter() - start]
+            self._flush()
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        try:
+            return self._timed_fetch(super().fetchall)
+        finally:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        super().close()
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.pooled = False
+        self.statement_hook = None
+        self.last_used = time.monotonic()
+        self._cursors = weakref.WeakSet()
+
+    def cursor(self, factory=TracedCursor):
+        cursor = super().cursor(factory)
+        self._cursors.add(cursor)
+        return cursor
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        elif not self.pooled:
+            super().close()
+        # An idle pooled connection ignores a stray second close()
+
+    def reset(self):
+        """Finalize open cursors and roll back anything left uncommitted"""
+        for cursor in list(self._cursors):
+            cursor.close()
+        if self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        """Really close the underlying sqlite3 connection"""
+        self.pool = None
+        self.pooled = False
+        super().close()
+
+class ConnectionPool:
+    """Bounded LIFO pool of pre-configured SQLite connections"""
+
+    def __init__(self, database: str, max_size: int = 10, timeout: float = 10.0,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 health_check_interval: float = 30.0, uri: bool = False,
+                 statement_hook: Optional[Callable] = None, max_waiters: Optional[int] = None):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.health_check_interval = health_check_interval
+        self.uri = uri
+        # Called as hook(conn, sql, params, seconds) after each statement
+        self.statement_hook = statement_hook
+        # Bound on callers queued for a connection; None means unbounded
+        self.max_waiters = max_waiters
+
+        self._idle = deque()
+        self._size = 0
+        self._waiters = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'acquisitions': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'timeouts': 0,
+            'rejections': 0,
+            'peak_queue_depth': 0,
+            'health_checks': 0,
+            'health_check_failures': 0,
+        }
+
+    def _connect(self) -> PooledConnection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(self.database, uri=self.uri, check_same_thread=False,
+                               factory=PooledConnection)
+        conn.pooled = True
+        conn.statement_hook = self.statement_hook
+        conn.row_factory = record_factory
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        """Ping connections that sat idle for longer than the check interval"""
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        self._stats['health_checks'] += 1
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            self._stats['health_check_failures'] += 1
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Borrow a connection, waiting up to timeout seconds if the pool is exhausted"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited_since = None
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+
+                conn = None
+                create = False
+                if self._idle:
+                    conn = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    if waited_since is None:
+                        if self.max_waiters is not None and self._waiters >= self.max_waiters:
+                            self._stats['rejections'] += 1
+                            raise PoolQueueFullError(
+                                f"{self._waiters} callers already waiting for a database connection"
+                            )
+                        waited_since = time.monotonic()
+                        self._stats['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    self._waiters += 1
+                    self._stats['peak_queue_depth'] = max(self._stats['peak_queue_depth'], self._waiters)
+                    try:
+                        signalled = remaining > 0 and self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+                    if not signalled:
+                        self._stats['timeouts'] += 1
+                        self._stats['wait_time_total'] += time.monotonic() - waited_since
+                        raise PoolTimeoutError(f"Timed out after {timeout:.1f}s waiting for a database connection")
+                    continue
+
+                if waited_since is not None:
+                    self._stats['wait_time_total'] += time.monotonic() - waited_since
+                self._stats['acquisitions'] += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['connections_created'] += 1
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            conn.pool = self
+            return conn
+
+    def release(self, conn: PooledConnection):
+        """Return a borrowed connection to the pool"""
+        try:
+            conn.reset()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        conn.pool = None
+        conn.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn.dispose()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn: PooledConnection):
+        """Drop a broken connection and free its slot"""
+        try:
+            conn.dispose()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_discarded'] += 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Close idle connections; borrowed ones are closed when returned"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().dispose()
+                self._size -= 1
+            self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['max_size'] = self.max_size
+            stats['open_connections'] = self._size
+            stats['idle_connections'] = len(self._idle)
+            stats['in_use_connections'] = self._size - len(self._idle)
+            stats['queue_depth'] = self._waiters
+        stats['avg_wait_ms'] = (stats['wait_time_total'] / stats['waits'] * 1000) if stats['waits'] else 0.0
+        return stats
@@ -1,285 +1,256 @@
+import os
 import sqlite3
 import bcrypt
+import atexit
+import threading
+import time
 from datetime import datetime
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple, Union
+from connection_pool import ConnectionPool
+from records import fetch_columns
+from query_cache import QueryCache
+from message_bus import MessageBus, MessageWindow, user_topic, group_topic
+from request_scope import memoized, remember, request_scope, invalidate as invalidate_request_scope
+from migrations import (
+    migrate, get_schema_version, latest_version,
+    STATS_COUNTERS_REBUILD, DAILY_ROLLUP_BACKFILL, CONVERSATIONS_REBUILD, SEARCH_BACKFILL,
+    NOTIFICATION_COALESCE_WINDOW, NOTIFICATION_ACTIVITY, BADGE_COUNTS_REBUILD
+)
+from instrumentation import instrumented, add_lock_wait, registry as metrics_registry
+from slow_query_log import SlowQueryLog
+from write_behind import WriteBehindQueue
+from scheduler import Scheduler, local_to_utc
+from storage import StorageBackend, SQLiteFileBackend, backend_from_config
 
 DATABASE_PATH = "data/mes_connect.db"
+POOL_SIZE = 10
+
+# Writes are serialized through one connection; callers beyond this many
+# queued writers fail fast instead of piling up behind the lock
+WRITE_QUEUE_SIZE = 64
+WRITE_TIMEOUT = 15.0
+WRITE_RETRIES = 5
+WRITE_BACKOFF = 0.05
+
+_backend: Optional[StorageBackend] = None
+_pools: Dict[str, ConnectionPool] = {}
+_pool_lock = threading.RLock()
+
+# Statements slower than MES_SLOW_QUERY_MS (default 100) are logged with their plan
+slow_query_log = SlowQueryLog()
+
+# Databases whose schema is known to be current in this process
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+# Recurring maintenance run by the scheduler: (job name, handler, cron
+# schedule in server local time). Stats counters and badge counts are kept
+# by triggers; reconciliation rebuilds them from scratch to correct drift.
+MAINTENANCE_JOBS = (
+    ('reconcile counters', 'reconcile_counters', '0 */6 * * *'),
+    ('retention', 'retention', '30 3 * * *'),
+    ('optimize database', 'optimize_database', '0 4 * * 0'),
+)
+
+# Database copies made by create_backup go in this folder next to the
+# database file unless the backup.dir setting names another. Copies are
+# named <database file stem>-YYYYmmdd-HHMMSS.db.
+BACKUP_SUBDIR = 'backups'
+BACKUP_STAMP = '%Y%m%d-%H%M%S'
+
+# Pre-existing rows are folded into derived tables (daily rollups, search
+# index) this many ids per write transaction, pausing between batches so
+# interactive writes get the lock
+BACKFILL_BATCH = 2000
+BACKFILL_PAUSE = 0.05
+_backfills: Dict[str, threading.Thread] = {}
+
+# Retention purges at most this many rows per write transaction
+RETENTION_BATCH = 500
+RETENTION_PAUSE = 0.05
+
+# Base tables whose writes change daily_rollups (via triggers)
+ROLLUP_TABLES = ('daily_rollups', 'users', 'messages', 'confessions',
+                 'event_participants', 'contributions', 'group_members')
+
+def get_backend() -> StorageBackend:
+    """Get the storage backend selected by MES_DB_BACKEND (default: SQLite file at DATABASE_PATH)"""
+    global _backend
+    if _backend is None:
+        with _pool_lock:
+            if _backend is None:
+                backend = backend_from_config(DATABASE_PATH)
+                backend.prepare()
+                slow_query_log.explain_prefix = backend.explain_prefix
+                _backend = backend
+    return _backend
+
+def configure_backend(backend: StorageBackend):
+    """Switch storage backends, e.g. to SQLiteMemoryBackend for load tests"""
+    global _backend
+    write_behind.flush()
+    with _pool_lock:
+        close_pool()
+        if _backend is not None:
+            _backend.close()
+        _schema_ready.discard(backend.key)
+        backend.prepare()
+        slow_query_log.explain_prefix = backend.explain_prefix
+        _backend = backend
+
+def _create_pool(kind: str) -> ConnectionPool:
+    options = get_backend().pool_options(kind)
+    if kind == 'writer':
+        return ConnectionPool(**options, max_size=1, timeout=WRITE_TIMEOUT,
+                              max_waiters=WRITE_QUEUE_SIZE,
+                              statement_hook=slow_query_log.record)
+    return ConnectionPool(**options, max_size=POOL_SIZE,
+                          statement_hook=slow_query_log.record)
+
+def get_pool(kind: str = 'reader') -> ConnectionPool:
+    """Get the process-wide 'reader' or 'writer' pool, creating it on first use"""
+    pool = _pools.get(kind)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(kind)
+            if pool is None:
+                pool = _pools[kind] = _create_pool(kind)
+    return pool
 
 def get_connection():
-    """Create database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """Borrow a read-only pooled connection; close() returns it to the pool"""
+    start = time.perf_counter()
+    conn = get_pool('reader').acquire()
+    add_lock_wait(time.perf_counter() - start)
+    return conn
+
+def get_write_connection(begin: bool = True):
+    """Borrow the single writer connection, by default with a write transaction open"""
+    # Reads memoized earlier in this script run may be about to go stale
+    invalidate_request_scope()
+    start = time.perf_counter()
+    conn = get_pool('writer').acquire()
+    try:
+        if begin:
+            _begin_immediate(conn)
+    except Exception:
+        conn.close()
+        raise
+    finally:
+        add_lock_wait(time.perf_counter() - start)
     return conn
 
+def _begin_immediate(conn):
+    """Take the database write lock up front, backing off while another process holds it"""
+    delay = WRITE_BACKOFF
+    for attempt in range(WRITE_RETRIES):
+        try:
+            conn.execute(get_backend().begin_write_sql)
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            if attempt == WRITE_RETRIES - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+def get_pool_metrics() -> Dict:
+    """Get connection pool usage metrics for the reader and writer pools"""
+    return {kind: get_pool(kind).metrics() for kind in ('reader', 'writer')}
+
+def close_pool():
+    """Close all pooled connections (used on shutdown)"""
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+atexit.register(close_pool)
+
+# Follow-up writes nobody waits on are batched off the critical path.
+# Registered after close_pool so it is flushed before the pools close.
+write_behind = WriteBehindQueue(lambda: get_write_connection())
+atexit.register(write_behind.close)
+
+# Maintenance and deferred work run on a worker thread outside script runs.
+# Registered after close_pool so the worker stops before the pools close.
+scheduler = Scheduler(lambda: get_connection(), lambda: get_write_connection())
+atexit.register(scheduler.stop)
+
+# Read-mostly results shared by every session, invalidated by table versions
+query_cache = QueryCache()
+cached = query_cache.cached
+
+def bump_table_versions(*tables: str):
+    """Record committed changes to tables so cached reads of them go stale"""
+    query_cache.bump(*tables)
+
+# Chat views long-poll this for new messages instead of re-running on a timer
+message_bus = MessageBus()
+
+# Read cursors are written at most this often per conversation
+READ_RECEIPT_INTERVAL = 5.0
+_read_receipts: Dict[tuple, Dict[str, Any]] = {}
+_read_receipts_lock = threading.Lock()
+
+def defer_write(sql: str, params: tuple = ()):
+    """Queue a non-critical write for the background writer"""
+    invalidate_request_scope()
+    write_behind.submit(sql, params)
+
+def flush_pending_writes(timeout: float = 10.0) -> bool:
+    """Block until all deferred writes are applied (used by tests and shutdown)"""
+    return write_behind.flush(timeout)
+
 def create_tables():
-    """Create all necessary tables"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL CHECK(role IN ('student', 'alumni', 'admin')),
-        first_name TEXT NOT NULL,
-        last_name TEXT NOT NULL,
-        phone TEXT,
-        student_id TEXT,
-        department TEXT,
-        year TEXT,
-        skills TEXT,
-        about TEXT,
-        current_position TEXT,
-        company TEXT,
-        linkedin TEXT,
-        profile_pic TEXT,
-        is_verified INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        last_login TIMESTAMP
-    )
-    ''')
-    
-    # Friends table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS friends (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        friend_id INTEGER NOT NULL,
-        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'accepted', 'blocked')),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        FOREIGN KEY (friend_id) REFERENCES users (id),
-        UNIQUE(user_id, friend_id)
-    )
-    ''')
-    
-    # Messages table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS messages (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sender_id INTEGER NOT NULL,
-        receiver_id INTEGER NOT NULL,
-        message TEXT NOT NULL,
-        is_read INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (sender_id) REFERENCES users (id),
-        FOREIGN KEY (receiver_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Groups table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS groups (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        description TEXT,
-        created_by INTEGER NOT NULL,
-        is_public INTEGER DEFAULT 1,
-        category TEXT DEFAULT 'general',
-        cover_pic TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (created_by) REFERENCES users (id)
-    )
-    ''')
-    
-    # Group members table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS group_members (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        group_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        role TEXT DEFAULT 'member' CHECK(role IN ('admin', 'moderator', 'member')),
-        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (group_id) REFERENCES groups (id),
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        UNIQUE(group_id, user_id)
-    )
-    ''')
-    
-    # Group messages table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS group_messages (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        group_id INTEGER NOT NULL,
-        sender_id INTEGER NOT NULL,
-        message TEXT NOT NULL,
-        attachment TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (group_id) REFERENCES groups (id),
-        FOREIGN KEY (sender_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Confessions table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS confessions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        content TEXT NOT NULL,
-        is_anonymous INTEGER DEFAULT 1,
-        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'rejected')),
-        likes INTEGER DEFAULT 0,
-        tags TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Confession likes table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS confession_likes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        confession_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (confession_id) REFERENCES confessions (id),
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        UNIQUE(confession_id, user_id)
-    )
-    ''')
-    
-    # Events table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        description TEXT NOT NULL,
-        organizer_id INTEGER NOT NULL,
-        event_date DATE NOT NULL,
-        event_time TIME,
-        location TEXT,
-        venue TEXT,
-        max_participants INTEGER,
-        is_public INTEGER DEFAULT 1,
-        category TEXT DEFAULT 'general',
-        cover_pic TEXT,
-        registration_link TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (organizer_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Event participants table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS event_participants (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        event_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        status TEXT DEFAULT 'registered' CHECK(status IN ('registered', 'attended', 'cancelled')),
-        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (event_id) REFERENCES events (id),
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        UNIQUE(event_id, user_id)
-    )
-    ''')
-    
-    # Announcements table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS announcements (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        content TEXT NOT NULL,
-        created_by INTEGER NOT NULL,
-        target_role TEXT,
-        priority TEXT DEFAULT 'normal' CHECK(priority IN ('low', 'normal', 'high', 'urgent')),
-        is_active INTEGER DEFAULT 1,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (created_by) REFERENCES users (id)
-    )
-    ''')
-    
-    # Contributions table (for alumni)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS contributions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        alumni_id INTEGER NOT NULL,
-        type TEXT NOT NULL CHECK(type IN ('mentorship', 'donation', 'workshop', 'job_posting', 'internship', 'other')),
-        title TEXT NOT NULL,
-        description TEXT,
-        amount REAL,
-        hours INTEGER,
-        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'completed', 'rejected')),
-        skills_required TEXT,
-        deadline DATE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (alumni_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Notifications table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS notifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        message TEXT NOT NULL,
-        type TEXT CHECK(type IN ('friend_request', 'message', 'event', 'confession', 'announcement', 'system')),
-        is_read INTEGER DEFAULT 0,
-        reference_id INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Job postings table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS job_postings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        posted_by INTEGER NOT NULL,
-        company TEXT NOT NULL,
-        position TEXT NOT NULL,
-        description TEXT NOT NULL,
-        requirements TEXT,
-        location TEXT,
-        salary_range TEXT,
-        job_type TEXT CHECK(job_type IN ('full_time', 'part_time', 'internship', 'contract')),
-        application_link TEXT,
-        is_active INTEGER DEFAULT 1,
-        deadline DATE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (posted_by) REFERENCES users (id)
-    )
-    ''')
-    
-    # Job applications table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS job_applications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        job_id INTEGER NOT NULL,
-        applicant_id INTEGER NOT NULL,
-        cover_letter TEXT,
-        resume TEXT,
-        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'reviewed', 'accepted', 'rejected')),
-        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (job_id) REFERENCES job_postings (id),
-        FOREIGN KEY (applicant_id) REFERENCES users (id),
-        UNIQUE(job_id, applicant_id)
-    )
-    ''')
-    
-    # Resources table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS resources (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        uploaded_by INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        description TEXT,
-        file_path TEXT NOT NULL,
-        file_type TEXT,
-        category TEXT,
-        tags TEXT,
-        download_count INTEGER DEFAULT 0,
-        is_public INTEGER DEFAULT 1,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (uploaded_by) REFERENCES users (id)
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    """Create or upgrade all tables by applying pending schema migrations"""
+    conn = get_write_connection(begin=False)
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+def ensure_schema() -> bool:
+    """Bring the schema up to date once per process and database file"""
+    # Called on every Streamlit rerun; after the first call this is a set
+    # lookup and issues no SQL. Returns True only for the call that checked.
+    key = get_backend().key
+    if key in _schema_ready:
+        return False
+
+    with _schema_lock:
+        if key in _schema_ready:
+            return False
+
+        conn = get_write_connection(begin=False)
+        try:
+            if get_schema_version(conn) < latest_version():
+                migrate(conn)
+        finally:
+            conn.close()
+
+        _schema_ready.add(key)
+        apply_settings()
+        start_scheduler()
+        start_rollup_backfill()
+        start_search_backfill()
+        return True
+
+def _keyset(column: str, before_id: Optional[int] = None, after_id: Optional[int] = None) -> tuple:
+    """Build the filter, params and scan order for an id-keyset page"""
+    # before_id pages backwards (older), after_id forwards (newer); both
+    # seek straight to the cursor through an index ending in id
+    clause, params = '', []
+    if before_id is not None:
+        clause += f' AND {column} < ?'
+        params.append(before_id)
+    if after_id is not None:
+        clause += f' AND {column} > ?'
+        params.append(after_id)
+    order = 'ASC' if after_id is not None and before_id is None else 'DESC'
+    return clause, params, order
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -290,14 +261,17 @@ def check_password(hashed_password: str, password: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 # User Management Functions
+@instrumented
 def add_user(email: str, password: str, role: str, **kwargs) -> Optional[int]:
     """Add a new user to database"""
+    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
+        # Hash before taking the write lock; bcrypt is deliberately slow
         hashed_pw = hash_password(password)
         
+        conn = get_write_connection()
+        cursor = conn.cursor()
+        
         user_data = {
             'email': email,
             'password': hashed_pw,
@@ -334,46 +308,49 @@ def add_user(email: str, password: str, role: str, **kwargs) -> Optional[int]:
         ''', (user_id,))
         
         conn.commit()
+        bump_table_versions('users', 'notifications')
         return user_id
     except sqlite3.IntegrityError:
         raise Exception(f"Email already exists: {email}")
     except Exception as e:
         raise Exception(f"Database error: {str(e)}")
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def verify_user(email: str, password: str) -> Optional[int]:
     """Verify user credentials"""
+    conn = get_connection()
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, password FROM users 
-            WHERE email = ? AND is_verified = 1
-        ''', (email,))
-        
-        user = cursor.fetchone()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, password FROM users 
+                WHERE email = ? AND is_verified = 1
+            ''', (email,))
+            user = cursor.fetchone()
+        finally:
+            conn.close()
         
         if user and check_password(user['password'], password):
-            cursor.execute('''
+            defer_write('''
                 UPDATE users 
                 SET last_login = CURRENT_TIMESTAMP 
                 WHERE id = ?
             ''', (user['id'],))
-            conn.commit()
             return user['id']
         return None
     except Exception as e:
         print(f"Error verifying user: {e}")
         return None
-    finally:
-        conn.close()
 
+@memoized
+@instrumented
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """Get user by ID"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT id, first_name, last_name, email, role, department, 
@@ -382,15 +359,89 @@ def get_user_by_id(user_id: int) -> Optional[Dict]:
                    created_at, last_login
             FROM users WHERE id = ?
         ''', (user_id,))
-        result = cursor.fetchone()
-        return dict(result) if result else None
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+@instrumented
+def get_users_by_ids(user_ids) -> Dict[int, Dict]:
+    """Get several users in one query, keyed by id (missing ids are left out)"""
+    user_ids = list(dict.fromkeys(uid for uid in user_ids if uid is not None))
+    if not user_ids:
+        return {}
+    users = {}
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT id, first_name, last_name, email, role, department, 
+                       year, current_position, company, profile_pic, 
+                       skills, about, phone, student_id, linkedin,
+                       created_at, last_login
+                FROM users WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            users.update((row['id'], row) for row in cursor.fetchall())
+    finally:
+        conn.close()
+    
+    # Later get_user_by_id calls in this script run are answered from here
+    for user_id in user_ids:
+        remember(get_user_by_id, (user_id,), users.get(user_id))
+    return users
+
+# Display fields shown next to messages and members; no password, contact
+# details or profile picture
+USER_CARD_COLUMNS = 'id, first_name, last_name, role, department, year, current_position, company'
+
+@instrumented
+def get_user_cards(user_ids) -> Dict[int, Dict]:
+    """Get users' display fields keyed by id, from the process-wide cache where possible"""
+    user_ids = list(dict.fromkeys(uid for uid in user_ids if uid is not None))
+    cards = {}
+    missing = []
+    for user_id in user_ids:
+        found, card = query_cache.get(('user_card', user_id)) if query_cache.enabled else (False, None)
+        if found:
+            if card is not None:
+                cards[user_id] = card
+        else:
+            missing.append(user_id)
+    if not missing:
+        return cards
+    
+    # Snapshot before reading, as @cached does, so a concurrent update wins
+    versions = query_cache.versions.snapshot(('users',))
+    fetched = {}
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            cursor.execute(f'''
+                SELECT {USER_CARD_COLUMNS}
+                FROM users WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            fetched.update((row['id'], row) for row in cursor.fetchall())
     finally:
         conn.close()
+    
+    for user_id in missing:
+        card = fetched.get(user_id)
+        if query_cache.enabled:
+            query_cache.put(('user_card', user_id), card, ('users',), versions, namespace='user_card')
+        if card is not None:
+            cards[user_id] = card
+    return cards
 
+@memoized
+@instrumented
 def get_user_role(user_id: int) -> Optional[str]:
     """Get user role"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT role FROM users WHERE id = ?', (user_id,))
         result = cursor.fetchone()
@@ -398,10 +449,12 @@ def get_user_role(user_id: int) -> Optional[str]:
     finally:
         conn.close()
 
+@memoized
+@instrumented
 def get_student_profile(user_id: int) -> Optional[Dict]:
     """Get student profile"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT id, first_name, last_name, email, phone, student_id,
@@ -409,15 +462,16 @@ def get_student_profile(user_id: int) -> Optional[Dict]:
                    last_login
             FROM users WHERE id = ? AND role = 'student'
         ''', (user_id,))
-        result = cursor.fetchone()
-        return dict(result) if result else None
+        return cursor.fetchone()
     finally:
         conn.close()
 
+@memoized
+@instrumented
 def get_alumni_profile(user_id: int) -> Optional[Dict]:
     """Get alumni profile"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT id, first_name, last_name, email, phone, student_id as roll_number,
@@ -426,15 +480,16 @@ def get_alumni_profile(user_id: int) -> Optional[Dict]:
                    created_at, last_login
             FROM users WHERE id = ? AND role = 'alumni'
         ''', (user_id,))
-        result = cursor.fetchone()
-        return dict(result) if result else None
+        return cursor.fetchone()
     finally:
         conn.close()
 
+@instrumented
 def update_user_profile(user_id: int, **kwargs) -> bool:
     """Update user profile"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         update_fields = []
@@ -454,18 +509,22 @@ def update_user_profile(user_id: int, **kwargs) -> bool:
             '''
             cursor.execute(query, values)
             conn.commit()
+            bump_table_versions('users')
             return True
         return False
     except Exception as e:
         print(f"Error updating profile: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
-def get_all_users(role: Optional[str] = None, exclude_id: Optional[int] = None) -> List[Dict]:
-    """Get all users, optionally filtered by role"""
+@instrumented
+def get_all_users(role: Optional[str] = None, exclude_id: Optional[int] = None,
+                  columnar: bool = False) -> Union[List[Dict], Dict[str, List]]:
+    """Get all users, optionally filtered by role (columnar=True returns column -> values)"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         query = '''
@@ -488,15 +547,16 @@ def get_all_users(role: Optional[str] = None, exclude_id: Optional[int] = None)
         query += ' ORDER BY first_name, last_name'
         
         cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        return fetch_columns(cursor) if columnar else cursor.fetchall()
     finally:
         conn.close()
 
 # Friends Management Functions
+@instrumented
 def get_friends(user_id: int, status: str = 'accepted') -> List[Dict]:
     """Get friends list"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -516,14 +576,16 @@ def get_friends(user_id: int, status: str = 'accepted') -> List[Dict]:
             ORDER BY u.first_name, u.last_name
         ''', (user_id, user_id, user_id, user_id, user_id, user_id, status))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
+@instrumented
 def add_friend_request(user_id: int, friend_id: int) -> tuple[bool, str]:
     """Send friend request"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Check if request already exists
@@ -546,25 +608,30 @@ def add_friend_request(user_id: int, friend_id: int) -> tuple[bool, str]:
             VALUES (?, ?, 'pending')
         ''', (user_id, friend_id))
         
+        request_id = cursor.lastrowid
+        conn.commit()
+        bump_table_versions('friends')
+        
         # Create notification
-        cursor.execute('''
+        defer_write('''
             INSERT INTO notifications (user_id, title, message, type, reference_id)
             VALUES (?, 'New Friend Request', 
                    (SELECT first_name || ' ' || last_name FROM users WHERE id = ?) || ' sent you a friend request',
                    'friend_request', ?)
-        ''', (friend_id, user_id, cursor.lastrowid))
+        ''', (friend_id, user_id, request_id))
         
-        conn.commit()
         return True, "Friend request sent"
     except Exception as e:
         return False, str(e)
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def get_pending_friend_requests(user_id: int) -> List[Dict]:
     """Get pending friend requests"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -577,14 +644,16 @@ def get_pending_friend_requests(user_id: int) -> List[Dict]:
             ORDER BY f.created_at DESC
         ''', (user_id,))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
+@instrumented
 def accept_friend_request(request_id: int, user_id: int) -> bool:
     """Accept friend request"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Get request details
@@ -613,17 +682,21 @@ def accept_friend_request(request_id: int, user_id: int) -> bool:
         ''', (request['user_id'], user_id, request_id))
         
         conn.commit()
+        bump_table_versions('friends', 'notifications')
         return True
     except Exception as e:
         print(f"Error accepting friend request: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def reject_friend_request(request_id: int, user_id: int) -> bool:
     """Reject friend request"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -632,14 +705,18 @@ def reject_friend_request(request_id: int, user_id: int) -> bool:
         ''', (request_id, user_id))
         
         conn.commit()
+        bump_table_versions('friends')
         return cursor.rowcount > 0
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def remove_friend(user_id: int, friend_id: int) -> bool:
     """Remove friend"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -649,51 +726,151 @@ def remove_friend(user_id: int, friend_id: int) -> bool:
         ''', (user_id, friend_id, friend_id, user_id))
         
         conn.commit()
+        bump_table_versions('friends')
         return cursor.rowcount > 0
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # Chat Functions
-def get_chat_messages(user_id: int, other_user_id: int, limit: int = 50) -> List[Dict]:
-    """Get chat messages between two users"""
+@instrumented
+def get_chat_messages(user_id: int, other_user_id: int, limit: int = 50,
+                      before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict]:
+    """Get chat messages between two users, oldest first
+
+    Returns the latest page by default; pass the first message's id as
+    before_id to load older history, or the last id seen as after_id to get
+    only what is new (usually nothing). Rows carry no sender details; look
+    those up with get_user_cards.
+    """
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
+        # Both sides' read cursors: is_read is derived from them
         cursor.execute('''
-            SELECT m.*, 
-                   s.first_name as sender_first_name,
-                   s.last_name as sender_last_name,
-                   s.profile_pic as sender_profile_pic,
-                   r.first_name as receiver_first_name,
-                   r.last_name as receiver_last_name
-            FROM messages m
-            JOIN users s ON m.sender_id = s.id
-            JOIN users r ON m.receiver_id = r.id
-            WHERE (m.sender_id = ? AND m.receiver_id = ?)
-               OR (m.sender_id = ? AND m.receiver_id = ?)
-            ORDER BY m.created_at DESC
+            SELECT user_id, last_read_message_id FROM conversations
+            WHERE (user_id = ? AND other_user_id = ?) OR (user_id = ? AND other_user_id = ?)
+        ''', (user_id, other_user_id, other_user_id, user_id))
+        read_through = {row['user_id']: row['last_read_message_id'] for row in cursor.fetchall()}
+        
+        # Each direction is a separate index range, merged after the LIMIT.
+        # Sender names come from get_user_cards, not a join per row.
+        keyset, keyset_params, order = _keyset('id', before_id, after_id)
+        cursor.execute(f'''
+            SELECT * FROM (
+                SELECT id, sender_id, receiver_id, message,
+                       CASE WHEN id <= ? THEN 1 ELSE 0 END as is_read, created_at
+                FROM messages
+                WHERE sender_id = ? AND receiver_id = ?{keyset}
+                ORDER BY id {order} LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT id, sender_id, receiver_id, message,
+                       CASE WHEN id <= ? THEN 1 ELSE 0 END as is_read, created_at
+                FROM messages
+                WHERE sender_id = ? AND receiver_id = ?{keyset}
+                ORDER BY id {order} LIMIT ?
+            )
+            ORDER BY id {order}
             LIMIT ?
-        ''', (user_id, other_user_id, other_user_id, user_id, limit))
-        
-        messages = [dict(row) for row in cursor.fetchall()]
-        
-        # Mark messages as read
-        cursor.execute('''
-            UPDATE messages 
-            SET is_read = 1 
-            WHERE receiver_id = ? AND sender_id = ? AND is_read = 0
-        ''', (user_id, other_user_id))
-        conn.commit()
+        ''', (read_through.get(other_user_id, 0), user_id, other_user_id, *keyset_params, limit,
+              read_through.get(user_id, 0), other_user_id, user_id, *keyset_params, limit, limit))
         
-        return messages[::-1]  # Reverse to show oldest first
+        messages = cursor.fetchall()
     finally:
         conn.close()
+    
+    # Seeing the partner's newest message reads everything before it
+    newest = max((msg['id'] for msg in messages if msg['sender_id'] == other_user_id), default=0)
+    if newest > read_through.get(user_id, 0):
+        mark_conversation_read(user_id, other_user_id, newest)
+    
+    return messages[::-1] if order == 'DESC' else messages  # Oldest first
+
+def _write_read_cursor(user_id: int, other_user_id: int, message_id: int):
+    # One conversation row per receipt, however many messages it covers
+    defer_write('''
+        UPDATE conversations
+        SET last_read_message_id = ?,
+            unread_count = (
+                SELECT COUNT(*) FROM messages
+                WHERE sender_id = ? AND receiver_id = ? AND id > ?
+            )
+        WHERE user_id = ? AND other_user_id = ? AND last_read_message_id < ?
+    ''', (message_id, other_user_id, user_id, message_id, user_id, other_user_id, message_id))
+    # Lets the sender's open chat show the read ticks
+    message_bus.publish(user_topic(other_user_id), {
+        'type': 'read', 'reader_id': user_id, 'sender_id': other_user_id, 'message_id': message_id
+    })
+
+def _start_read_receipt_timer(key: tuple, receipt: Dict[str, Any], delay: float):
+    # Caller holds _read_receipts_lock
+    receipt['timer'] = threading.Timer(delay, _flush_read_receipt, args=(key,))
+    receipt['timer'].daemon = True
+    receipt['timer'].start()
+
+def _flush_read_receipt(key: tuple):
+    with _read_receipts_lock:
+        receipt = _read_receipts.get(key)
+        if receipt is None:
+            return
+        receipt['timer'] = None
+        now = time.monotonic()
+        if receipt['pending'] is None:
+            # Quiet for a whole interval: forget the conversation so the
+            # table only holds chats read recently
+            if receipt['written_at'] is None or now - receipt['written_at'] >= READ_RECEIPT_INTERVAL:
+                del _read_receipts[key]
+            return
+        message_id = receipt['pending']
+        receipt.update(pending=None, written_at=now)
+        _start_read_receipt_timer(key, receipt, READ_RECEIPT_INTERVAL)
+    _write_read_cursor(*key, message_id)
+
+def mark_conversation_read(user_id: int, other_user_id: int, message_id: int):
+    """Advance a user's read cursor for a conversation to message_id
+
+    Receipts are coalesced: a conversation's cursor is written at most once
+    every READ_RECEIPT_INTERVAL seconds, with the newest id seen meanwhile.
+    A conversation with nothing to write after an interval is dropped.
+    """
+    key = (user_id, other_user_id)
+    now = time.monotonic()
+    with _read_receipts_lock:
+        receipt = _read_receipts.setdefault(key, {'seen': 0, 'pending': None, 'written_at': None, 'timer': None})
+        if message_id <= receipt['seen']:
+            return
+        receipt['seen'] = message_id
+        if receipt['written_at'] is not None and now - receipt['written_at'] < READ_RECEIPT_INTERVAL:
+            receipt['pending'] = message_id
+            if receipt['timer'] is None:
+                _start_read_receipt_timer(key, receipt, READ_RECEIPT_INTERVAL - (now - receipt['written_at']))
+            return
+        receipt.update(pending=None, written_at=now)
+        if receipt['timer'] is None:
+            _start_read_receipt_timer(key, receipt, READ_RECEIPT_INTERVAL)
+    _write_read_cursor(user_id, other_user_id, message_id)
+
+def flush_read_receipts():
+    """Write every coalesced read receipt now (shutdown and tests)"""
+    with _read_receipts_lock:
+        keys = [key for key, receipt in _read_receipts.items() if receipt['pending'] is not None]
+        for key in keys:
+            if _read_receipts[key]['timer'] is not None:
+                _read_receipts[key]['timer'].cancel()
+    for key in keys:
+        _flush_read_receipt(key)
 
+atexit.register(flush_read_receipts)
+
+@instrumented
 def send_message(sender_id: int, receiver_id: int, message: str) -> Optional[int]:
     """Send a message"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -702,71 +879,85 @@ def send_message(sender_id: int, receiver_id: int, message: str) -> Optional[int
         ''', (sender_id, receiver_id, message))
         
         message_id = cursor.lastrowid
+        conn.commit()
+        bump_table_versions('messages', 'conversations')
         
-        # Create notification
-        cursor.execute('''
-            INSERT INTO notifications (user_id, title, message, type, reference_id)
+        # Wake both sides' open chat views
+        event = {'type': 'message', 'id': message_id, 'sender_id': sender_id, 'receiver_id': receiver_id}
+        message_bus.publish(user_topic(receiver_id), event)
+        message_bus.publish(user_topic(sender_id), event)
+        
+        # Create notification (one per sender per window, counting messages)
+        defer_write('''
+            INSERT INTO notifications (user_id, title, message, type, reference_id, coalesce_key, updated_at)
             VALUES (?, 'New Message', 
                    (SELECT first_name || ' ' || last_name FROM users WHERE id = ?) || ' sent you a message',
-                   'message', ?)
-        ''', (receiver_id, sender_id, message_id))
+                   'message', ?, ?, CURRENT_TIMESTAMP)
+        ''' + COALESCE_NOTIFICATION,
+            (receiver_id, sender_id, message_id, notification_coalesce_key(f"message:{sender_id}")))
         
-        conn.commit()
         return message_id
     except Exception as e:
         print(f"Error sending message: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def get_conversations(user_id: int) -> List[Dict]:
-    """Get all conversations for a user"""
+    """Get all conversations for a user, most recent first"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
+        # Summaries are kept by triggers on messages: one index range
+        # however long the history is
         cursor.execute('''
             SELECT 
                 other_user.id as user_id,
                 other_user.first_name,
                 other_user.last_name,
-                other_user.profile_pic,
                 other_user.role,
                 other_user.department,
-                last_msg.message as last_message,
-                last_msg.created_at as last_message_time,
-                SUM(CASE WHEN m.is_read = 0 AND m.receiver_id = ? THEN 1 ELSE 0 END) as unread_count
-            FROM (
-                SELECT DISTINCT 
-                    CASE 
-                        WHEN sender_id = ? THEN receiver_id
-                        ELSE sender_id
-                    END as other_user_id
-                FROM messages
-                WHERE sender_id = ? OR receiver_id = ?
-            ) as conversations
-            JOIN users other_user ON conversations.other_user_id = other_user.id
-            LEFT JOIN messages last_msg ON last_msg.id = (
-                SELECT id FROM messages
-                WHERE (sender_id = ? AND receiver_id = other_user.id)
-                   OR (sender_id = other_user.id AND receiver_id = ?)
-                ORDER BY created_at DESC
-                LIMIT 1
-            )
-            LEFT JOIN messages m ON (m.sender_id = other_user.id AND m.receiver_id = ? AND m.is_read = 0)
-            GROUP BY other_user.id
-            ORDER BY last_msg.created_at DESC
-        ''', (user_id, user_id, user_id, user_id, user_id, user_id, user_id))
+                c.last_message_id,
+                c.preview as last_message,
+                c.last_message_time,
+                c.unread_count
+            FROM conversations c
+            JOIN users other_user ON other_user.id = c.other_user_id
+            WHERE c.user_id = ?
+            ORDER BY c.last_message_id DESC
+        ''', (user_id,))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
+@instrumented
+def rebuild_conversations() -> int:
+    """Recompute every conversation summary from messages; returns how many there are"""
+    conn = get_write_connection()
+    try:
+        cursor = conn.cursor()
+        for statement in CONVERSATIONS_REBUILD:
+            cursor.execute(statement)
+        cursor.execute('SELECT COUNT(*) as count FROM conversations')
+        count = cursor.fetchone()['count']
+        conn.commit()
+    finally:
+        conn.close()
+    
+    bump_table_versions('conversations')
+    return count
+
 # Groups Functions
+@instrumented
 def create_group(name: str, description: str, created_by: int, **kwargs) -> Optional[int]:
     """Create a new group"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -786,17 +977,21 @@ def create_group(name: str, description: str, created_by: int, **kwargs) -> Opti
         ''', (group_id, created_by))
         
         conn.commit()
+        bump_table_versions('groups', 'group_members')
         return group_id
     except Exception as e:
         print(f"Error creating group: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@cached('groups', 'group_members', 'users')
+@instrumented
 def get_groups(user_id: Optional[int] = None, category: Optional[str] = None) -> List[Dict]:
     """Get groups, optionally filtered by user membership or category"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         if user_id:
@@ -826,7 +1021,7 @@ def get_groups(user_id: Optional[int] = None, category: Optional[str] = None) ->
                 ORDER BY g.created_at DESC
             ''')
         
-        groups = [dict(row) for row in cursor.fetchall()]
+        groups = cursor.fetchall()
         
         if category:
             groups = [g for g in groups if g['category'] == category]
@@ -835,10 +1030,12 @@ def get_groups(user_id: Optional[int] = None, category: Optional[str] = None) ->
     finally:
         conn.close()
 
+@instrumented
 def join_group(group_id: int, user_id: int) -> bool:
     """Join a group"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Check if already a member
@@ -856,17 +1053,20 @@ def join_group(group_id: int, user_id: int) -> bool:
         ''', (group_id, user_id))
         
         conn.commit()
+        bump_table_versions('group_members')
         return True
     except Exception as e:
         print(f"Error joining group: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def get_group_members(group_id: int) -> List[Dict]:
     """Get all members of a group"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -885,35 +1085,40 @@ def get_group_members(group_id: int) -> List[Dict]:
                 gm.joined_at
         ''', (group_id,))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
-def get_group_messages(group_id: int, limit: int = 50) -> List[Dict]:
-    """Get messages from a group"""
+@instrumented
+def get_group_messages(group_id: int, limit: int = 50,
+                       before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict]:
+    """Get messages from a group, oldest first (before_id/after_id page by message id)"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        keyset, keyset_params, order = _keyset('gm.id', before_id, after_id)
+        cursor.execute(f'''
             SELECT gm.*, 
                    u.first_name, u.last_name, u.profile_pic, u.role
             FROM group_messages gm
             JOIN users u ON gm.sender_id = u.id
-            WHERE gm.group_id = ?
-            ORDER BY gm.created_at DESC
+            WHERE gm.group_id = ?{keyset}
+            ORDER BY gm.id {order}
             LIMIT ?
-        ''', (group_id, limit))
+        ''', (group_id, *keyset_params, limit))
         
-        messages = [dict(row) for row in cursor.fetchall()]
-        return messages[::-1]  # Reverse to show oldest first
+        messages = cursor.fetchall()
+        return messages[::-1] if order == 'DESC' else messages  # Oldest first
     finally:
         conn.close()
 
+@instrumented
 def send_group_message(group_id: int, sender_id: int, message: str, attachment: Optional[str] = None) -> Optional[int]:
     """Send a message to a group"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -921,19 +1126,121 @@ def send_group_message(group_id: int, sender_id: int, message: str, attachment:
             VALUES (?, ?, ?, ?)
         ''', (group_id, sender_id, message, attachment))
         
+        message_id = cursor.lastrowid
         conn.commit()
-        return cursor.lastrowid
+        bump_table_versions('group_messages')
+        message_bus.publish(group_topic(group_id), {
+            'type': 'group_message', 'id': message_id, 'group_id': group_id, 'sender_id': sender_id
+        })
+        return message_id
     except Exception as e:
         print(f"Error sending group message: {e}")
         return None
+    finally:
+        if conn is not None:
+            conn.close()
+
+# Search Functions
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix"""
+    # Each word is quoted, so operators and punctuation typed by users are
+    # searched for literally instead of raising a syntax error
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+@instrumented
+def search_messages(user_id: int, query: str, other_user_id: Optional[int] = None,
+                    limit: int = 20, highlight: tuple = ('**', '**')) -> List[Dict]:
+    """Search the user's direct messages, best match first
+
+    Only conversations the user is part of are searched (one of them with
+    other_user_id). Each row carries a snippet of the message with the
+    matches wrapped in highlight and the partner's id as other_user_id.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        scope = 'AND (m.sender_id = ? OR m.receiver_id = ?)'
+        params = [user_id, user_id]
+        if other_user_id is not None:
+            scope = '''AND ((m.sender_id = ? AND m.receiver_id = ?)
+                     OR (m.sender_id = ? AND m.receiver_id = ?))'''
+            params = [user_id, other_user_id, other_user_id, user_id]
+        
+        cursor.execute(f'''
+            SELECT m.id, m.sender_id, m.receiver_id, m.created_at,
+                   CASE WHEN m.sender_id = ? THEN m.receiver_id ELSE m.sender_id END as other_user_id,
+                   snippet(messages_fts, 0, ?, ?, '…', 12) as snippet,
+                   bm25(messages_fts) as score
+            FROM messages_fts
+            JOIN messages m ON m.id = messages_fts.rowid
+            WHERE messages_fts MATCH ? {scope}
+            ORDER BY score
+            LIMIT ?
+        ''', (user_id, *highlight, match, *params, limit))
+        
+        return cursor.fetchall()
     finally:
         conn.close()
 
+@instrumented
+def search_group_messages(user_id: int, query: str, group_id: Optional[int] = None,
+                          limit: int = 20, highlight: tuple = ('**', '**')) -> List[Dict]:
+    """Search messages in the groups the user belongs to (or one of them), best match first"""
+    match = fts_query(query)
+    if not match:
+        return []
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        scope, params = '', []
+        if group_id is not None:
+            scope = 'AND gm.group_id = ?'
+            params.append(group_id)
+        
+        cursor.execute(f'''
+            SELECT gm.id, gm.group_id, gm.sender_id, gm.created_at, g.name as group_name,
+                   snippet(group_messages_fts, 0, ?, ?, '…', 12) as snippet,
+                   bm25(group_messages_fts) as score
+            FROM group_messages_fts
+            JOIN group_messages gm ON gm.id = group_messages_fts.rowid
+            JOIN group_members member ON member.group_id = gm.group_id AND member.user_id = ?
+            JOIN groups g ON g.id = gm.group_id
+            WHERE group_messages_fts MATCH ? {scope}
+            ORDER BY score
+            LIMIT ?
+        ''', (*highlight, user_id, match, *params, limit))
+        
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+@instrumented
+def backfill_search_index(batch_size: int = BACKFILL_BATCH, pause: float = BACKFILL_PAUSE,
+                          max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Index messages sent before search existed; returns ids covered per table"""
+    return _run_backfill('search_backfill', SEARCH_BACKFILL, batch_size, pause, max_batches, 'messages_fts')
+
+def start_search_backfill() -> bool:
+    """Start the background indexing of message history if any is still pending"""
+    return _start_backfill('search index', 'search_backfill', backfill_search_index)
+
 # Confessions Functions
+@instrumented
 def add_confession(user_id: Optional[int], content: str, is_anonymous: bool = True, tags: Optional[str] = None) -> Optional[int]:
     """Add a confession"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -943,59 +1250,65 @@ def add_confession(user_id: Optional[int], content: str, is_anonymous: bool = Tr
         
         confession_id = cursor.lastrowid
         
-        # Create notification for admins
-        cursor.execute('''
-            INSERT INTO notifications (user_id, title, message, type, reference_id)
-            SELECT id, 'New Confession Pending', 'A new confession needs moderation', 'confession', ?
-            FROM users WHERE role = 'admin'
-        ''', (confession_id,))
+        # Notify admins
+        _add_broadcast(cursor, 'New Confession Pending', 'A new confession needs moderation',
+                       'confession', confession_id, audience_role='admin', verified_only=False)
         
         conn.commit()
+        bump_table_versions('confessions', 'broadcasts')
         return confession_id
     except Exception as e:
         print(f"Error adding confession: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
-def get_confessions(status: str = 'approved', limit: int = 50, offset: int = 0) -> List[Dict]:
-    """Get confessions"""
+@instrumented
+def get_confessions(status: str = 'approved', limit: int = 50,
+                    before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict]:
+    """Get confessions, newest first (before_id/after_id page by confession id)"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
+        keyset, keyset_params, order = _keyset('c.id', before_id, after_id)
         if status == 'all':
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT c.*, 
                        u.first_name, u.last_name, u.profile_pic,
                        (SELECT COUNT(*) FROM confession_likes WHERE confession_id = c.id) as like_count,
                        (SELECT COUNT(*) FROM confession_likes WHERE confession_id = c.id AND user_id = ?) as user_liked
                 FROM confessions c
                 LEFT JOIN users u ON c.user_id = u.id
-                ORDER BY c.created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (None, limit, offset))
+                WHERE 1 = 1{keyset}
+                ORDER BY c.id {order}
+                LIMIT ?
+            ''', (None, *keyset_params, limit))
         else:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT c.*, 
                        u.first_name, u.last_name, u.profile_pic,
                        (SELECT COUNT(*) FROM confession_likes WHERE confession_id = c.id) as like_count,
                        (SELECT COUNT(*) FROM confession_likes WHERE confession_id = c.id AND user_id = ?) as user_liked
                 FROM confessions c
                 LEFT JOIN users u ON c.user_id = u.id
-                WHERE c.status = ?
-                ORDER BY c.created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (None, status, limit, offset))
+                WHERE c.status = ?{keyset}
+                ORDER BY c.id {order}
+                LIMIT ?
+            ''', (None, status, *keyset_params, limit))
         
-        return [dict(row) for row in cursor.fetchall()]
+        confessions = cursor.fetchall()
+        return confessions[::-1] if order == 'ASC' else confessions
     finally:
         conn.close()
 
+@instrumented
 def like_confession(confession_id: int, user_id: int) -> bool:
     """Like or unlike a confession"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Check if already liked
@@ -1025,17 +1338,21 @@ def like_confession(confession_id: int, user_id: int) -> bool:
         ''', (confession_id, confession_id))
         
         conn.commit()
+        bump_table_versions('confession_likes', 'confessions')
         return True
     except Exception as e:
         print(f"Error liking confession: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def update_confession_status(confession_id: int, status: str) -> bool:
     """Update confession status (for moderation)"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1062,18 +1379,22 @@ def update_confession_status(confession_id: int, status: str) -> bool:
         ''', (status, status, confession_id, confession_id))
         
         conn.commit()
+        bump_table_versions('confessions', 'notifications')
         return cursor.rowcount > 0
     except Exception as e:
         print(f"Error updating confession status: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # Events Functions
+@instrumented
 def add_event(title: str, description: str, organizer_id: int, event_date: str, **kwargs) -> Optional[int]:
     """Add an event"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1096,17 +1417,21 @@ def add_event(title: str, description: str, organizer_id: int, event_date: str,
         ''', (event_id, organizer_id))
         
         conn.commit()
+        bump_table_versions('events', 'event_participants')
         return event_id
     except Exception as e:
         print(f"Error adding event: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
-def get_events(upcoming: bool = True, limit: int = 20, user_id: Optional[int] = None) -> List[Dict]:
-    """Get events"""
+@instrumented
+def get_events(upcoming: bool = True, limit: int = 20, user_id: Optional[int] = None,
+               after: Optional[tuple] = None) -> List[Dict]:
+    """Get events in date order; pass event_cursor(last_event) as after for the next page"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         if upcoming:
@@ -1114,6 +1439,13 @@ def get_events(upcoming: bool = True, limit: int = 20, user_id: Optional[int] =
         else:
             date_filter = "e.event_date < DATE('now')"
         
+        # Seek past the cursor on (event_date, event_time, id); a missing
+        # time sorts first, as NULL does in the ORDER BY
+        keyset_params = []
+        if after is not None:
+            date_filter += " AND (e.event_date, COALESCE(e.event_time, ''), e.id) > (?, ?, ?)"
+            keyset_params = [after[0], after[1] or '', after[2]]
+        
         if user_id:
             cursor.execute(f'''
                 SELECT e.*, 
@@ -1127,9 +1459,9 @@ def get_events(upcoming: bool = True, limit: int = 20, user_id: Optional[int] =
                 LEFT JOIN event_participants ep ON e.id = ep.event_id
                 WHERE {date_filter}
                 GROUP BY e.id
-                ORDER BY e.event_date, e.event_time
+                ORDER BY e.event_date, e.event_time, e.id
                 LIMIT ?
-            ''', (user_id, limit))
+            ''', (user_id, *keyset_params, limit))
         else:
             cursor.execute(f'''
                 SELECT e.*, 
@@ -1142,18 +1474,24 @@ def get_events(upcoming: bool = True, limit: int = 20, user_id: Optional[int] =
                 LEFT JOIN event_participants ep ON e.id = ep.event_id
                 WHERE {date_filter}
                 GROUP BY e.id
-                ORDER BY e.event_date, e.event_time
+                ORDER BY e.event_date, e.event_time, e.id
                 LIMIT ?
-            ''', (limit,))
+            ''', (*keyset_params, limit))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
+def event_cursor(event: Dict) -> tuple:
+    """Pagination cursor for get_events(after=...) from the last event shown"""
+    return (event['event_date'], event.get('event_time'), event['id'])
+
+@instrumented
 def register_for_event(event_id: int, user_id: int) -> tuple[bool, str]:
     """Register user for an event"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Check if already registered
@@ -1184,25 +1522,29 @@ def register_for_event(event_id: int, user_id: int) -> tuple[bool, str]:
             VALUES (?, ?)
         ''', (event_id, user_id))
         
+        conn.commit()
+        bump_table_versions('event_participants')
+        
         # Create notification
-        cursor.execute('''
+        defer_write('''
             INSERT INTO notifications (user_id, title, message, type, reference_id)
             VALUES (?, 'Event Registration', 
                    'You have successfully registered for an event',
                    'event', ?)
         ''', (user_id, event_id))
         
-        conn.commit()
         return True, "Successfully registered"
     except Exception as e:
         return False, str(e)
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def get_user_events(user_id: int, upcoming: bool = True) -> List[Dict]:
     """Get events user is registered for"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         if upcoming:
@@ -1222,15 +1564,17 @@ def get_user_events(user_id: int, upcoming: bool = True) -> List[Dict]:
             ORDER BY e.event_date, e.event_time
         ''', (user_id,))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
 # Announcements Functions
+@instrumented
 def add_announcement(title: str, content: str, created_by: int, target_role: Optional[str] = None, priority: str = 'normal') -> Optional[int]:
     """Add an announcement"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1240,34 +1584,27 @@ def add_announcement(title: str, content: str, created_by: int, target_role: Opt
         
         announcement_id = cursor.lastrowid
         
-        # Create notifications for targeted users
-        if target_role and target_role != 'all':
-            cursor.execute('''
-                INSERT INTO notifications (user_id, title, message, type, reference_id)
-                SELECT id, 'New Announcement', ?, 'announcement', ?
-                FROM users 
-                WHERE role = ? AND is_verified = 1
-            ''', (title, announcement_id, target_role))
-        else:
-            cursor.execute('''
-                INSERT INTO notifications (user_id, title, message, type, reference_id)
-                SELECT id, 'New Announcement', ?, 'announcement', ?
-                FROM users 
-                WHERE is_verified = 1
-            ''', (title, announcement_id))
+        # One broadcast for the whole audience, merged in by get_notifications
+        _add_broadcast(cursor, 'New Announcement', title, 'announcement', announcement_id,
+                       audience_role=target_role if target_role != 'all' else None,
+                       created_by=created_by)
         
         conn.commit()
+        bump_table_versions('announcements', 'broadcasts')
         return announcement_id
     except Exception as e:
         print(f"Error adding announcement: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@cached('announcements', 'users')
+@instrumented
 def get_announcements(target_role: Optional[str] = None, limit: int = 10) -> List[Dict]:
     """Get announcements"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         if target_role:
@@ -1306,15 +1643,17 @@ def get_announcements(target_role: Optional[str] = None, limit: int = 10) -> Lis
                 LIMIT ?
             ''', (limit,))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
 # Contributions Functions (Alumni)
+@instrumented
 def add_contribution(alumni_id: int, type: str, title: str, **kwargs) -> Optional[int]:
     """Add a contribution"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1330,17 +1669,20 @@ def add_contribution(alumni_id: int, type: str, title: str, **kwargs) -> Optiona
               kwargs.get('deadline')))
         
         conn.commit()
+        bump_table_versions('contributions')
         return cursor.lastrowid
     except Exception as e:
         print(f"Error adding contribution: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
+@instrumented
 def get_contributions(alumni_id: Optional[int] = None, status: Optional[str] = None) -> List[Dict]:
     """Get contributions"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         query = '''
@@ -1366,75 +1708,260 @@ def get_contributions(alumni_id: Optional[int] = None, status: Optional[str] = N
         query += ' ORDER BY c.created_at DESC'
         
         cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
 # Notifications Functions
-def get_notifications(user_id: int, unread_only: bool = False, limit: int = 20) -> List[Dict]:
-    """Get notifications for a user"""
+NOTIFICATION_COLUMNS = 'id, user_id, title, message, type, reference_id, is_read, event_count, created_at, updated_at'
+
+# Appended to an INSERT carrying a coalesce_key: a repeat within the window
+# folds into the existing row (restarting the count once that was read)
+COALESCE_NOTIFICATION = '''
+    ON CONFLICT(user_id, coalesce_key) WHERE coalesce_key IS NOT NULL DO UPDATE SET
+        title = excluded.title,
+        message = excluded.message,
+        reference_id = excluded.reference_id,
+        event_count = CASE WHEN is_read = 1 THEN 1 ELSE event_count + 1 END,
+        is_read = 0,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+def notification_coalesce_key(source: str, at: Optional[float] = None) -> str:
+    """Coalesce key for notifications from source (e.g. 'message:<sender id>') in the current window"""
+    at = time.time() if at is None else at
+    return f"{source}:{int(at // NOTIFICATION_COALESCE_WINDOW)}"
+
+def _add_broadcast(cursor, title: str, message: str, type: str, reference_id: Optional[int] = None,
+                   audience_role: Optional[str] = None, audience_department: Optional[str] = None,
+                   verified_only: bool = True, created_by: Optional[int] = None) -> int:
+    """Record a notification for everyone matching the audience, as one row (inside the caller's transaction)"""
+    cursor.execute('''
+        INSERT INTO broadcasts (title, message, type, reference_id, audience_role,
+                                audience_department, verified_only, created_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (title, message, type, reference_id, audience_role, audience_department,
+          1 if verified_only else 0, created_by))
+    return cursor.lastrowid
+
+def _user_broadcasts(cursor, user_id: int, unread_only: bool = False) -> Optional[tuple]:
+    """SELECT of the broadcasts addressed to a user, shaped like NOTIFICATION_COLUMNS
+
+    Returns (sql, params), or None for an unknown user.
+    """
+    cursor.execute('''
+        SELECT u.role, u.department, u.is_verified, u.created_at,
+               COALESCE(r.read_through, 0) as read_through
+        FROM users u LEFT JOIN broadcast_reads r ON r.user_id = u.id
+        WHERE u.id = ?
+    ''', (user_id,))
+    audience = cursor.fetchone()
+    if audience is None:
+        return None
+    
+    # Broadcasts past the read cursor are unread unless dismissed
+    unread = ' AND b.id > ? AND d.broadcast_id IS NULL' if unread_only else ''
+    sql = f'''
+        SELECT -b.id as id, ? as user_id, b.title, b.message, b.type, b.reference_id,
+               CASE WHEN b.id <= ? OR d.broadcast_id IS NOT NULL THEN 1 ELSE 0 END as is_read,
+               1 as event_count, b.created_at, b.created_at as updated_at
+        FROM broadcasts b
+        LEFT JOIN broadcast_dismissals d ON d.user_id = ? AND d.broadcast_id = b.id
+        WHERE (b.audience_role IS NULL OR b.audience_role = ?)
+          AND (b.audience_department IS NULL OR b.audience_department = ?)
+          AND (b.verified_only = 0 OR ? = 1)
+          AND b.created_at >= ?{unread}
+    '''
+    params = [user_id, audience['read_through'], user_id,
+              audience['role'], audience['department'], audience['is_verified'],
+              audience['created_at'] or '']
+    if unread_only:
+        params.append(audience['read_through'])
+    return sql, params
+
+@memoized
+@instrumented
+def get_notifications(user_id: int, unread_only: bool = False, limit: int = 20,
+                      before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict]:
+    """Get notifications for a user, newest first (before_id/after_id page by notification id)
+
+    The first page is ordered by latest activity: coalesced rows count their
+    events in event_count and sort by their latest one (updated_at), however
+    old their id. Broadcasts addressed to the user are merged into it. They
+    carry negative ids (-broadcast id), which mark_notification_read accepts.
+    """
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
-        if unread_only:
-            cursor.execute('''
-                SELECT * FROM notifications
-                WHERE user_id = ? AND is_read = 0
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
-        else:
-            cursor.execute('''
-                SELECT * FROM notifications
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
+        first_page = before_id is None and after_id is None
+        keyset, keyset_params, order = _keyset('id', before_id, after_id)
+        unread = ' AND is_read = 0' if unread_only else ''
+        sort = f'{NOTIFICATION_ACTIVITY} DESC, id DESC' if first_page else f'id {order}'
+        personal = f'''
+            SELECT {NOTIFICATION_COLUMNS} FROM notifications
+            WHERE user_id = ?{unread}{keyset}
+            ORDER BY {sort}
+            LIMIT ?
+        '''
+        
+        broadcasts = None
+        if first_page:
+            broadcasts = _user_broadcasts(cursor, user_id, unread_only)
+        if broadcasts is None:
+            cursor.execute(personal, (user_id, *keyset_params, limit))
+            notifications = cursor.fetchall()
+            return notifications[::-1] if order == 'ASC' else notifications
+        
+        broadcast_sql, broadcast_params = broadcasts
+        cursor.execute(f'''
+            SELECT * FROM (
+                SELECT * FROM ({personal})
+                UNION ALL
+                SELECT * FROM ({broadcast_sql} ORDER BY b.id DESC LIMIT ?)
+            )
+            ORDER BY {NOTIFICATION_ACTIVITY} DESC, ABS(id) DESC
+            LIMIT ?
+        ''', (user_id, limit, *broadcast_params, limit, limit))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
     finally:
         conn.close()
 
-def mark_notification_read(notification_id: int) -> bool:
-    """Mark a notification as read"""
+@memoized
+@instrumented
+def get_notification_digest(user_id: int) -> List[Dict]:
+    """Get unread notifications grouped by type, busiest first
+
+    Each group has type, notifications (rows), events (what those rows
+    coalesce), latest_at and the title/message of its newest row.
+    """
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            UPDATE notifications 
-            SET is_read = 1 
-            WHERE id = ?
-        ''', (notification_id,))
+        unread = f'''
+            SELECT {NOTIFICATION_COLUMNS} FROM notifications
+            WHERE user_id = ? AND is_read = 0
+        '''
+        params: List[Any] = [user_id]
+        broadcasts = _user_broadcasts(cursor, user_id, unread_only=True)
+        if broadcasts is not None:
+            unread += f' UNION ALL {broadcasts[0]}'
+            params.extend(broadcasts[1])
         
-        conn.commit()
-        return cursor.rowcount > 0
+        # Bare columns next to MAX() come from the row holding the maximum
+        cursor.execute(f'''
+            SELECT type, COUNT(*) as notifications, SUM(event_count) as events,
+                   MAX(COALESCE(updated_at, created_at)) as latest_at, title, message
+            FROM ({unread})
+            GROUP BY type
+            ORDER BY events DESC, latest_at DESC
+        ''', params)
+        
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+BADGE_COLUMNS = ('unread_notifications', 'unread_messages', 'pending_friend_requests', 'friends_count')
+
+@memoized
+@instrumented
+def get_badge_counts(user_id: int) -> Dict[str, int]:
+    """Get a user's sidebar/dashboard counts: unread notifications (broadcasts
+    included) and messages, pending friend requests and friends"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {', '.join(BADGE_COLUMNS)} FROM badge_counts WHERE user_id = ?
+        ''', (user_id,))
+        row = cursor.fetchone()
+        counts = {column: row[column] if row else 0 for column in BADGE_COLUMNS}
+        
+        broadcasts = _user_broadcasts(cursor, user_id, unread_only=True)
+        if broadcasts is not None:
+            cursor.execute(f'SELECT COUNT(*) FROM ({broadcasts[0]})', broadcasts[1])
+            counts['unread_notifications'] += cursor.fetchone()[0]
+        
+        return counts
     finally:
         conn.close()
 
+@instrumented
+def mark_notification_read(notification_id: int, user_id: Optional[int] = None) -> bool:
+    """Mark a notification as read (a negative id dismisses that broadcast for user_id)"""
+    if notification_id < 0 and user_id is None:
+        return False
+    conn = None
+    try:
+        conn = get_write_connection()
+        cursor = conn.cursor()
+        
+        if notification_id < 0:
+            cursor.execute('''
+                INSERT OR IGNORE INTO broadcast_dismissals (user_id, broadcast_id)
+                VALUES (?, ?)
+            ''', (user_id, -notification_id))
+            tables = ('broadcast_dismissals',)
+        else:
+            cursor.execute('''
+                UPDATE notifications 
+                SET is_read = 1 
+                WHERE id = ?
+            ''', (notification_id,))
+            tables = ('notifications',)
+        
+        changed = cursor.rowcount > 0
+        conn.commit()
+        bump_table_versions(*tables)
+        return changed
+    finally:
+        if conn is not None:
+            conn.close()
+
+@instrumented
 def mark_all_notifications_read(user_id: int) -> bool:
     """Mark all notifications as read for a user"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
             UPDATE notifications 
             SET is_read = 1 
-            WHERE user_id = ?
+            WHERE user_id = ? AND is_read = 0
         ''', (user_id,))
+        changed = cursor.rowcount > 0
+        
+        # Broadcasts: move the cursor past everything posted so far
+        cursor.execute('''
+            INSERT INTO broadcast_reads (user_id, read_through)
+            SELECT ?, id FROM broadcasts WHERE id = (SELECT MAX(id) FROM broadcasts)
+            ON CONFLICT(user_id) DO UPDATE SET read_through = excluded.read_through
+            WHERE excluded.read_through > read_through
+        ''', (user_id,))
+        changed = changed or cursor.rowcount > 0
+        
+        # Dismissals at or below the cursor are implied by it now
+        cursor.execute('DELETE FROM broadcast_dismissals WHERE user_id = ?', (user_id,))
         
         conn.commit()
-        return cursor.rowcount > 0
+        bump_table_versions('notifications', 'broadcast_reads', 'broadcast_dismissals')
+        return changed
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # Job Postings Functions
+@instrumented
 def add_job_posting(posted_by: int, company: str, position: str, description: str, **kwargs) -> Optional[int]:
     """Add a job posting"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1452,59 +1979,65 @@ def add_job_posting(posted_by: int, company: str, position: str, description: st
         
         job_id = cursor.lastrowid
         
-        # Create notification for students
-        cursor.execute('''
-            INSERT INTO notifications (user_id, title, message, type, reference_id)
-            SELECT id, 'New Job Opportunity', ?, 'announcement', ?
-            FROM users 
-            WHERE role = 'student' AND is_verified = 1
-        ''', (f"New position: {position} at {company}", job_id))
+        # Notify students
+        _add_broadcast(cursor, 'New Job Opportunity', f"New position: {position} at {company}",
+                       'announcement', job_id, audience_role='student', created_by=posted_by)
         
         conn.commit()
+        bump_table_versions('job_postings', 'broadcasts')
         return job_id
     except Exception as e:
         print(f"Error adding job posting: {e}")
         return None
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
-def get_job_postings(active_only: bool = True, limit: int = 20) -> List[Dict]:
-    """Get job postings"""
+@cached('job_postings', 'users')
+@instrumented
+def get_job_postings(active_only: bool = True, limit: int = 20,
+                     before_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Dict]:
+    """Get job postings, newest first (before_id/after_id page by posting id)"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
+        keyset, keyset_params, order = _keyset('j.id', before_id, after_id)
         if active_only:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT j.*, 
                        u.first_name, u.last_name, u.profile_pic,
                        u.current_position, u.company as poster_company
                 FROM job_postings j
                 JOIN users u ON j.posted_by = u.id
                 WHERE j.is_active = 1 
-                AND (j.deadline IS NULL OR j.deadline >= DATE('now'))
-                ORDER BY j.created_at DESC
+                AND (j.deadline IS NULL OR j.deadline >= DATE('now')){keyset}
+                ORDER BY j.id {order}
                 LIMIT ?
-            ''', (limit,))
+            ''', (*keyset_params, limit))
         else:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT j.*, 
                        u.first_name, u.last_name, u.profile_pic,
                        u.current_position, u.company as poster_company
                 FROM job_postings j
                 JOIN users u ON j.posted_by = u.id
-                ORDER BY j.created_at DESC
+                WHERE 1 = 1{keyset}
+                ORDER BY j.id {order}
                 LIMIT ?
-            ''', (limit,))
+            ''', (*keyset_params, limit))
         
-        return [dict(row) for row in cursor.fetchall()]
+        jobs = cursor.fetchall()
+        return jobs[::-1] if order == 'ASC' else jobs
     finally:
         conn.close()
 
+@instrumented
 def apply_for_job(job_id: int, applicant_id: int, cover_letter: Optional[str] = None, resume: Optional[str] = None) -> bool:
     """Apply for a job"""
+    conn = None
     try:
-        conn = get_connection()
+        conn = get_write_connection()
         cursor = conn.cursor()
         
         # Check if already applied
@@ -1521,62 +2054,61 @@ def apply_for_job(job_id: int, applicant_id: int, cover_letter: Optional[str] =
             VALUES (?, ?, ?, ?)
         ''', (job_id, applicant_id, cover_letter, resume))
         
-        # Create notification for job poster
+        # Create notification for job poster (one per posting per window)
         cursor.execute('''
-            INSERT INTO notifications (user_id, title, message, type, reference_id)
+            INSERT INTO notifications (user_id, title, message, type, reference_id, coalesce_key, updated_at)
             SELECT posted_by, 'New Job Application', 
                    (SELECT first_name || ' ' || last_name FROM users WHERE id = ?) || ' applied for ' || position,
-                   'announcement', ?
+                   'announcement', ?, ?, CURRENT_TIMESTAMP
             FROM job_postings 
             WHERE id = ?
-        ''', (applicant_id, cursor.lastrowid, job_id))
+        ''' + COALESCE_NOTIFICATION,
+            (applicant_id, cursor.lastrowid, notification_coalesce_key(f"job_application:{job_id}"), job_id))
         
         conn.commit()
+        bump_table_versions('job_applications', 'notifications')
         return True
     except Exception as e:
         print(f"Error applying for job: {e}")
         return False
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # Analytics Functions
+def _read_counters(cursor, prefix: str) -> Dict[str, int]:
+    """Read the stats counters under a name prefix, keyed by the rest of the name"""
+    # The prefix ends in '.', so every name under it sorts before prefix + '/'
+    cursor.execute(
+        'SELECT name, value FROM stats_counters WHERE name > ? AND name < ?',
+        (prefix, prefix[:-1] + '/')
+    )
+    return {row['name'][len(prefix):]: row['value'] for row in cursor.fetchall()}
+
+def _counter_group(counters: Dict[str, int], prefix: str) -> Dict[str, int]:
+    """Non-zero counters under a sub-prefix such as 'role:'"""
+    return {name[len(prefix):]: value for name, value in counters.items()
+            if name.startswith(prefix) and value}
+
+@cached('users', 'stats_counters', ttl=60)
+@instrumented
 def get_user_statistics() -> Dict:
     """Get user statistics"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         stats = {}
         
-        # Total users
-        cursor.execute("SELECT COUNT(*) as total FROM users WHERE is_verified = 1")
-        stats['total_users'] = cursor.fetchone()['total']
-        
-        # Users by role
-        cursor.execute('''
-            SELECT role, COUNT(*) as count 
-            FROM users 
-            WHERE is_verified = 1 
-            GROUP BY role
-        ''')
-        stats['users_by_role'] = {row['role']: row['count'] for row in cursor.fetchall()}
-        
-        # Users by department
-        cursor.execute('''
-            SELECT department, COUNT(*) as count 
-            FROM users 
-            WHERE is_verified = 1 AND department IS NOT NULL
-            GROUP BY department
-        ''')
-        stats['users_by_department'] = {row['department']: row['count'] for row in cursor.fetchall()}
+        # Totals, roles, departments and monthly sign-ups come from stats_counters
+        counters = _read_counters(cursor, 'users.')
+        stats['total_users'] = counters.get('total', 0)
+        stats['users_by_role'] = _counter_group(counters, 'role:')
+        stats['users_by_department'] = _counter_group(counters, 'department:')
         
         # New users this month
-        cursor.execute('''
-            SELECT COUNT(*) as count FROM users 
-            WHERE strftime('%Y-%m', created_at) = strftime('%Y-%m', 'now')
-            AND is_verified = 1
-        ''')
-        stats['new_users_month'] = cursor.fetchone()['count']
+        cursor.execute("SELECT strftime('%Y-%m', 'now') as month")
+        stats['new_users_month'] = counters.get(f"month:{cursor.fetchone()['month']}", 0)
         
         # Active users (logged in last 30 days)
         cursor.execute('''
@@ -1590,57 +2122,647 @@ def get_user_statistics() -> Dict:
     finally:
         conn.close()
 
+@cached('confessions', 'events', 'groups', 'messages', 'job_postings', 'stats_counters', ttl=60)
+@instrumented
 def get_platform_statistics() -> Dict:
     """Get platform statistics"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
         stats = {}
         
+        cursor.execute('''
+            SELECT name, value FROM stats_counters
+            WHERE name IN ('confessions.status:approved', 'groups.total', 'messages.total', 'job_postings.active')
+        ''')
+        counters = {row['name']: row['value'] for row in cursor.fetchall()}
+        
         # Total confessions
-        cursor.execute("SELECT COUNT(*) as total FROM confessions WHERE status = 'approved'")
-        stats['total_confessions'] = cursor.fetchone()['total']
+        stats['total_confessions'] = counters.get('confessions.status:approved', 0)
         
-        # Total events
-        cursor.execute("SELECT COUNT(*) as total FROM events WHERE event_date >= DATE('now')")
+        # Events from today on: a short range of per-date counters
+        cursor.execute('''
+            SELECT COALESCE(SUM(value), 0) as total FROM stats_counters
+            WHERE name >= 'events.date:' || DATE('now') AND name < 'events.date;'
+        ''')
         stats['active_events'] = cursor.fetchone()['total']
         
         # Total groups
-        cursor.execute("SELECT COUNT(*) as total FROM groups")
-        stats['total_groups'] = cursor.fetchone()['total']
+        stats['total_groups'] = counters.get('groups.total', 0)
         
         # Total messages
-        cursor.execute("SELECT COUNT(*) as total FROM messages")
-        stats['total_messages'] = cursor.fetchone()['total']
+        stats['total_messages'] = counters.get('messages.total', 0)
         
         # Total job postings
-        cursor.execute("SELECT COUNT(*) as total FROM job_postings WHERE is_active = 1")
-        stats['active_jobs'] = cursor.fetchone()['total']
+        stats['active_jobs'] = counters.get('job_postings.active', 0)
         
         return stats
     finally:
         conn.close()
 
-def get_growth_data(days: int = 30) -> List[Dict]:
-    """Get growth data for chart"""
+@cached('users', 'daily_rollups', ttl=60)
+@instrumented
+def get_growth_data(days: int = 30, columnar: bool = False) -> Union[List[Dict], Dict[str, List]]:
+    """Get growth data for chart (columnar=True returns column -> values for DataFrames)"""
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute(f'''
+        # One rollup row per day and role instead of grouping the users table
+        cursor.execute('''
             SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as new_users,
-                SUM(CASE WHEN role = 'student' THEN 1 ELSE 0 END) as students,
-                SUM(CASE WHEN role = 'alumni' THEN 1 ELSE 0 END) as alumni
-            FROM users 
-            WHERE is_verified = 1
-            AND DATE(created_at) >= DATE('now', '-{days} days')
-            GROUP BY DATE(created_at)
-            ORDER BY date
+                day as date,
+                SUM(value) as new_users,
+                SUM(CASE WHEN dimension = 'student' THEN value ELSE 0 END) as students,
+                SUM(CASE WHEN dimension = 'alumni' THEN value ELSE 0 END) as alumni
+            FROM daily_rollups 
+            WHERE metric = 'users.new'
+            AND day >= DATE('now', ?)
+            GROUP BY day
+            HAVING SUM(value) > 0
+            ORDER BY day
+        ''', (f'-{int(days)} days',))
+        
+        return fetch_columns(cursor) if columnar else cursor.fetchall()
+    finally:
+        conn.close()
+
+@cached(*ROLLUP_TABLES, ttl=60)
+@instrumented
+def get_daily_rollups(metric: str, days: Optional[int] = 30,
+                      columnar: bool = False) -> Union[List[Dict], Dict[str, List]]:
+    """Get one metric's per-day counts (day, dimension, value), oldest first; days=None for all history"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        query = 'SELECT day, dimension, value FROM daily_rollups WHERE metric = ?'
+        params = [metric]
+        if days is not None:
+            query += " AND day >= DATE('now', ?)"
+            params.append(f'-{int(days)} days')
+        query += ' ORDER BY day, dimension'
+        
+        cursor.execute(query, params)
+        return fetch_columns(cursor) if columnar else cursor.fetchall()
+    finally:
+        conn.close()
+
+@cached(*ROLLUP_TABLES, ttl=60)
+@instrumented
+def get_rollup_totals(metric: str, days: Optional[int] = None) -> Dict[str, int]:
+    """Get one metric's totals per dimension, over all history or the last days"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        query = 'SELECT dimension, SUM(value) as total FROM daily_rollups WHERE metric = ?'
+        params = [metric]
+        if days is not None:
+            query += " AND day >= DATE('now', ?)"
+            params.append(f'-{int(days)} days')
+        query += ' GROUP BY dimension HAVING SUM(value) != 0'
+        
+        cursor.execute(query, params)
+        return {row['dimension']: row['total'] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+@cached('events', 'event_participants', 'stats_counters', ttl=60)
+@instrumented
+def get_event_statistics() -> Dict:
+    """Get event totals and participation without loading the events"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        stats = {}
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(value), 0) as total FROM stats_counters
+            WHERE name > 'events.date:' AND name < 'events.date;'
         ''')
+        stats['total_events'] = cursor.fetchone()['total']
         
-        return [dict(row) for row in cursor.fetchall()]
+        cursor.execute('''
+            SELECT COALESCE(SUM(value), 0) as total FROM daily_rollups
+            WHERE metric = 'events.registrations'
+        ''')
+        stats['total_registrations'] = cursor.fetchone()['total']
+        stats['avg_participants'] = (stats['total_registrations'] / stats['total_events']
+                                     if stats['total_events'] else 0)
+        
+        # Walks the UNIQUE(event_id, user_id) index
+        cursor.execute('''
+            SELECT COUNT(*) as count FROM event_participants
+            GROUP BY event_id ORDER BY count DESC LIMIT 1
+        ''')
+        row = cursor.fetchone()
+        stats['max_participants'] = row['count'] if row else 0
+        
+        return stats
+    finally:
+        conn.close()
+
+def _run_backfill(progress_table: str, statements: Dict[str, List[str]], batch_size: int,
+                  pause: float, max_batches: Optional[int], changed: str) -> Dict[str, int]:
+    """Work through a backfill progress table one id batch per write transaction"""
+    covered: Dict[str, int] = {}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        conn = get_write_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT source, next_id, last_id FROM {progress_table} ORDER BY source LIMIT 1')
+            pending = cursor.fetchone()
+            if pending is None:
+                conn.commit()
+                break
+            
+            source = pending['source']
+            first_id = pending['next_id']
+            last_id = min(first_id + batch_size - 1, pending['last_id'])
+            for statement in statements[source]:
+                cursor.execute(statement, (first_id, last_id))
+            
+            # Moving next_id hands these rows over to the triggers
+            if last_id >= pending['last_id']:
+                cursor.execute(f'DELETE FROM {progress_table} WHERE source = ?', (source,))
+            else:
+                cursor.execute(f'UPDATE {progress_table} SET next_id = ? WHERE source = ?', (last_id + 1, source))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        bump_table_versions(changed)
+        covered[source] = covered.get(source, 0) + last_id - first_id + 1
+        batches += 1
+        # Short transactions with a gap between them keep the writer available
+        time.sleep(pause)
+    return covered
+
+@instrumented
+def backfill_daily_rollups(batch_size: int = BACKFILL_BATCH, pause: float = BACKFILL_PAUSE,
+                           max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Fold rows created before daily_rollups existed into it; returns ids covered per table"""
+    return _run_backfill('rollup_backfill', DAILY_ROLLUP_BACKFILL, batch_size, pause, max_batches, 'daily_rollups')
+
+def _backfill_loop(name: str, backfill):
+    try:
+        covered = backfill()
+        if covered:
+            print(f"Backfilled {name}: {covered}")
+    except Exception as e:
+        print(f"Error backfilling {name}: {e}")
+
+def _start_backfill(name: str, progress_table: str, backfill) -> bool:
+    """Start a background backfill thread if its progress table has work left"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT 1 FROM {progress_table} LIMIT 1')
+        if cursor.fetchone() is None:
+            return False
+    finally:
+        conn.close()
+    
+    with _pool_lock:
+        thread = _backfills.get(name)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=_backfill_loop, args=(name, backfill),
+                                  name=f"mes-backfill-{name.replace(' ', '-')}", daemon=True)
+        _backfills[name] = thread
+        thread.start()
+        return True
+
+def start_rollup_backfill() -> bool:
+    """Start the background backfill of daily_rollups if any history is still pending"""
+    return _start_backfill('daily rollups', 'rollup_backfill', backfill_daily_rollups)
+
+@instrumented
+def reconcile_stats_counters() -> Dict[str, int]:
+    """Recompute every stats counter from the base tables; returns the drift corrected"""
+    conn = get_write_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT name, value FROM stats_counters')
+        before = {row['name']: row['value'] for row in cursor.fetchall()}
+        for statement in STATS_COUNTERS_REBUILD:
+            cursor.execute(statement)
+        cursor.execute('SELECT name, value FROM stats_counters')
+        after = {row['name']: row['value'] for row in cursor.fetchall()}
+        conn.commit()
+    finally:
+        conn.close()
+    
+    bump_table_versions('stats_counters')
+    drift = {name: after.get(name, 0) - before.get(name, 0) for name in set(before) | set(after)}
+    return {name: delta for name, delta in drift.items() if delta}
+
+@instrumented
+def reconcile_badge_counts() -> int:
+    """Recompute every user's badge counts from the base tables; returns how many users' counts changed"""
+    conn = get_write_connection()
+    try:
+        cursor = conn.cursor()
+        columns = ', '.join(BADGE_COLUMNS)
+        cursor.execute(f'SELECT user_id, {columns} FROM badge_counts')
+        before = {row['user_id']: tuple(row[c] for c in BADGE_COLUMNS) for row in cursor.fetchall()}
+        for statement in BADGE_COUNTS_REBUILD:
+            cursor.execute(statement)
+        cursor.execute(f'SELECT user_id, {columns} FROM badge_counts')
+        after = {row['user_id']: tuple(row[c] for c in BADGE_COLUMNS) for row in cursor.fetchall()}
+        conn.commit()
+    finally:
+        conn.close()
+    
+    bump_table_versions('badge_counts')
+    zero = (0,) * len(BADGE_COLUMNS)
+    return sum(1 for user_id in set(before) | set(after)
+               if before.get(user_id, zero) != after.get(user_id, zero))
+
+# Settings Functions
+DEFAULT_SETTINGS = {
+    'cache.enabled': True,
+    'cache.ttl_seconds': 300,
+    'retention.enabled': True,
+    'retention.months': 24,
+    'retention.read_notifications_days': 30,
+    'backup.enabled': True,
+    'backup.frequency': 'Daily',
+    'backup.time': '02:00',
+    'backup.keep': 30,
+    'backup.dir': '',
+}
+
+@cached('settings')
+@instrumented
+def get_settings() -> Dict[str, Any]:
+    """Get platform settings: stored values over DEFAULT_SETTINGS"""
+    settings = dict(DEFAULT_SETTINGS)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT key, value FROM settings')
+        for row in cursor.fetchall():
+            settings[row['key']] = json.loads(row['value'])
+    finally:
+        conn.close()
+    return settings
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """Get a single setting"""
+    return get_settings().get(key, default)
+
+@instrumented
+def save_settings(settings: Dict[str, Any], updated_by: Optional[int] = None) -> bool:
+    """Store settings and apply them to this process"""
+    conn = None
+    try:
+        conn = get_write_connection()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO settings (key, value, updated_by, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                updated_by = excluded.updated_by,
+                updated_at = excluded.updated_at
+        ''', [(key, json.dumps(value), updated_by) for key, value in settings.items()])
+        conn.commit()
+        bump_table_versions('settings')
+    except Exception as e:
+        print(f"Error saving settings: {e}")
+        return False
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    apply_settings()
+    return True
+
+def apply_settings(settings: Optional[Dict[str, Any]] = None):
+    """Push stored settings into the running process (cache configuration)"""
+    settings = get_settings() if settings is None else settings
+    query_cache.configure(
+        enabled=settings.get('cache.enabled', DEFAULT_SETTINGS['cache.enabled']),
+        ttl=settings.get('cache.ttl_seconds', DEFAULT_SETTINGS['cache.ttl_seconds']),
+    )
+
+# Retention Functions
+class RetentionPolicy(NamedTuple):
+    """Rows of table matching condition (bound to an age such as '-30 days') are purged"""
+    name: str
+    table: str
+    condition: str
+    age_setting: str
+    age_unit: str
+    # (table, column referencing table.id) rows deleted along with their parent
+    children: Tuple[Tuple[str, str], ...] = ()
+
+RETENTION_POLICIES = (
+    RetentionPolicy('read_notifications', 'notifications',
+                    "is_read = 1 AND COALESCE(updated_at, created_at) < DATETIME('now', ?)",
+                    'retention.read_notifications_days', 'days'),
+    RetentionPolicy('expired_job_postings', 'job_postings',
+                    "deadline IS NOT NULL AND deadline < DATE('now', ?)",
+                    'retention.months', 'months', (('job_applications', 'job_id'),)),
+    RetentionPolicy('rejected_confessions', 'confessions',
+                    "status = 'rejected' AND created_at < DATETIME('now', ?)",
+                    'retention.months', 'months', (('confession_likes', 'confession_id'),)),
+)
+
+def _purge_batch(policy: RetentionPolicy, age: str, batch_size: int) -> Dict[str, int]:
+    """Delete one batch of a policy's expired rows (children first) in its own transaction"""
+    conn = None
+    try:
+        conn = get_write_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id FROM {policy.table}
+            WHERE {policy.condition}
+            ORDER BY id
+            LIMIT ?
+        ''', (age, batch_size))
+        ids = [row['id'] for row in cursor.fetchall()]
+        
+        deleted: Dict[str, int] = {}
+        if ids:
+            # Purged rows stay counted in daily_rollups (long-term history)
+            tables = [policy.table] + [child for child, _ in policy.children]
+            cursor.executemany('INSERT INTO rollup_purge (source) VALUES (?)', [(table,) for table in tables])
+            marks = ', '.join('?' * len(ids))
+            for child, column in policy.children:
+                cursor.execute(f'DELETE FROM {child} WHERE {column} IN ({marks})', ids)
+                deleted[child] = cursor.rowcount
+            cursor.execute(f'DELETE FROM {policy.table} WHERE id IN ({marks})', ids)
+            deleted[policy.table] = cursor.rowcount
+            cursor.execute('DELETE FROM rollup_purge')
+        conn.commit()
+    finally:
+        if conn is not None:
+            conn.close()
+    return deleted
+
+@instrumented
+def run_retention(batch_size: int = RETENTION_BATCH, pause: float = RETENTION_PAUSE,
+                  max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Purge data past the retention settings; returns rows reclaimed per table
+
+    Works one small transaction at a time, pausing between them so
+    interactive writes get the lock. The report is stored as the
+    'retention.last_run' setting.
+    """
+    settings = get_settings()
+    reclaimed: Dict[str, int] = {}
+    batches = 0
+    for policy in RETENTION_POLICIES:
+        age = f"-{int(settings[policy.age_setting])} {policy.age_unit}"
+        while max_batches is None or batches < max_batches:
+            deleted = _purge_batch(policy, age, batch_size)
+            if not deleted:
+                break
+            bump_table_versions(*deleted)
+            for table, rows in deleted.items():
+                reclaimed[table] = reclaimed.get(table, 0) + rows
+            batches += 1
+            if deleted[policy.table] < batch_size:
+                break
+            time.sleep(pause)
+    
+    save_settings({'retention.last_run': {
+        'at': datetime.now().isoformat(sep=' ', timespec='seconds'),
+        'rows': reclaimed,
+    }})
+    return reclaimed
+
+# Scheduled Jobs
+@scheduler.handler('reconcile_counters')
+def _reconcile_counters_job() -> Dict[str, Any]:
+    return {'stats_counters': reconcile_stats_counters(), 'badge_counts': reconcile_badge_counts()}
+
+@scheduler.handler('retention')
+def _retention_job(force: bool = False) -> Any:
+    # The nightly run follows the Auto-cleanup setting; Run Cleanup forces one
+    if not force and not get_setting('retention.enabled'):
+        return 'disabled'
+    return run_retention()
+
+@scheduler.handler('publish_announcement')
+def _publish_announcement_job(title: str, content: str, created_by: int,
+                              target_role: Optional[str] = None, priority: str = 'normal') -> int:
+    announcement_id = add_announcement(title, content, created_by, target_role, priority)
+    if announcement_id is None:
+        raise RuntimeError("Announcement could not be published")
+    return announcement_id
+
+@scheduler.handler('optimize_database')
+@instrumented
+def optimize_database() -> Dict[str, Any]:
+    """Refresh planner statistics, merge search index segments and checkpoint the WAL"""
+    conn = get_write_connection(begin=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA optimize')
+        for table in ('messages_fts', 'group_messages_fts'):
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        conn.commit()
+        cursor.execute('PRAGMA freelist_count')
+        free_pages = cursor.fetchone()[0]
+        # Outside any transaction, so the WAL can be copied back and truncated
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        checkpoint = cursor.fetchone()
     finally:
         conn.close()
+    return {'free_pages': free_pages, 'wal_frames': checkpoint['log'],
+            'checkpointed': checkpoint['checkpointed'], 'busy': bool(checkpoint['busy'])}
+
+def get_backup_dir(settings: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Get where backups of the current database go (None if its backend has no file to copy)"""
+    backend = get_backend()
+    if not isinstance(backend, SQLiteFileBackend):
+        return None
+    settings = get_settings() if settings is None else settings
+    return settings.get('backup.dir') or os.path.join(os.path.dirname(backend.key), BACKUP_SUBDIR)
+
+def _backup_prefix() -> str:
+    return os.path.splitext(os.path.basename(get_backend().key))[0] + '-'
+
+def _is_backup_file(name: str, prefix: str) -> bool:
+    if not (name.startswith(prefix) and name.endswith('.db')):
+        return False
+    # Another database's copies may share the prefix (mes-*.db vs mes-connect-*.db)
+    try:
+        datetime.strptime(name[len(prefix):-len('.db')], BACKUP_STAMP)
+    except ValueError:
+        return False
+    return True
+
+def list_backups() -> List[Dict[str, Any]]:
+    """Get backup files of the current database, newest first"""
+    backup_dir = get_backup_dir()
+    if backup_dir is None or not os.path.isdir(backup_dir):
+        return []
+    prefix = _backup_prefix()
+    backups = []
+    for name in os.listdir(backup_dir):
+        if _is_backup_file(name, prefix):
+            path = os.path.join(backup_dir, name)
+            backups.append({
+                'file': name,
+                'path': path,
+                'bytes': os.path.getsize(path),
+                'created_at': datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S'),
+            })
+    return sorted(backups, key=lambda backup: backup['file'], reverse=True)
+
+@scheduler.handler('backup_database')
+@instrumented
+def create_backup(keep: Optional[int] = None) -> Dict[str, Any]:
+    """Copy the database into its backup folder, keeping the newest `keep` copies (default: backup.keep setting)"""
+    backup_dir = get_backup_dir()
+    if backup_dir is None:
+        raise RuntimeError(f"Storage backend '{get_backend().name}' has no database file to back up")
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, f"{_backup_prefix()}{datetime.now().strftime(BACKUP_STAMP)}.db")
+    
+    # Online backup from a reader: a consistent snapshot that never blocks the writer
+    source = get_connection()
+    try:
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+    
+    keep = int(get_setting('backup.keep') if keep is None else keep)
+    removed = []
+    for backup in list_backups()[keep:]:
+        os.remove(backup['path'])
+        removed.append(backup['file'])
+    return {'file': os.path.basename(path), 'bytes': os.path.getsize(path), 'removed': removed}
+
+def backup_schedule(frequency: str, at: str) -> str:
+    """Cron schedule for the Daily/Weekly/Monthly backup setting at HH:MM"""
+    hour, minute = (int(part) for part in at.split(':')[:2])
+    day_fields = {'Daily': '* * *', 'Weekly': '* * 0', 'Monthly': '1 * *'}[frequency]
+    return f"{minute} {hour} {day_fields}"
+
+def schedule_backups(settings: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Create, update or cancel the recurring backup job from the backup settings
+
+    Backends without a database file (memory) are never backed up.
+    """
+    settings = get_settings() if settings is None else settings
+    try:
+        if settings['backup.enabled'] and get_backup_dir(settings) is not None:
+            return scheduler.enqueue('backup_database', name='backup', reactivate=True,
+                                     schedule=backup_schedule(settings['backup.frequency'], settings['backup.time']))
+        for job in scheduler.jobs(handler='backup_database', status='pending'):
+            if job['name'] == 'backup':
+                scheduler.cancel(job['id'])
+        return None
+    except Exception as e:
+        print(f"Error scheduling backups: {e}")
+        return None
+
+def enqueue_job(handler: str, args: Optional[Dict[str, Any]] = None, run_at: Optional[datetime] = None,
+                schedule: Optional[str] = None, created_by: Optional[int] = None) -> Optional[int]:
+    """Queue background work (run_at is local time, default now); returns the job id"""
+    try:
+        return scheduler.enqueue(handler, args, run_at=local_to_utc(run_at) if run_at else None,
+                                 schedule=schedule, created_by=created_by)
+    except Exception as e:
+        print(f"Error queueing {handler} job: {e}")
+        return None
+
+def schedule_announcement(title: str, content: str, created_by: int, run_at: Optional[datetime] = None,
+                          target_role: Optional[str] = None, priority: str = 'normal',
+                          schedule: Optional[str] = None) -> Optional[int]:
+    """Publish an announcement later (run_at, local time) or on a recurring cron schedule"""
+    return enqueue_job('publish_announcement', {
+        'title': title,
+        'content': content,
+        'created_by': created_by,
+        'target_role': target_role,
+        'priority': priority,
+    }, run_at=run_at, schedule=schedule, created_by=created_by)
+
+@instrumented
+def get_jobs(status: Optional[str] = None, handler: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    """Get background jobs, running first then by next run (times in UTC)"""
+    return scheduler.jobs(status=status, handler=handler, limit=limit)
+
+def get_scheduled_announcements() -> List[Dict[str, Any]]:
+    """Get announcements waiting to be published, with their job details"""
+    announcements = []
+    for job in get_jobs(status='pending', handler='publish_announcement'):
+        announcement = json.loads(job['args'])
+        announcement.update(job_id=job['id'], next_run_at=job['next_run_at'], schedule=job['schedule'])
+        announcements.append(announcement)
+    return announcements
+
+def cancel_job(job_id: int) -> bool:
+    """Stop a job from running again"""
+    return scheduler.cancel(job_id)
+
+def run_job_now(job_id: int) -> bool:
+    """Make a job due immediately"""
+    return scheduler.run_now(job_id)
+
+def get_scheduler_metrics() -> Dict[str, Any]:
+    """Worker state and run counters of this process's scheduler"""
+    return scheduler.metrics()
+
+def start_scheduler() -> bool:
+    """Define the recurring jobs and start the worker thread (once per process)"""
+    for name, handler, schedule in MAINTENANCE_JOBS:
+        try:
+            scheduler.enqueue(handler, name=name, schedule=schedule)
+        except Exception as e:
+            print(f"Error scheduling {name}: {e}")
+    schedule_backups()
+    return scheduler.start()
+
+# Instrumentation
+def get_query_metrics() -> Dict:
+    """Get per-function call counts, rows and latency percentiles"""
+    return metrics_registry.snapshot()
+
+def get_health_summary() -> Dict:
+    """Get process uptime, overall latency and error rate of the data layer"""
+    return metrics_registry.totals()
+
+def export_query_metrics(format: str = 'prometheus', path: Optional[str] = None) -> str:
+    """Export query metrics as Prometheus text or JSON lines"""
+    if format == 'jsonl':
+        return metrics_registry.export_jsonl(path)
+    text = metrics_registry.export_prometheus()
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return text
+
+def configure_slow_query_log(threshold_ms: Optional[float] = None, enabled: Optional[bool] = None):
+    """Change the slow query threshold or turn the log on/off at runtime"""
+    if threshold_ms is not None:
+        slow_query_log.threshold_ms = threshold_ms
+    if enabled is not None:
+        slow_query_log.enabled = enabled
+
+# Query cache
+def get_cache_metrics() -> Dict:
+    """Get query cache hits, misses, stale/expired lookups, evictions and size"""
+    return query_cache.metrics()
+
+def clear_query_cache(namespace: Optional[str] = None) -> int:
+    """Drop all cached query results, or only those of one function"""
+    return query_cache.clear(namespace)
+
+def get_cache_namespaces() -> Dict[str, Dict[str, int]]:
+    """Get cached entries and approximate memory per function"""
+    return query_cache.namespaces()
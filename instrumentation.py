@@ -0,0 +1,196 @@
+"""
+MES-Connect Query Instrumentation
+
+Per-function call counts, rows returned, latency percentiles and lock-wait
+time for the data-access layer, kept in an in-process registry and
+exportable as Prometheus text or JSON lines.
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Mapping
+from functools import wraps
+from typing import Dict, Any, List, Optional
+
+# Histogram bucket upper bounds in seconds (Prometheus convention)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class FunctionMetrics:
+    """Counters and recent latency samples for one data-access function"""
+
+    def __init__(self, sample_size: int):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.lock_wait_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = deque(maxlen=sample_size)
+
+    def percentile(self, pct: float) -> float:
+        """Latency percentile in seconds over the recent sample window"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+class MetricsRegistry:
+    """Thread-safe registry of FunctionMetrics keyed by function name"""
+
+    def __init__(self, sample_size: int = 1024):
+        self.sample_size = sample_size
+        self.started_at = time.time()
+        self._metrics: Dict[str, FunctionMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration: float, rows: int = 0, lock_wait: float = 0.0, error: bool = False):
+        """Record one call"""
+        with self._lock:
+            metrics = self._metrics.get(name)
+            if metrics is None:
+                metrics = self._metrics[name] = FunctionMetrics(self.sample_size)
+            metrics.calls += 1
+            metrics.errors += 1 if error else 0
+            metrics.rows += rows
+            metrics.total_time += duration
+            metrics.lock_wait_time += lock_wait
+            metrics.max_time = max(metrics.max_time, duration)
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            metrics.samples.append(duration)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get a summary per function (times in milliseconds)"""
+        with self._lock:
+            items = list(self._metrics.items())
+            summary = {}
+            for name, m in items:
+                summary[name] = {
+                    'calls': m.calls,
+                    'errors': m.errors,
+                    'rows': m.rows,
+                    'avg_ms': m.total_time / m.calls * 1000 if m.calls else 0.0,
+                    'p50_ms': m.percentile(50) * 1000,
+                    'p95_ms': m.percentile(95) * 1000,
+                    'p99_ms': m.percentile(99) * 1000,
+                    'max_ms': m.max_time * 1000,
+                    'total_ms': m.total_time * 1000,
+                    'lock_wait_ms': m.lock_wait_time * 1000,
+                }
+        return summary
+
+    def totals(self) -> Dict[str, Any]:
+        """Get process-wide totals across all functions"""
+        with self._lock:
+            calls = sum(m.calls for m in self._metrics.values())
+            errors = sum(m.errors for m in self._metrics.values())
+            total_time = sum(m.total_time for m in self._metrics.values())
+            samples = sorted(s for m in self._metrics.values() for s in m.samples)
+        p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))] if samples else 0.0
+        return {
+            'uptime_seconds': time.time() - self.started_at,
+            'calls': calls,
+            'errors': errors,
+            'error_rate': errors / calls if calls else 0.0,
+            'avg_ms': total_time / calls * 1000 if calls else 0.0,
+            'p95_ms': p95 * 1000,
+        }
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        with self._lock:
+            self._metrics.clear()
+            self.started_at = time.time()
+
+    def export_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._metrics.items())
+            lines = [
+                '# HELP mes_db_calls_total Data-access function calls',
+                '# TYPE mes_db_calls_total counter',
+            ]
+            lines += [f'mes_db_calls_total{{function="{name}"}} {m.calls}' for name, m in items]
+            lines += ['# HELP mes_db_errors_total Data-access function calls that raised',
+                      '# TYPE mes_db_errors_total counter']
+            lines += [f'mes_db_errors_total{{function="{name}"}} {m.errors}' for name, m in items]
+            lines += ['# HELP mes_db_rows_total Rows returned by data-access functions',
+                      '# TYPE mes_db_rows_total counter']
+            lines += [f'mes_db_rows_total{{function="{name}"}} {m.rows}' for name, m in items]
+            lines += ['# HELP mes_db_lock_wait_seconds_total Time spent waiting for a database connection or lock',
+                      '# TYPE mes_db_lock_wait_seconds_total counter']
+            lines += [f'mes_db_lock_wait_seconds_total{{function="{name}"}} {m.lock_wait_time:.6f}' for name, m in items]
+            lines += ['# HELP mes_db_latency_seconds Data-access function latency',
+                      '# TYPE mes_db_latency_seconds histogram']
+            for name, m in items:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                    cumulative += count
+                    lines.append(f'mes_db_latency_seconds_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'mes_db_latency_seconds_bucket{{function="{name}",le="+Inf"}} {m.calls}')
+                lines.append(f'mes_db_latency_seconds_sum{{function="{name}"}} {m.total_time:.6f}')
+                lines.append(f'mes_db_latency_seconds_count{{function="{name}"}} {m.calls}')
+        return '\n'.join(lines) + '\n'
+
+    def export_jsonl(self, path: Optional[str] = None) -> str:
+        """Render one JSON object per function; appends to path if given"""
+        timestamp = time.time()
+        lines = [json.dumps({'timestamp': timestamp, 'function': name, **stats})
+                 for name, stats in sorted(self.snapshot().items())]
+        text = '\n'.join(lines) + ('\n' if lines else '')
+        if path:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+registry = MetricsRegistry()
+
+# Per-thread stack of lock-wait accumulators for the calls in progress
+_active = threading.local()
+
+def add_lock_wait(seconds: float):
+    """Attribute time spent waiting for a connection or lock to the running calls"""
+    stack: List[float] = getattr(_active, 'stack', None)
+    if stack:
+        for i in range(len(stack)):
+            stack[i] += seconds
+
+def _count_rows(result) -> int:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict) and result and all(isinstance(v, list) for v in result.values()):
+        # Columnar result: every column holds one value per row
+        return len(next(iter(result.values())))
+    if isinstance(result, Mapping):
+        return 1
+    return 0
+
+def instrumented(func):
+    """Record latency, rows and lock wait for every call of a data-access function"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_active, 'stack', None)
+        if stack is None:
+            stack = _active.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        error = False
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            lock_wait = stack.pop()
+            registry.record(name, duration, _count_rows(result), lock_wait, error)
+
+    return wrapper
@@ -0,0 +1,132 @@
+"""
+MES-Connect Message Bus
+
+In-process publish/subscribe for chat delivery. The data layer publishes
+after a message is committed; an open chat view long-polls the topics it
+shows instead of re-running the page on a timer, and only goes to the
+database once something relevant has arrived.
+
+Every topic carries a sequence number that increases with each event. A
+subscriber keeps the sequence numbers it has seen (its cursor) and waits
+for any of its topics to move past them. Events are hints, not the data:
+views still read the rows from the database, so one that falls behind the
+retained history (or misses events published by another server process)
+catches up on its next fetch.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+def user_topic(user_id: int) -> Tuple[str, int]:
+    """Topic for direct messages to or from a user"""
+    return ('user', user_id)
+
+def group_topic(group_id: int) -> Tuple[str, int]:
+    """Topic for messages posted in a group"""
+    return ('group', group_id)
+
+class MessageBus:
+    """Topic-based event fan-out with long-polling subscribers"""
+
+    def __init__(self, history: int = 100):
+        self.history = history
+        self._seq: Dict[Hashable, int] = {}
+        self._events: Dict[Hashable, deque] = {}
+        self._cond = threading.Condition()
+        self._stats = {
+            'published': 0,
+            'waits': 0,
+            'wakeups': 0,
+            'timeouts': 0,
+        }
+
+    def publish(self, topic: Hashable, payload: Any) -> int:
+        """Append an event to a topic and wake its waiters; returns its sequence number"""
+        with self._cond:
+            seq = self._seq.get(topic, 0) + 1
+            self._seq[topic] = seq
+            events = self._events.get(topic)
+            if events is None:
+                events = self._events[topic] = deque(maxlen=self.history)
+            events.append((seq, payload))
+            self._stats['published'] += 1
+            self._cond.notify_all()
+        return seq
+
+    def cursor(self, topics: Iterable[Hashable]) -> Dict[Hashable, int]:
+        """Current position of each topic; take it before reading the rows it covers"""
+        with self._cond:
+            return {topic: self._seq.get(topic, 0) for topic in topics}
+
+    def _has_news(self, since: Dict[Hashable, int]) -> bool:
+        return any(self._seq.get(topic, 0) > seq for topic, seq in since.items())
+
+    def wait(self, since: Dict[Hashable, int], timeout: float) -> Tuple[Dict[Hashable, int], List[Any]]:
+        """Block until a topic in since moves past it or timeout passes
+
+        Returns the advanced cursor and the payloads published after since,
+        oldest first within each topic. A timeout of 0 just collects what is
+        already there.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stats['waits'] += 1
+            while not self._has_news(since):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    return dict(since), []
+                self._cond.wait(remaining)
+            self._stats['wakeups'] += 1
+
+            cursor = {}
+            collected = []
+            for topic, seq in since.items():
+                cursor[topic] = self._seq.get(topic, 0)
+                if cursor[topic] > seq:
+                    collected.extend(payload for event_seq, payload in self._events[topic] if event_seq > seq)
+        return cursor, collected
+
+    def metrics(self) -> Dict[str, int]:
+        """Snapshot of bus counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['topics'] = len(self._seq)
+        return stats
+
+class MessageWindow:
+    """The latest rows of one conversation held by a view, oldest first
+
+    Keeps the bus cursor and the high-water mark (last message id) together,
+    so a view fetches only rows after it and appends them.
+    """
+
+    def __init__(self, key: Hashable, rows: Iterable[Any], cursor: Dict[Hashable, int], size: int = 200):
+        self.key = key
+        self.cursor = cursor
+        self.size = size
+        self.rows: List[Any] = list(rows)[-size:]
+        # Own messages up to this id are known to be read by the other side
+        self.read_through = 0
+
+    @property
+    def high_water(self) -> Optional[int]:
+        """Id of the newest row held, or None when empty"""
+        return self.rows[-1]['id'] if self.rows else None
+
+    def append(self, rows: Iterable[Any]) -> int:
+        """Add rows newer than the high-water mark, dropping the oldest past size; returns how many"""
+        high_water = self.high_water
+        new_rows = [row for row in rows if high_water is None or row['id'] > high_water]
+        if new_rows:
+            self.rows.extend(new_rows)
+            del self.rows[:-self.size]
+        return len(new_rows)
+
+    def mark_read(self, message_id: Optional[int] = None):
+        """The other side has read up to message_id (default: everything held)"""
+        if message_id is None:
+            message_id = self.high_water or 0
+        self.read_through = max(self.read_through, message_id)
@@ -0,0 +1,1266 @@
+"""
+MES-Connect Schema Migrations
+
+Each migration runs once, in version order, inside its own transaction and
+is recorded in the schema_version table. To change the schema, append a new
+Migration to MIGRATIONS; never edit one that has already shipped.
+"""
+
+import sqlite3
+from typing import Callable, List, NamedTuple, Sequence, Union
+
+Statement = Union[str, Callable[[sqlite3.Cursor], None]]
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: Sequence[Statement]
+
+class MigrationError(Exception):
+    """Raised when migrations cannot be applied safely"""
+
+INITIAL_SCHEMA = [
+    # Users table
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('student', 'alumni', 'admin')),
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT,
+        student_id TEXT,
+        department TEXT,
+        year TEXT,
+        skills TEXT,
+        about TEXT,
+        current_position TEXT,
+        company TEXT,
+        linkedin TEXT,
+        profile_pic TEXT,
+        is_verified INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP
+    )
+    ''',
+
+    # Friends table
+    '''
+    CREATE TABLE IF NOT EXISTS friends (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        friend_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'accepted', 'blocked')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (friend_id) REFERENCES users (id),
+        UNIQUE(user_id, friend_id)
+    )
+    ''',
+
+    # Messages table
+    '''
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sender_id INTEGER NOT NULL,
+        receiver_id INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        is_read INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (sender_id) REFERENCES users (id),
+        FOREIGN KEY (receiver_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Groups table
+    '''
+    CREATE TABLE IF NOT EXISTS groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        created_by INTEGER NOT NULL,
+        is_public INTEGER DEFAULT 1,
+        category TEXT DEFAULT 'general',
+        cover_pic TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    ''',
+
+    # Group members table
+    '''
+    CREATE TABLE IF NOT EXISTS group_members (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        role TEXT DEFAULT 'member' CHECK(role IN ('admin', 'moderator', 'member')),
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (group_id) REFERENCES groups (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(group_id, user_id)
+    )
+    ''',
+
+    # Group messages table
+    '''
+    CREATE TABLE IF NOT EXISTS group_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_id INTEGER NOT NULL,
+        sender_id INTEGER NOT NULL,
+        message TEXT NOT NULL,
+        attachment TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (group_id) REFERENCES groups (id),
+        FOREIGN KEY (sender_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Confessions table
+    '''
+    CREATE TABLE IF NOT EXISTS confessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        content TEXT NOT NULL,
+        is_anonymous INTEGER DEFAULT 1,
+        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'rejected')),
+        likes INTEGER DEFAULT 0,
+        tags TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Confession likes table
+    '''
+    CREATE TABLE IF NOT EXISTS confession_likes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        confession_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (confession_id) REFERENCES confessions (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(confession_id, user_id)
+    )
+    ''',
+
+    # Events table
+    '''
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        organizer_id INTEGER NOT NULL,
+        event_date DATE NOT NULL,
+        event_time TIME,
+        location TEXT,
+        venue TEXT,
+        max_participants INTEGER,
+        is_public INTEGER DEFAULT 1,
+        category TEXT DEFAULT 'general',
+        cover_pic TEXT,
+        registration_link TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (organizer_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Event participants table
+    '''
+    CREATE TABLE IF NOT EXISTS event_participants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'registered' CHECK(status IN ('registered', 'attended', 'cancelled')),
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (event_id) REFERENCES events (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(event_id, user_id)
+    )
+    ''',
+
+    # Announcements table
+    '''
+    CREATE TABLE IF NOT EXISTS announcements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_by INTEGER NOT NULL,
+        target_role TEXT,
+        priority TEXT DEFAULT 'normal' CHECK(priority IN ('low', 'normal', 'high', 'urgent')),
+        is_active INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    ''',
+
+    # Contributions table (for alumni)
+    '''
+    CREATE TABLE IF NOT EXISTS contributions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alumni_id INTEGER NOT NULL,
+        type TEXT NOT NULL CHECK(type IN ('mentorship', 'donation', 'workshop', 'job_posting', 'internship', 'other')),
+        title TEXT NOT NULL,
+        description TEXT,
+        amount REAL,
+        hours INTEGER,
+        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'approved', 'completed', 'rejected')),
+        skills_required TEXT,
+        deadline DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alumni_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Notifications table
+    '''
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        type TEXT CHECK(type IN ('friend_request', 'message', 'event', 'confession', 'announcement', 'system')),
+        is_read INTEGER DEFAULT 0,
+        reference_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Job postings table
+    '''
+    CREATE TABLE IF NOT EXISTS job_postings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        posted_by INTEGER NOT NULL,
+        company TEXT NOT NULL,
+        position TEXT NOT NULL,
+        description TEXT NOT NULL,
+        requirements TEXT,
+        location TEXT,
+        salary_range TEXT,
+        job_type TEXT CHECK(job_type IN ('full_time', 'part_time', 'internship', 'contract')),
+        application_link TEXT,
+        is_active INTEGER DEFAULT 1,
+        deadline DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (posted_by) REFERENCES users (id)
+    )
+    ''',
+
+    # Job applications table
+    '''
+    CREATE TABLE IF NOT EXISTS job_applications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        applicant_id INTEGER NOT NULL,
+        cover_letter TEXT,
+        resume TEXT,
+        status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'reviewed', 'accepted', 'rejected')),
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES job_postings (id),
+        FOREIGN KEY (applicant_id) REFERENCES users (id),
+        UNIQUE(job_id, applicant_id)
+    )
+    ''',
+
+    # Resources table
+    '''
+    CREATE TABLE IF NOT EXISTS resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        uploaded_by INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        file_path TEXT NOT NULL,
+        file_type TEXT,
+        category TEXT,
+        tags TEXT,
+        download_count INTEGER DEFAULT 0,
+        is_public INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (uploaded_by) REFERENCES users (id)
+    )
+    ''',
+]
+
+SECONDARY_INDEXES = [
+    # Chat history and inbox: (sender, receiver) pairs in time order
+    'CREATE INDEX IF NOT EXISTS idx_messages_pair_time ON messages (sender_id, receiver_id, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_messages_receiver_unread ON messages (receiver_id, is_read, sender_id)',
+
+    # Sidebar and dashboard notifications
+    'CREATE INDEX IF NOT EXISTS idx_notifications_user_unread_time ON notifications (user_id, is_read, created_at)',
+
+    # Group chat history
+    'CREATE INDEX IF NOT EXISTS idx_group_messages_group_time ON group_messages (group_id, created_at)',
+
+    # Reverse lookups; the forward direction is already covered by the
+    # UNIQUE(x_id, user_id) constraint indexes
+    'CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members (user_id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_participants_user ON event_participants (user_id)',
+    'CREATE INDEX IF NOT EXISTS idx_friends_friend_status ON friends (friend_id, status)',
+    'CREATE INDEX IF NOT EXISTS idx_job_applications_applicant ON job_applications (applicant_id)',
+
+    # Feeds
+    'CREATE INDEX IF NOT EXISTS idx_events_date ON events (event_date, event_time)',
+    'CREATE INDEX IF NOT EXISTS idx_confessions_status_time ON confessions (status, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_contributions_alumni_time ON contributions (alumni_id, created_at)',
+]
+
+KEYSET_INDEXES = [
+    # Feeds paged by id (before_id / after_id), newest first
+    'CREATE INDEX IF NOT EXISTS idx_confessions_status_id ON confessions (status, id)',
+    'CREATE INDEX IF NOT EXISTS idx_messages_pair_id ON messages (sender_id, receiver_id, id)',
+    'CREATE INDEX IF NOT EXISTS idx_group_messages_group_id ON group_messages (group_id, id)',
+    'CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications (user_id, id)',
+    'CREATE INDEX IF NOT EXISTS idx_notifications_user_unread_id ON notifications (user_id, is_read, id)',
+    'CREATE INDEX IF NOT EXISTS idx_job_postings_active_id ON job_postings (is_active, id)',
+
+    # Events are paged by (event_date, event_time, id); idx_events_date
+    # already ends in the rowid, so it serves that order as well
+]
+
+SETTINGS_STORE = [
+    # Admin-editable platform settings, one JSON-encoded value per key
+    '''
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_by INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (updated_by) REFERENCES users (id)
+    )
+    ''',
+]
+
+def _count(name: str, delta: int, condition: str) -> str:
+    """Trigger step adding delta to a stats counter when condition holds"""
+    return (f"INSERT INTO stats_counters (name, value) SELECT {name}, {delta} WHERE {condition} "
+            f"ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;")
+
+def _user_counts(row: str, delta: int) -> str:
+    verified = f"{row}.is_verified = 1"
+    return '\n'.join([
+        _count("'users.total'", delta, verified),
+        _count(f"'users.role:' || {row}.role", delta, verified),
+        _count(f"'users.department:' || {row}.department", delta, f"{verified} AND {row}.department IS NOT NULL"),
+        _count(f"'users.month:' || strftime('%Y-%m', {row}.created_at)", delta, verified),
+    ])
+
+# Recomputes every counter from the base tables (initial backfill and
+# periodic reconciliation)
+STATS_COUNTERS_REBUILD = [
+    'DELETE FROM stats_counters',
+    "INSERT INTO stats_counters (name, value) SELECT 'users.total', COUNT(*) FROM users WHERE is_verified = 1",
+    '''
+    INSERT INTO stats_counters (name, value)
+    SELECT 'users.role:' || role, COUNT(*) FROM users WHERE is_verified = 1 GROUP BY role
+    ''',
+    '''
+    INSERT INTO stats_counters (name, value)
+    SELECT 'users.department:' || department, COUNT(*) FROM users
+    WHERE is_verified = 1 AND department IS NOT NULL GROUP BY department
+    ''',
+    '''
+    INSERT INTO stats_counters (name, value)
+    SELECT 'users.month:' || strftime('%Y-%m', created_at), COUNT(*) FROM users
+    WHERE is_verified = 1 AND created_at IS NOT NULL GROUP BY strftime('%Y-%m', created_at)
+    ''',
+    '''
+    INSERT INTO stats_counters (name, value)
+    SELECT 'confessions.status:' || status, COUNT(*) FROM confessions
+    WHERE status IS NOT NULL GROUP BY status
+    ''',
+    '''
+    INSERT INTO stats_counters (name, value)
+    SELECT 'events.date:' || event_date, COUNT(*) FROM events GROUP BY event_date
+    ''',
+    "INSERT INTO stats_counters (name, value) SELECT 'groups.total', COUNT(*) FROM groups",
+    "INSERT INTO stats_counters (name, value) SELECT 'messages.total', COUNT(*) FROM messages",
+    "INSERT INTO stats_counters (name, value) SELECT 'job_postings.active', COUNT(*) FROM job_postings WHERE is_active = 1",
+]
+
+STATS_COUNTERS = [
+    # Dashboard totals kept current by triggers, so reads are a few
+    # primary-key lookups instead of COUNT(*) scans
+    '''
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY NOT NULL,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+
+    # Active users are a moving 30-day window, so they stay a query
+    'CREATE INDEX IF NOT EXISTS idx_users_last_login ON users (last_login)',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_users_stats_insert AFTER INSERT ON users
+    BEGIN
+        {_user_counts('NEW', 1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_users_stats_delete AFTER DELETE ON users
+    BEGIN
+        {_user_counts('OLD', -1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_users_stats_update AFTER UPDATE OF role, department, is_verified, created_at ON users
+    WHEN OLD.role IS NOT NEW.role OR OLD.department IS NOT NEW.department
+      OR OLD.is_verified IS NOT NEW.is_verified OR OLD.created_at IS NOT NEW.created_at
+    BEGIN
+        {_user_counts('OLD', -1)}
+        {_user_counts('NEW', 1)}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_confessions_stats_insert AFTER INSERT ON confessions
+    BEGIN
+        {_count("'confessions.status:' || NEW.status", 1, 'NEW.status IS NOT NULL')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_confessions_stats_delete AFTER DELETE ON confessions
+    BEGIN
+        {_count("'confessions.status:' || OLD.status", -1, 'OLD.status IS NOT NULL')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_confessions_stats_update AFTER UPDATE OF status ON confessions
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        {_count("'confessions.status:' || OLD.status", -1, 'OLD.status IS NOT NULL')}
+        {_count("'confessions.status:' || NEW.status", 1, 'NEW.status IS NOT NULL')}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_events_stats_insert AFTER INSERT ON events
+    BEGIN
+        {_count("'events.date:' || NEW.event_date", 1, 'NEW.event_date IS NOT NULL')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_events_stats_delete AFTER DELETE ON events
+    BEGIN
+        {_count("'events.date:' || OLD.event_date", -1, 'OLD.event_date IS NOT NULL')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_events_stats_update AFTER UPDATE OF event_date ON events
+    WHEN OLD.event_date IS NOT NEW.event_date
+    BEGIN
+        {_count("'events.date:' || OLD.event_date", -1, 'OLD.event_date IS NOT NULL')}
+        {_count("'events.date:' || NEW.event_date", 1, 'NEW.event_date IS NOT NULL')}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_groups_stats_insert AFTER INSERT ON groups
+    BEGIN
+        {_count("'groups.total'", 1, '1')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_groups_stats_delete AFTER DELETE ON groups
+    BEGIN
+        {_count("'groups.total'", -1, '1')}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_stats_insert AFTER INSERT ON messages
+    BEGIN
+        {_count("'messages.total'", 1, '1')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_stats_delete AFTER DELETE ON messages
+    BEGIN
+        {_count("'messages.total'", -1, '1')}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_job_postings_stats_insert AFTER INSERT ON job_postings
+    BEGIN
+        {_count("'job_postings.active'", 1, 'NEW.is_active = 1')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_job_postings_stats_delete AFTER DELETE ON job_postings
+    BEGIN
+        {_count("'job_postings.active'", -1, 'OLD.is_active = 1')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_job_postings_stats_update AFTER UPDATE OF is_active ON job_postings
+    WHEN OLD.is_active IS NOT NEW.is_active
+    BEGIN
+        {_count("'job_postings.active'", -1, 'OLD.is_active = 1')}
+        {_count("'job_postings.active'", 1, 'NEW.is_active = 1')}
+    END
+    ''',
+] + STATS_COUNTERS_REBUILD
+
+def _rollup(metric: str, row: str, day: str, dimension: str, delta: int, condition: str = '1') -> str:
+    """Trigger step adding delta to one day's rollup when condition holds"""
+    return (f"INSERT INTO daily_rollups (metric, day, dimension, value) "
+            f"SELECT '{metric}', DATE({row}.{day}), {dimension}, {delta} "
+            f"WHERE {row}.{day} IS NOT NULL AND {condition} "
+            f"ON CONFLICT(metric, day, dimension) DO UPDATE SET value = value + excluded.value;")
+
+def _rolled_up(source: str, row: str) -> str:
+    """Trigger condition: the row is already counted (not waiting for the backfill)"""
+    return (f"NOT EXISTS (SELECT 1 FROM rollup_backfill WHERE source = '{source}' "
+            f"AND {row}.id BETWEEN next_id AND last_id)")
+
+def _not_purging(source: str) -> str:
+    """Trigger condition: the delete is not a retention purge, which keeps history"""
+    return f"NOT EXISTS (SELECT 1 FROM rollup_purge WHERE source = '{source}')"
+
+def _rollup_delete_trigger(source: str, steps, condition: str) -> str:
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_delete AFTER DELETE ON {source}
+        WHEN {condition}
+        BEGIN
+            {steps('OLD', -1)}
+        END
+        '''
+
+def _rollup_triggers(source: str, steps, update_of: str = '') -> List[str]:
+    """Insert/delete (and optionally update) triggers applying steps(row, delta)"""
+    triggers = [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_insert AFTER INSERT ON {source}
+        WHEN {_rolled_up(source, 'NEW')}
+        BEGIN
+            {steps('NEW', 1)}
+        END
+        ''',
+        _rollup_delete_trigger(source, steps, _rolled_up(source, 'OLD')),
+    ]
+    if update_of:
+        changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in update_of.split(', '))
+        triggers.append(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_update AFTER UPDATE OF {update_of} ON {source}
+        WHEN ({changed}) AND {_rolled_up(source, 'NEW')}
+        BEGIN
+            {steps('OLD', -1)}
+            {steps('NEW', 1)}
+        END
+        ''')
+    return triggers
+
+def _users_rollup(row: str, delta: int) -> str:
+    return _rollup('users.new', row, 'created_at', f'{row}.role', delta, f'{row}.is_verified = 1')
+
+def _messages_rollup(row: str, delta: int) -> str:
+    return _rollup('messages.sent', row, 'created_at', "''", delta)
+
+def _confessions_rollup(row: str, delta: int) -> str:
+    return '\n'.join([
+        _rollup('confessions.status', row, 'created_at', f'{row}.status', delta, f'{row}.status IS NOT NULL'),
+        _rollup('confessions.posted', row, 'created_at',
+                f"CASE WHEN {row}.is_anonymous = 1 THEN 'anonymous' ELSE 'named' END", delta),
+    ])
+
+def _event_participants_rollup(row: str, delta: int) -> str:
+    return _rollup('events.registrations', row, 'registered_at', "''", delta)
+
+def _contributions_rollup(row: str, delta: int) -> str:
+    return _rollup('contributions.type', row, 'created_at', f'{row}.type', delta)
+
+def _group_members_rollup(row: str, delta: int) -> str:
+    return _rollup('groups.joins', row, 'joined_at', "''", delta)
+
+# Rollup steps of each source table
+ROLLUP_STEPS = {
+    'users': _users_rollup,
+    'messages': _messages_rollup,
+    'confessions': _confessions_rollup,
+    'event_participants': _event_participants_rollup,
+    'contributions': _contributions_rollup,
+    'group_members': _group_members_rollup,
+}
+
+def _backfill(metric: str, source: str, day: str, dimension: str, condition: str = '1') -> str:
+    return f'''
+    INSERT INTO daily_rollups (metric, day, dimension, value)
+    SELECT '{metric}', DATE({day}), {dimension}, COUNT(*) FROM {source}
+    WHERE id BETWEEN ? AND ? AND {day} IS NOT NULL AND {condition}
+    GROUP BY 2, 3
+    ON CONFLICT(metric, day, dimension) DO UPDATE SET value = value + excluded.value
+    '''
+
+# Statements folding one id range (first_id, last_id) of each source table
+# into daily_rollups; run in batches by database.backfill_daily_rollups
+DAILY_ROLLUP_BACKFILL = {
+    'users': [_backfill('users.new', 'users', 'created_at', 'role', 'is_verified = 1')],
+    'messages': [_backfill('messages.sent', 'messages', 'created_at', "''")],
+    'confessions': [
+        _backfill('confessions.status', 'confessions', 'created_at', 'status', 'status IS NOT NULL'),
+        _backfill('confessions.posted', 'confessions', 'created_at',
+                  "CASE WHEN is_anonymous = 1 THEN 'anonymous' ELSE 'named' END"),
+    ],
+    'event_participants': [_backfill('events.registrations', 'event_participants', 'registered_at', "''")],
+    'contributions': [_backfill('contributions.type', 'contributions', 'created_at', 'type')],
+    'group_members': [_backfill('groups.joins', 'group_members', 'joined_at', "''")],
+}
+
+DAILY_ROLLUPS = [
+    # Per-day activity counts for the growth and analytics charts:
+    # (metric, day, dimension) -> value, e.g. ('users.new', '2024-05-01', 'student') -> 3
+    '''
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        metric TEXT NOT NULL,
+        day TEXT NOT NULL,
+        dimension TEXT NOT NULL DEFAULT '',
+        value INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (metric, day, dimension)
+    ) WITHOUT ROWID
+    ''',
+
+    # Rows that existed before this migration are folded in afterwards, a
+    # batch of ids at a time, instead of inside this transaction. Until a
+    # row's id has been backfilled the triggers leave it alone, so history
+    # is counted exactly once whatever happens to it in the meantime.
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_backfill (
+        source TEXT PRIMARY KEY NOT NULL,
+        next_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL
+    )
+    ''',
+] + [
+    f"INSERT INTO rollup_backfill (source, next_id, last_id) "
+    f"SELECT '{source}', MIN(id), MAX(id) FROM {source} HAVING COUNT(*) > 0"
+    for source in DAILY_ROLLUP_BACKFILL
+] + (
+    _rollup_triggers('users', _users_rollup, 'role, is_verified, created_at')
+    + _rollup_triggers('messages', _messages_rollup)
+    + _rollup_triggers('confessions', _confessions_rollup, 'status')
+    + _rollup_triggers('event_participants', _event_participants_rollup)
+    + _rollup_triggers('contributions', _contributions_rollup)
+    + _rollup_triggers('group_members', _group_members_rollup)
+)
+
+# Characters of the latest message kept for the inbox preview
+CONVERSATION_PREVIEW_LENGTH = 100
+
+# Initial backfill of migration 7 (before read cursors existed)
+_CONVERSATIONS_BACKFILL = [
+    'DELETE FROM conversations',
+    f'''
+    INSERT INTO conversations (user_id, other_user_id, last_message_id, last_message_time, preview, unread_count)
+    SELECT pair.user_id, pair.other_user_id, m.id, m.created_at,
+           substr(m.message, 1, {CONVERSATION_PREVIEW_LENGTH}), pair.unread_count
+    FROM (
+        SELECT user_id, other_user_id, MAX(id) as last_id, SUM(unread) as unread_count
+        FROM (
+            SELECT sender_id as user_id, receiver_id as other_user_id, id, 0 as unread FROM messages
+            UNION ALL
+            SELECT receiver_id, sender_id, id, CASE WHEN is_read = 0 THEN 1 ELSE 0 END FROM messages
+        )
+        GROUP BY user_id, other_user_id
+    ) pair
+    JOIN messages m ON m.id = pair.last_id
+    ''',
+]
+
+def _conversation_upsert(user: str, other: str, unread: str) -> str:
+    """Trigger step recording NEW as the latest message of one side of a conversation"""
+    return f'''
+        INSERT INTO conversations (user_id, other_user_id, last_message_id, last_message_time, preview, unread_count)
+        VALUES ({user}, {other}, NEW.id, NEW.created_at, substr(NEW.message, 1, {CONVERSATION_PREVIEW_LENGTH}), {unread})
+        ON CONFLICT(user_id, other_user_id) DO UPDATE SET
+            last_message_id = excluded.last_message_id,
+            last_message_time = excluded.last_message_time,
+            preview = excluded.preview,
+            unread_count = unread_count + excluded.unread_count;'''
+
+def _conversations_delete_trigger(unread: str) -> str:
+    """Trigger undoing a deleted message; unread tells whether the receiver had not read it"""
+    return f'''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_conversations_delete AFTER DELETE ON messages
+    BEGIN
+        UPDATE conversations SET unread_count = unread_count - 1
+        WHERE user_id = OLD.receiver_id AND other_user_id = OLD.sender_id AND {unread};
+
+        UPDATE conversations
+        SET (last_message_id, last_message_time, preview) = (
+            SELECT id, created_at, substr(message, 1, {CONVERSATION_PREVIEW_LENGTH}) FROM messages
+            WHERE (sender_id = conversations.user_id AND receiver_id = conversations.other_user_id)
+               OR (sender_id = conversations.other_user_id AND receiver_id = conversations.user_id)
+            ORDER BY id DESC LIMIT 1
+        )
+        WHERE last_message_id = OLD.id
+          AND ((user_id = OLD.sender_id AND other_user_id = OLD.receiver_id)
+            OR (user_id = OLD.receiver_id AND other_user_id = OLD.sender_id));
+
+        DELETE FROM conversations WHERE last_message_id IS NULL
+          AND ((user_id = OLD.sender_id AND other_user_id = OLD.receiver_id)
+            OR (user_id = OLD.receiver_id AND other_user_id = OLD.sender_id));
+    END
+    '''
+
+CONVERSATIONS = [
+    # One row per user and conversation partner, so the inbox is a range
+    # read on the primary key instead of an aggregate over all messages
+    '''
+    CREATE TABLE IF NOT EXISTS conversations (
+        user_id INTEGER NOT NULL,
+        other_user_id INTEGER NOT NULL,
+        last_message_id INTEGER,
+        last_message_time TIMESTAMP,
+        preview TEXT,
+        unread_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, other_user_id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (other_user_id) REFERENCES users (id)
+    ) WITHOUT ROWID
+    ''',
+
+    # Inbox order: most recent conversation first
+    'CREATE INDEX IF NOT EXISTS idx_conversations_user_last ON conversations (user_id, last_message_id)',
+
+    # Kept in the same transaction as the message write
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_conversations_insert AFTER INSERT ON messages
+    BEGIN
+        {_conversation_upsert('NEW.sender_id', 'NEW.receiver_id', '0')}
+        {_conversation_upsert('NEW.receiver_id', 'NEW.sender_id', 'CASE WHEN NEW.is_read = 0 THEN 1 ELSE 0 END')}
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_messages_conversations_read AFTER UPDATE OF is_read ON messages
+    WHEN (OLD.is_read = 0) IS NOT (NEW.is_read = 0)
+    BEGIN
+        UPDATE conversations
+        SET unread_count = unread_count + CASE WHEN NEW.is_read = 0 THEN 1 ELSE -1 END
+        WHERE user_id = NEW.receiver_id AND other_user_id = NEW.sender_id;
+    END
+    ''',
+    _conversations_delete_trigger('OLD.is_read = 0'),
+] + _CONVERSATIONS_BACKFILL
+
+# Recomputes every conversation summary from messages, keeping read cursors
+# (the rebuild command)
+CONVERSATIONS_REBUILD = [
+    'UPDATE conversations SET last_message_id = NULL',
+    f'''
+    INSERT INTO conversations (user_id, other_user_id, last_message_id, last_message_time, preview)
+    SELECT pair.user_id, pair.other_user_id, m.id, m.created_at,
+           substr(m.message, 1, {CONVERSATION_PREVIEW_LENGTH})
+    FROM (
+        SELECT user_id, other_user_id, MAX(id) as last_id
+        FROM (
+            SELECT sender_id as user_id, receiver_id as other_user_id, id FROM messages
+            UNION ALL
+            SELECT receiver_id, sender_id, id FROM messages
+        )
+        GROUP BY user_id, other_user_id
+    ) pair
+    JOIN messages m ON m.id = pair.last_id
+    WHERE 1
+    ON CONFLICT(user_id, other_user_id) DO UPDATE SET
+        last_message_id = excluded.last_message_id,
+        last_message_time = excluded.last_message_time,
+        preview = excluded.preview
+    ''',
+    'DELETE FROM conversations WHERE last_message_id IS NULL',
+    '''
+    UPDATE conversations SET unread_count = (
+        SELECT COUNT(*) FROM messages
+        WHERE sender_id = conversations.other_user_id AND receiver_id = conversations.user_id
+          AND id > conversations.last_read_message_id
+    )
+    ''',
+]
+
+READ_CURSORS = [
+    # How far each user has read each conversation. Messages from the
+    # partner up to this id are read; messages.is_read is no longer written.
+    'ALTER TABLE conversations ADD COLUMN last_read_message_id INTEGER NOT NULL DEFAULT 0',
+    '''
+    UPDATE conversations SET last_read_message_id = COALESCE((
+        SELECT MAX(id) FROM messages
+        WHERE sender_id = conversations.other_user_id AND receiver_id = conversations.user_id
+          AND is_read = 1
+    ), 0)
+    ''',
+
+    # Unread counts now follow the cursor: set when it advances, and a
+    # deleted message was unread if it lay past the cursor
+    'DROP TRIGGER IF EXISTS trg_messages_conversations_read',
+    'DROP TRIGGER IF EXISTS trg_messages_conversations_delete',
+    _conversations_delete_trigger('OLD.id > conversations.last_read_message_id'),
+] + CONVERSATIONS_REBUILD
+
+def _indexed(source: str, row: str) -> str:
+    """Trigger condition: the row is in the search index (not waiting for the backfill)"""
+    return (f"NOT EXISTS (SELECT 1 FROM search_backfill WHERE source = '{source}' "
+            f"AND {row}.id BETWEEN next_id AND last_id)")
+
+def _search_triggers(source: str) -> List[str]:
+    """Keep {source}_fts in step with {source}.message"""
+    index = f'{source}_fts'
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_search_insert AFTER INSERT ON {source}
+        WHEN {_indexed(source, 'NEW')}
+        BEGIN
+            INSERT INTO {index} (rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        ''',
+        # External-content deletes must be given the indexed text
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_search_delete AFTER DELETE ON {source}
+        WHEN {_indexed(source, 'OLD')}
+        BEGIN
+            INSERT INTO {index} ({index}, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{source}_search_update AFTER UPDATE OF message ON {source}
+        WHEN {_indexed(source, 'NEW')}
+        BEGIN
+            INSERT INTO {index} ({index}, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+            INSERT INTO {index} (rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        ''',
+    ]
+
+# Statement indexing one id range (first_id, last_id) of each source table;
+# run in batches by database.backfill_search_index
+SEARCH_BACKFILL = {
+    source: [f'INSERT INTO {source}_fts (rowid, message) SELECT id, message FROM {source} WHERE id BETWEEN ? AND ?']
+    for source in ('messages', 'group_messages')
+}
+
+MESSAGE_SEARCH = [
+    # Full-text indexes over message text. External content: the text
+    # stays in the base tables and only the index is stored here.
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        message, content='messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS group_messages_fts USING fts5(
+        message, content='group_messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+
+    # Existing history is indexed afterwards in small batches, like the
+    # daily rollups; until then the triggers leave those rows alone
+    '''
+    CREATE TABLE IF NOT EXISTS search_backfill (
+        source TEXT PRIMARY KEY NOT NULL,
+        next_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL
+    )
+    ''',
+] + [
+    f"INSERT INTO search_backfill (source, next_id, last_id) "
+    f"SELECT '{source}', MIN(id), MAX(id) FROM {source} HAVING COUNT(*) > 0"
+    for source in SEARCH_BACKFILL
+] + _search_triggers('messages') + _search_triggers('group_messages')
+
+BROADCAST_NOTIFICATIONS = [
+    # One row per announcement-style notification instead of one per
+    # recipient. NULL audience fields match everyone; users see broadcasts
+    # posted after they joined that match their role and department.
+    '''
+    CREATE TABLE IF NOT EXISTS broadcasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        type TEXT CHECK(type IN ('friend_request', 'message', 'event', 'confession', 'announcement', 'system')),
+        reference_id INTEGER,
+        audience_role TEXT,
+        audience_department TEXT,
+        verified_only INTEGER NOT NULL DEFAULT 1,
+        created_by INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    ''',
+
+    # Mark-all-read: broadcasts up to read_through are read for the user
+    '''
+    CREATE TABLE IF NOT EXISTS broadcast_reads (
+        user_id INTEGER PRIMARY KEY,
+        read_through INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+
+    # Single broadcasts marked read (dismissed) past the cursor
+    '''
+    CREATE TABLE IF NOT EXISTS broadcast_dismissals (
+        user_id INTEGER NOT NULL,
+        broadcast_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, broadcast_id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id)
+    ) WITHOUT ROWID
+    ''',
+]
+
+# Notifications with the same coalesce key in one window of this many
+# seconds share a row (the key embeds the window number)
+NOTIFICATION_COALESCE_WINDOW = 3600
+
+# Rows sharing a notification's (user, coalesce key), for the compaction below
+NOTIFICATION_COALESCING = [
+    # Repeated events from one source (e.g. messages from one sender) upsert
+    # a single row keyed by (user_id, coalesce_key) and bump event_count;
+    # updated_at and reference_id follow the latest event.
+    'ALTER TABLE notifications ADD COLUMN coalesce_key TEXT',
+    'ALTER TABLE notifications ADD COLUMN event_count INTEGER NOT NULL DEFAULT 1',
+    'ALTER TABLE notifications ADD COLUMN updated_at TIMESTAMP',
+
+    # Compact existing "New Message" rows the way they would have coalesced
+    f'''
+    UPDATE notifications
+    SET coalesce_key = 'message:' || (SELECT sender_id FROM messages WHERE id = notifications.reference_id)
+                       || ':' || (CAST(strftime('%s', created_at) AS INTEGER) / {NOTIFICATION_COALESCE_WINDOW})
+    WHERE type = 'message' AND reference_id IS NOT NULL
+    ''',
+    # The newest row of each group survives; unread rows are what it counts.
+    # One grouping pass collects the survivors, so the rewrite below only
+    # does primary key lookups instead of a per-row search of the group.
+    '''
+    CREATE TEMP TABLE notification_groups (
+        id INTEGER PRIMARY KEY,
+        event_count INTEGER NOT NULL,
+        is_read INTEGER NOT NULL
+    )
+    ''',
+    '''
+    INSERT INTO notification_groups (id, event_count, is_read)
+    SELECT MAX(id),
+           CASE WHEN MIN(COALESCE(is_read, 0)) = 0 THEN SUM(COALESCE(is_read, 0) = 0) ELSE COUNT(*) END,
+           MIN(COALESCE(is_read, 0))
+    FROM notifications
+    WHERE coalesce_key IS NOT NULL
+    GROUP BY user_id, coalesce_key
+    ''',
+    '''
+    UPDATE notifications
+    SET event_count = (SELECT g.event_count FROM notification_groups g WHERE g.id = notifications.id),
+        is_read = (SELECT g.is_read FROM notification_groups g WHERE g.id = notifications.id),
+        updated_at = created_at
+    WHERE id IN (SELECT id FROM notification_groups)
+    ''',
+    '''
+    DELETE FROM notifications
+    WHERE coalesce_key IS NOT NULL
+      AND id NOT IN (SELECT id FROM notification_groups)
+    ''',
+    'DROP TABLE notification_groups',
+    '''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_coalesce
+    ON notifications (user_id, coalesce_key) WHERE coalesce_key IS NOT NULL
+    ''',
+]
+
+def _badge(user: str, column: str, delta: str, condition: str = '1') -> str:
+    """Trigger step adding delta to one of a user's badge counts when condition holds"""
+    return (f"INSERT INTO badge_counts (user_id, {column}) SELECT {user}, {delta} WHERE {condition} "
+            f"ON CONFLICT(user_id) DO UPDATE SET {column} = {column} + excluded.{column};")
+
+def _friend_badges(row: str, delta: int) -> str:
+    return '\n'.join([
+        _badge(f'{row}.friend_id', 'pending_friend_requests', delta, f"{row}.status = 'pending'"),
+        _badge(f'{row}.user_id', 'friends_count', delta, f"{row}.status = 'accepted'"),
+        _badge(f'{row}.friend_id', 'friends_count', delta, f"{row}.status = 'accepted'"),
+    ])
+
+# Recomputes every user's badge counts from the base tables
+BADGE_COUNTS_REBUILD = [
+    'DELETE FROM badge_counts',
+    '''
+    INSERT INTO badge_counts (user_id, unread_notifications)
+    SELECT user_id, COUNT(*) FROM notifications WHERE is_read = 0 GROUP BY user_id
+    ''',
+    '''
+    INSERT INTO badge_counts (user_id, unread_messages)
+    SELECT user_id, SUM(unread_count) FROM conversations WHERE unread_count != 0 GROUP BY user_id
+    ON CONFLICT(user_id) DO UPDATE SET unread_messages = excluded.unread_messages
+    ''',
+    '''
+    INSERT INTO badge_counts (user_id, pending_friend_requests)
+    SELECT friend_id, COUNT(*) FROM friends WHERE status = 'pending' GROUP BY friend_id
+    ON CONFLICT(user_id) DO UPDATE SET pending_friend_requests = excluded.pending_friend_requests
+    ''',
+    '''
+    INSERT INTO badge_counts (user_id, friends_count)
+    SELECT user_id, COUNT(*) FROM (
+        SELECT user_id FROM friends WHERE status = 'accepted'
+        UNION ALL
+        SELECT friend_id FROM friends WHERE status = 'accepted'
+    ) WHERE 1 GROUP BY user_id
+    ON CONFLICT(user_id) DO UPDATE SET friends_count = excluded.friends_count
+    ''',
+]
+
+BADGE_COUNTS = [
+    # Per-user numbers for sidebar badges and dashboard metrics, kept
+    # current by triggers so a page reads one row instead of listing rows.
+    # Broadcasts are not per-user rows; get_badge_counts adds those unread.
+    '''
+    CREATE TABLE IF NOT EXISTS badge_counts (
+        user_id INTEGER PRIMARY KEY,
+        unread_notifications INTEGER NOT NULL DEFAULT 0,
+        unread_messages INTEGER NOT NULL DEFAULT 0,
+        pending_friend_requests INTEGER NOT NULL DEFAULT 0,
+        friends_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_badge_insert AFTER INSERT ON notifications
+    BEGIN
+        {_badge('NEW.user_id', 'unread_notifications', '1', 'NEW.is_read = 0')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_badge_delete AFTER DELETE ON notifications
+    BEGIN
+        {_badge('OLD.user_id', 'unread_notifications', '-1', 'OLD.is_read = 0')}
+    END
+    ''',
+    # Also fires for coalesced notifications upserted back to unread
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_notifications_badge_update AFTER UPDATE OF is_read, user_id ON notifications
+    WHEN OLD.is_read IS NOT NEW.is_read OR OLD.user_id IS NOT NEW.user_id
+    BEGIN
+        {_badge('OLD.user_id', 'unread_notifications', '-1', 'OLD.is_read = 0')}
+        {_badge('NEW.user_id', 'unread_notifications', '1', 'NEW.is_read = 0')}
+    END
+    ''',
+
+    # Unread messages follow the conversation summaries' unread counts
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_conversations_badge_insert AFTER INSERT ON conversations
+    BEGIN
+        {_badge('NEW.user_id', 'unread_messages', 'NEW.unread_count', 'NEW.unread_count != 0')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_conversations_badge_delete AFTER DELETE ON conversations
+    BEGIN
+        {_badge('OLD.user_id', 'unread_messages', '-OLD.unread_count', 'OLD.unread_count != 0')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_conversations_badge_update AFTER UPDATE OF unread_count ON conversations
+    WHEN OLD.unread_count != NEW.unread_count
+    BEGIN
+        {_badge('NEW.user_id', 'unread_messages', 'NEW.unread_count - OLD.unread_count')}
+    END
+    ''',
+
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_friends_badge_insert AFTER INSERT ON friends
+    BEGIN
+        {_friend_badges('NEW', 1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_friends_badge_delete AFTER DELETE ON friends
+    BEGIN
+        {_friend_badges('OLD', -1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_friends_badge_update AFTER UPDATE OF status, user_id, friend_id ON friends
+    WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id OR OLD.friend_id IS NOT NEW.friend_id
+    BEGIN
+        {_friend_badges('OLD', -1)}
+        {_friend_badges('NEW', 1)}
+    END
+    ''',
+] + BADGE_COUNTS_REBUILD
+
+JOBS = [
+    # Background jobs (see scheduler.py). Named jobs are defined once and
+    # updated in place; next_run_at and lease times are UTC.
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE,
+        handler TEXT NOT NULL,
+        args TEXT NOT NULL DEFAULT '{}',
+        schedule TEXT,
+        status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'running', 'done', 'failed', 'cancelled')),
+        next_run_at TIMESTAMP,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        run_count INTEGER NOT NULL DEFAULT 0,
+        last_started_at TIMESTAMP,
+        last_finished_at TIMESTAMP,
+        last_duration_ms REAL,
+        last_result TEXT,
+        last_error TEXT,
+        locked_by TEXT,
+        locked_until TIMESTAMP,
+        created_by INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_jobs_status_next_run ON jobs (status, next_run_at)',
+    'CREATE INDEX IF NOT EXISTS idx_jobs_handler ON jobs (handler, status)',
+]
+
+DROP_UNREAD_MESSAGE_INDEX = [
+    # Unread state moved to conversations.last_read_message_id in
+    # read_cursors, so nothing filters messages on is_read any more
+    'DROP INDEX IF EXISTS idx_messages_receiver_unread',
+]
+
+ROLLUP_PURGES = [
+    # Retention deletes old rows but not their history: while a purge
+    # transaction has a source listed here, its deletes leave daily_rollups
+    # alone. Rows are only ever present inside that transaction.
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_purge (
+        source TEXT PRIMARY KEY NOT NULL
+    ) WITHOUT ROWID
+    ''',
+] + [
+    statement
+    for source, steps in ROLLUP_STEPS.items()
+    for statement in (
+        f'DROP TRIGGER IF EXISTS trg_{source}_rollup_delete',
+        _rollup_delete_trigger(source, steps, f"{_rolled_up(source, 'OLD')} AND {_not_purging(source)}"),
+    )
+]
+
+# When a notification last happened: coalesced rows move on with each event.
+# Queries must spell it exactly like this to use the indexes below.
+NOTIFICATION_ACTIVITY = 'COALESCE(updated_at, created_at)'
+
+NOTIFICATION_ACTIVITY_INDEXES = [
+    # First page of the notifications panel, newest activity first
+    f'CREATE INDEX IF NOT EXISTS idx_notifications_user_activity ON notifications (user_id, {NOTIFICATION_ACTIVITY}, id)',
+    f'''
+    CREATE INDEX IF NOT EXISTS idx_notifications_user_unread_activity
+    ON notifications (user_id, is_read, {NOTIFICATION_ACTIVITY}, id)
+    ''',
+]
+
+DROP_TIME_INDEXES = [
+    # Chat history, group chat and notifications are paged by id through
+    # the keyset_indexes; nothing reads these in created_at order any more
+    'DROP INDEX IF EXISTS idx_messages_pair_time',
+    'DROP INDEX IF EXISTS idx_notifications_user_unread_time',
+    'DROP INDEX IF EXISTS idx_group_messages_group_time',
+]
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'initial_schema', INITIAL_SCHEMA),
+    Migration(2, 'secondary_indexes', SECONDARY_INDEXES),
+    Migration(3, 'keyset_indexes', KEYSET_INDEXES),
+    Migration(4, 'settings_store', SETTINGS_STORE),
+    Migration(5, 'stats_counters', STATS_COUNTERS),
+    Migration(6, 'daily_rollups', DAILY_ROLLUPS),
+    Migration(7, 'conversations', CONVERSATIONS),
+    Migration(8, 'read_cursors', READ_CURSORS),
+    Migration(9, 'message_search', MESSAGE_SEARCH),
+    Migration(10, 'broadcast_notifications', BROADCAST_NOTIFICATIONS),
+    Migration(11, 'notification_coalescing', NOTIFICATION_COALESCING),
+    Migration(12, 'badge_counts', BADGE_COUNTS),
+    Migration(13, 'jobs', JOBS),
+    Migration(14, 'drop_unread_message_index', DROP_UNREAD_MESSAGE_INDEX),
+    Migration(15, 'rollup_purges', ROLLUP_PURGES),
+    Migration(16, 'notification_activity_indexes', NOTIFICATION_ACTIVITY_INDEXES),
+    Migration(17, 'drop_time_indexes', DROP_TIME_INDEXES),
+]
+
+def check_migrations(migrations: Sequence[Migration] = MIGRATIONS):
+    """Validate that migrations are numbered 1..N without gaps or duplicates"""
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.version != expected:
+            raise MigrationError(
+                f"Migration '{migration.name}' has version {migration.version}, expected {expected}"
+            )
+        if not migration.statements:
+            raise MigrationError(f"Migration {migration.version} ('{migration.name}') is empty")
+
+def latest_version(migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """Get the schema version this code expects"""
+    return migrations[-1].version if migrations else 0
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in the database (0 if never migrated)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+    if not cursor.fetchone():
+        return 0
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    version = cursor.fetchone()[0]
+    return version or 0
+
+def pending_migrations(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    """Get migrations not yet applied to this database"""
+    current = get_schema_version(conn)
+    return [m for m in migrations if m.version > current]
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied"""
+    check_migrations(migrations)
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    current = get_schema_version(conn)
+    if current > latest_version(migrations):
+        raise MigrationError(
+            f"Database schema version {current} is newer than this code supports ({latest_version(migrations)})"
+        )
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if get_schema_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+
+            for statement in migration.statements:
+                if callable(statement):
+                    statement(cursor)
+                else:
+                    cursor.execute(statement)
+
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (migration.version, migration.name)
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(f"Migration {migration.version} ('{migration.name}') failed: {e}") from e
+
+        applied.append(migration.version)
+
+    return applied
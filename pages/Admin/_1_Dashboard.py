@@ -15,7 +15,7 @@ def admin_dashboard_page():
     # Get statistics
     user_stats = get_user_statistics()
     platform_stats = get_platform_statistics()
-    growth_data = get_growth_data(days=30)
+    growth_data = get_growth_data(days=30, columnar=True)
     
     # Top metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -55,7 +55,7 @@ def admin_dashboard_page():
         # User Growth Chart
         st.subheader("📈 User Growth (Last 30 Days)")
         
-        if growth_data:
+        if growth_data.get('date'):
             df = pd.DataFrame(growth_data)
             if not df.empty:
                 fig = px.line(df, x='date', y=['new_users', 'students', 'alumni'],
@@ -2,9 +2,33 @@ import streamlit as st
 from datetime import datetime
 from utils.database import (
     get_announcements, add_announcement,
-    get_all_users, update_user_profile
+    get_all_users, update_user_profile,
+    schedule_announcement, get_scheduled_announcements, cancel_job
 )
 
+# Target Audience choices -> announcements.target_role
+AUDIENCE_ROLES = {"All": None, "Students": "student", "Alumni": "alumni", "Admins": "admin"}
+PRIORITIES = ["Normal", "Low", "High", "Urgent"]
+
+def _csv_audience(value):
+    """Bulk CSV target_role: an audience label or role name, blank for everyone"""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    audience = value.strip().lower()
+    for label, role in AUDIENCE_ROLES.items():
+        if audience in (label.lower(), role):
+            return role
+    raise ValueError(f"unknown target_role '{value.strip()}' (use one of: {', '.join(AUDIENCE_ROLES)})")
+
+def _csv_priority(value):
+    """Bulk CSV priority, stored lower-case like the form's; blank for normal"""
+    if not isinstance(value, str) or not value.strip():
+        return 'normal'
+    priority = value.strip().lower()
+    if priority not in (choice.lower() for choice in PRIORITIES):
+        raise ValueError(f"unknown priority '{value.strip()}' (use one of: {', '.join(PRIORITIES)})")
+    return priority
+
 def admin_announcements_page():
     """Announcements Management Page for Admin"""
     st.title("📢 Announcements Management")
@@ -67,7 +91,7 @@ def admin_announcements_page():
                 title = st.text_input("Title *", placeholder="Important Announcement")
                 priority = st.selectbox(
                     "Priority *",
-                    ["Normal", "Low", "High", "Urgent"]
+                    PRIORITIES
                 )
             
             with col2:
@@ -138,15 +162,29 @@ def admin_announcements_page():
             if submit:
                 if not all([title, content]):
                     st.error("Please fill all required fields (*)")
+                elif schedule_later:
+                    publish_at = datetime.combine(schedule_date, schedule_time)
+                    if publish_at <= datetime.now():
+                        st.error("Scheduled time must be in the future")
+                    elif schedule_announcement(
+                        title=title,
+                        content=content,
+                        created_by=st.session_state.user_id,
+                        run_at=publish_at,
+                        target_role=AUDIENCE_ROLES.get(target_role, target_role.lower()),
+                        priority=priority.lower()
+                    ):
+                        st.success(f"⏰ Announcement scheduled for {publish_at:%Y-%m-%d %H:%M}")
+                    else:
+                        st.error("Failed to schedule announcement")
                 else:
                     # Create announcement
                     announcement_id = add_announcement(
                         title=title,
                         content=content,
                         created_by=st.session_state.user_id,
-                        target_role=target_role.lower() if target_role != "All" else None,
-                        priority=priority.lower(),
-                        is_active=1 if is_active else 0
+                        target_role=AUDIENCE_ROLES.get(target_role, target_role.lower()),
+                        priority=priority.lower()
                     )
                     
                     if announcement_id:
@@ -187,47 +225,119 @@ def admin_announcements_page():
         # Schedule Management
         st.subheader("📅 Scheduled Announcements")
         
-        # Get scheduled announcements (would need database field for scheduled time)
-        st.info("Scheduled announcements feature coming soon!")
+        scheduled = get_scheduled_announcements()
         
-        # Calendar view
-        st.markdown("### 🗓️ Announcement Calendar")
-        
-        # This would show a calendar with scheduled announcements
-        st.info("Calendar view coming soon!")
+        if scheduled:
+            for item in scheduled:
+                col_sched1, col_sched2 = st.columns([4, 1])
+                with col_sched1:
+                    when = f"repeats `{item['schedule']}`" if item['schedule'] else "once"
+                    st.markdown(f"**{item['title']}**")
+                    st.caption(f"Next: {item['next_run_at']} UTC • {when} • "
+                               f"For: {item['target_role'] or 'all'} • {item['priority']}")
+                with col_sched2:
+                    if st.button("Cancel", key=f"cancel_scheduled_{item['job_id']}"):
+                        cancel_job(item['job_id'])
+                        st.rerun()
+        else:
+            st.info("No announcements are scheduled.")
         
         # Bulk scheduling
         st.markdown("### 📦 Bulk Scheduling")
         
         with st.form("bulk_schedule_form"):
-            st.markdown("Schedule multiple announcements at once")
+            st.markdown("Schedule multiple announcements at once (CSV columns: title, content, and optionally target_role, priority)")
             
             upload_file = st.file_uploader("Upload CSV with announcements", type="csv")
             
-            if upload_file:
-                import pandas as pd
-                try:
-                    df = pd.read_csv(upload_file)
-                    st.write("Preview:")
-                    st.dataframe(df.head())
-                    
-                    schedule_date = st.date_input("Schedule all for date")
-                    
-                    if st.form_submit_button("Schedule All", type="primary"):
-                        st.success(f"Scheduled {len(df)} announcements for {schedule_date}")
-                except:
-                    st.error("Error reading CSV file")
+            schedule_date = st.date_input("Schedule all for date", min_value=datetime.now().date())
+            schedule_time = st.time_input("Publish time")
+            
+            if st.form_submit_button("Schedule All", type="primary"):
+                if upload_file is None:
+                    st.error("Please upload a CSV file")
+                else:
+                    import pandas as pd
+                    try:
+                        df = pd.read_csv(upload_file)
+                        st.write("Preview:")
+                        st.dataframe(df.head())
+                        
+                        # Check every row first so a bad one schedules nothing
+                        announcements, problems = [], []
+                        for line, row in enumerate(df.to_dict('records'), start=2):
+                            try:
+                                announcements.append((row, _csv_audience(row.get('target_role')),
+                                                      _csv_priority(row.get('priority'))))
+                            except ValueError as e:
+                                problems.append(f"- Line {line}: {e}")
+                        
+                        if problems:
+                            st.error("Nothing was scheduled. Fix these rows and upload again:\n\n" + "\n".join(problems))
+                        else:
+                            publish_at = datetime.combine(schedule_date, schedule_time)
+                            count = 0
+                            for row, target_role, priority in announcements:
+                                if schedule_announcement(
+                                    title=str(row['title']),
+                                    content=str(row['content']),
+                                    created_by=st.session_state.user_id,
+                                    run_at=publish_at,
+                                    target_role=target_role,
+                                    priority=priority
+                                ):
+                                    count += 1
+                            st.success(f"Scheduled {count} announcements for {publish_at:%Y-%m-%d %H:%M}")
+                    except Exception:
+                        st.error("Error reading CSV file")
         
         # Recurring announcements
         st.markdown("### 🔄 Recurring Announcements")
         
-        col_recur1, col_recur2 = st.columns(2)
-        
-        with col_recur1:
-            st.info("Weekly announcements feature coming soon!")
-        
-        with col_recur2:
-            st.info("Monthly announcements feature coming soon!")
+        with st.form("recurring_announcement_form"):
+            recur_title = st.text_input("Title")
+            recur_content = st.text_area("Content", height=100)
+            
+            col_recur1, col_recur2, col_recur3 = st.columns(3)
+            
+            with col_recur1:
+                recur_frequency = st.selectbox("Repeat", ["Weekly", "Monthly"])
+                recur_audience = st.selectbox("Audience", list(AUDIENCE_ROLES))
+            
+            with col_recur2:
+                recur_weekday = st.selectbox(
+                    "Day of week (weekly)",
+                    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+                )
+                recur_day = st.number_input("Day of month (monthly)", min_value=1, max_value=28, value=1)
+            
+            with col_recur3:
+                recur_time = st.time_input("Time", key="recur_time")
+                recur_priority = st.selectbox("Priority", PRIORITIES, key="recur_priority")
+            
+            if st.form_submit_button("Schedule Recurring", type="primary"):
+                if not all([recur_title, recur_content]):
+                    st.error("Please enter a title and content")
+                else:
+                    # Cron: minute hour day-of-month month day-of-week (0 = Sunday)
+                    if recur_frequency == "Weekly":
+                        weekday = ["Sunday", "Monday", "Tuesday", "Wednesday",
+                                   "Thursday", "Friday", "Saturday"].index(recur_weekday)
+                        schedule = f"{recur_time.minute} {recur_time.hour} * * {weekday}"
+                    else:
+                        schedule = f"{recur_time.minute} {recur_time.hour} {int(recur_day)} * *"
+                    
+                    if schedule_announcement(
+                        title=recur_title,
+                        content=recur_content,
+                        created_by=st.session_state.user_id,
+                        target_role=AUDIENCE_ROLES[recur_audience],
+                        priority=recur_priority.lower(),
+                        schedule=schedule
+                    ):
+                        st.success(f"Recurring announcement scheduled ({recur_frequency.lower()})")
+                    else:
+                        st.error("Failed to schedule recurring announcement")
 
 def display_announcement_card(announcement):
     """Display an announcement card with management options"""
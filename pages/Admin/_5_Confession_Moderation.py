@@ -1,7 +1,7 @@
 import streamlit as st
 from utils.database import (
     get_confessions, update_confession_status,
-    get_user_by_id
+    get_user_by_id, get_users_by_ids
 )
 
 def admin_confession_moderation_page():
@@ -10,6 +10,7 @@ def admin_confession_moderation_page():
     
     # Get pending confessions
     pending_confessions = get_confessions(status='pending', limit=100)
+    prefetch_authors(pending_confessions)
     
     # Create tabs
     tab1, tab2, tab3 = st.tabs(["Pending Review", "Approved", "Rejected"])
@@ -31,6 +32,7 @@ def admin_confession_moderation_page():
         st.subheader("✅ Approved Confessions")
         
         approved_confessions = get_confessions(status='approved', limit=50)
+        prefetch_authors(approved_confessions)
         
         if approved_confessions:
             # Filter options
@@ -70,6 +72,7 @@ def admin_confession_moderation_page():
         st.subheader("❌ Rejected Confessions")
         
         rejected_confessions = get_confessions(status='rejected', limit=50)
+        prefetch_authors(rejected_confessions)
         
         if rejected_confessions:
             for confession in rejected_confessions:
@@ -132,6 +135,10 @@ def admin_confession_moderation_page():
         - Always prioritize community safety
         """)
 
+def prefetch_authors(confessions):
+    """Load every named author in one query; the cards' get_user_by_id calls reuse it"""
+    get_users_by_ids(c['user_id'] for c in confessions if not c['is_anonymous'])
+
 def display_confession_for_moderation(confession):
     """Display a confession for moderation with action buttons"""
     with st.container():
@@ -5,8 +5,10 @@ import pandas as pd
 from datetime import datetime, timedelta
 from utils.database import (
     get_user_statistics, get_platform_statistics, get_growth_data,
-    get_all_users, get_confessions, get_events,
-    get_announcements, get_contributions
+    get_all_users, get_announcements,
+    get_daily_rollups, get_rollup_totals, get_event_statistics,
+    get_health_summary, get_query_metrics, export_query_metrics,
+    get_pool_metrics, get_cache_metrics
 )
 
 def admin_analytics_page():
@@ -16,8 +18,8 @@ def admin_analytics_page():
     # Get all data
     user_stats = get_user_statistics()
     platform_stats = get_platform_statistics()
-    growth_data = get_growth_data(days=90)
-    all_users = get_all_users()
+    growth_data = get_growth_data(days=90, columnar=True)
+    all_users = get_all_users(columnar=True)
     
     # Create tabs
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -61,7 +63,7 @@ def admin_analytics_page():
         # Growth chart
         st.markdown("### 📈 User Growth Trend")
         
-        if growth_data:
+        if growth_data.get('date'):
             df_growth = pd.DataFrame(growth_data)
             
             if not df_growth.empty:
@@ -105,27 +107,85 @@ def admin_analytics_page():
         # Platform health
         st.markdown("### 🏥 Platform Health")
         
+        health = get_health_summary()
+        uptime_minutes = int(health['uptime_seconds'] // 60)
+        
         col_health1, col_health2, col_health3, col_health4 = st.columns(4)
         
         with col_health1:
-            # Uptime (placeholder)
-            uptime = "99.9%"
+            # Time since this server process started
+            uptime = f"{uptime_minutes // 1440}d {uptime_minutes // 60 % 24}h {uptime_minutes % 60}m"
             st.metric("Uptime", uptime)
         
         with col_health2:
-            # Response time (placeholder)
-            response = "120ms"
-            st.metric("Avg Response", response)
+            # Mean latency of data-access calls
+            response = f"{health['avg_ms']:.1f}ms"
+            st.metric("Avg Response", response, f"p95 {health['p95_ms']:.1f}ms", delta_color="off")
         
         with col_health3:
-            # Error rate (placeholder)
-            error_rate = "0.01%"
+            # Share of data-access calls that raised
+            error_rate = f"{health['error_rate'] * 100:.2f}%"
             st.metric("Error Rate", error_rate)
         
         with col_health4:
             # Satisfaction (placeholder)
             satisfaction = "4.8/5"
             st.metric("User Satisfaction", satisfaction)
+        
+        with st.expander("🔬 Query Performance"):
+            pool_metrics = get_pool_metrics()
+            col_pool1, col_pool2, col_pool3, col_pool4 = st.columns(4)
+            with col_pool1:
+                st.metric("Readers In Use", f"{pool_metrics['reader']['in_use_connections']}/{pool_metrics['reader']['max_size']}")
+            with col_pool2:
+                st.metric("Write Queue Depth", pool_metrics['writer']['queue_depth'],
+                          f"peak {pool_metrics['writer']['peak_queue_depth']}", delta_color="off")
+            with col_pool3:
+                st.metric("Avg Writer Wait", f"{pool_metrics['writer']['avg_wait_ms']:.1f}ms")
+            with col_pool4:
+                st.metric("Rejected Writes", pool_metrics['writer']['rejections'])
+            
+            cache_metrics = get_cache_metrics()
+            col_cache1, col_cache2, col_cache3, col_cache4 = st.columns(4)
+            with col_cache1:
+                st.metric("Cache Hit Ratio", f"{cache_metrics['hit_ratio'] * 100:.1f}%")
+            with col_cache2:
+                st.metric("Cache Hits / Misses", f"{cache_metrics['hits']} / {cache_metrics['misses']}")
+            with col_cache3:
+                st.metric("Cached Entries", cache_metrics['entries'])
+            with col_cache4:
+                st.metric("Invalidated by Writes", cache_metrics['stale'])
+            
+            query_metrics = get_query_metrics()
+            if query_metrics:
+                df_queries = pd.DataFrame([
+                    {'Function': name, **stats} for name, stats in query_metrics.items()
+                ]).sort_values('total_ms', ascending=False)
+                st.dataframe(
+                    df_queries.round(2),
+                    use_container_width=True,
+                    hide_index=True
+                )
+                
+                col_exp1, col_exp2 = st.columns(2)
+                with col_exp1:
+                    st.download_button(
+                        "Download Prometheus Metrics",
+                        data=export_query_metrics('prometheus'),
+                        file_name="mes_query_metrics.prom",
+                        mime="text/plain",
+                        use_container_width=True
+                    )
+                with col_exp2:
+                    st.download_button(
+                        "Download JSONL Metrics",
+                        data=export_query_metrics('jsonl'),
+                        file_name="mes_query_metrics.jsonl",
+                        mime="application/jsonl",
+                        use_container_width=True
+                    )
+            else:
+                st.info("No queries recorded yet.")
     
     with tab2:
         # User Analytics
@@ -217,15 +277,11 @@ def admin_analytics_page():
         # Confession analytics
         st.markdown("### 💭 Confession Analytics")
         
-        confessions = get_confessions(status='all', limit=1000)
+        # All-time counts from the daily rollups, not a capped sample of rows
+        status_counts = get_rollup_totals('confessions.status')
         
-        if confessions:
+        if status_counts:
             # Status distribution
-            status_counts = {}
-            for conf in confessions:
-                status = conf['status']
-                status_counts[status] = status_counts.get(status, 0) + 1
-            
             df_status = pd.DataFrame(list(status_counts.items()), columns=['Status', 'Count'])
             df_status['Status'] = df_status['Status'].str.title()
             
@@ -240,12 +296,11 @@ def admin_analytics_page():
             st.plotly_chart(fig_status, use_container_width=True)
             
             # Anonymous vs Named
-            anonymous_count = len([c for c in confessions if c['is_anonymous'] == 1])
-            named_count = len([c for c in confessions if c['is_anonymous'] == 0])
+            posted_counts = get_rollup_totals('confessions.posted')
             
             df_anon = pd.DataFrame({
                 'Type': ['Anonymous', 'Named'],
-                'Count': [anonymous_count, named_count]
+                'Count': [posted_counts.get('anonymous', 0), posted_counts.get('named', 0)]
             })
             
             fig_anon = px.bar(df_anon, x='Type', y='Count',
@@ -256,31 +311,45 @@ def admin_analytics_page():
         # Event analytics
         st.markdown("### 📅 Event Analytics")
         
-        events = get_events(upcoming=False, limit=100)
+        event_stats = get_event_statistics()
         
-        if events:
-            # Event participation
-            participation = [e['participant_count'] for e in events]
-            avg_participation = sum(participation) / len(participation) if participation else 0
-            
+        if event_stats['total_events']:
             col_event1, col_event2, col_event3 = st.columns(3)
             
             with col_event1:
-                st.metric("Total Events", len(events))
+                st.metric("Total Events", event_stats['total_events'])
             
             with col_event2:
-                st.metric("Avg Participants", f"{avg_participation:.1f}")
+                st.metric("Avg Participants", f"{event_stats['avg_participants']:.1f}")
             
             with col_event3:
-                max_event = max(events, key=lambda x: x['participant_count']) if events else None
-                if max_event:
-                    st.metric("Most Popular", max_event['participant_count'])
+                st.metric("Most Popular", event_stats['max_participants'])
         
         # Content growth over time
         st.markdown("### 📈 Content Growth")
         
-        # This would require time-series data
-        st.info("Content growth timeline coming soon!")
+        content_series = {
+            'Messages': 'messages.sent',
+            'Confessions': 'confessions.status',
+            'Event Registrations': 'events.registrations',
+            'Group Joins': 'groups.joins',
+        }
+        frames = []
+        for label, metric in content_series.items():
+            rollup = get_daily_rollups(metric, days=90, columnar=True)
+            if rollup.get('day'):
+                df_metric = pd.DataFrame(rollup).groupby('day', as_index=False)['value'].sum()
+                df_metric['Activity'] = label
+                frames.append(df_metric)
+        
+        if frames:
+            df_content = pd.concat(frames, ignore_index=True)
+            fig_content = px.line(df_content, x='day', y='value', color='Activity',
+                                title="Daily Content Activity (Last 90 Days)",
+                                labels={'day': 'Date', 'value': 'Count'})
+            st.plotly_chart(fig_content, use_container_width=True)
+        else:
+            st.info("No content activity in the last 90 days.")
     
     with tab4:
         # Engagement Analytics
@@ -290,8 +359,9 @@ def admin_analytics_page():
         col_eng1, col_eng2, col_eng3 = st.columns(3)
         
         with col_eng1:
-            # Message frequency (placeholder)
-            messages_per_day = "1,234"
+            # Message frequency over the last 30 days
+            messages_30d = sum(get_rollup_totals('messages.sent', days=30).values())
+            messages_per_day = f"{messages_30d / 30:,.1f}"
             st.metric("Messages/Day", messages_per_day)
         
         with col_eng2:
@@ -326,16 +396,10 @@ def admin_analytics_page():
         # Feature usage
         st.markdown("### 🛠️ Feature Usage")
         
-        # Get contributions data
-        contributions = get_contributions()
+        # Contribution types
+        type_counts = get_rollup_totals('contributions.type')
         
-        if contributions:
-            # Contribution types
-            type_counts = {}
-            for contrib in contributions:
-                contrib_type = contrib['type']
-                type_counts[contrib_type] = type_counts.get(contrib_type, 0) + 1
-            
+        if type_counts:
             df_contrib_types = pd.DataFrame(list(type_counts.items()), columns=['Type', 'Count'])
             df_contrib_types['Type'] = df_contrib_types['Type'].str.replace('_', ' ').str.title()
             
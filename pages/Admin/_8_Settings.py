@@ -1,5 +1,12 @@
 import streamlit as st
-from utils.database import get_user_by_id, update_user_profile
+from datetime import datetime
+from utils.database import (
+    get_user_by_id, update_user_profile,
+    get_settings, save_settings,
+    get_cache_metrics, get_cache_namespaces, clear_query_cache,
+    enqueue_job, get_jobs, cancel_job, run_job_now, get_scheduler_metrics,
+    list_backups, schedule_backups
+)
 
 def admin_settings_page():
     """Admin System Settings Page"""
@@ -282,6 +289,8 @@ def admin_settings_page():
         # Maintenance Settings
         st.subheader("🔧 Maintenance Settings")
         
+        settings = get_settings()
+        
         with st.form("maintenance_settings_form"):
             st.markdown("### Maintenance Mode")
             
@@ -305,14 +314,16 @@ def admin_settings_page():
             with col_perf1:
                 cache_enabled = st.checkbox(
                     "Enable caching",
-                    value=True
+                    value=settings['cache.enabled'],
+                    help="Share read-mostly query results (statistics, announcements, jobs, groups) across sessions"
                 )
                 
                 cache_duration = st.number_input(
                     "Cache duration (seconds)",
                     min_value=60,
                     max_value=86400,
-                    value=3600
+                    value=int(settings['cache.ttl_seconds']),
+                    help="Longest time a cached result is served; writes invalidate entries sooner"
                 )
             
             with col_perf2:
@@ -347,7 +358,8 @@ def admin_settings_page():
             with col_clean2:
                 cleanup_old_data = st.checkbox(
                     "Auto-cleanup old data",
-                    value=True
+                    value=settings['retention.enabled'],
+                    help="Periodically purge read notifications, expired job postings and rejected confessions"
                 )
                 
                 if cleanup_old_data:
@@ -355,11 +367,65 @@ def admin_settings_page():
                         "Data retention period (months)",
                         min_value=1,
                         max_value=60,
-                        value=24
+                        value=int(settings['retention.months']),
+                        help="Expired job postings and rejected confessions older than this are deleted"
+                    )
+                    
+                    notification_retention = st.number_input(
+                        "Read notifications kept (days)",
+                        min_value=1,
+                        max_value=365,
+                        value=int(settings['retention.read_notifications_days'])
                     )
             
             if st.form_submit_button("Save Maintenance Settings", type="primary"):
-                st.success("Maintenance settings saved successfully!")
+                new_settings = {
+                    'cache.enabled': cache_enabled,
+                    'cache.ttl_seconds': int(cache_duration),
+                    'retention.enabled': cleanup_old_data,
+                }
+                if cleanup_old_data:
+                    new_settings['retention.months'] = int(data_retention)
+                    new_settings['retention.read_notifications_days'] = int(notification_retention)
+                saved = save_settings(new_settings, updated_by=st.session_state.user_id)
+                if saved:
+                    st.success("Maintenance settings saved successfully!")
+                else:
+                    st.error("Failed to save maintenance settings")
+        
+        # Live cache statistics
+        st.markdown("### 📦 Cache Statistics")
+        
+        cache_metrics = get_cache_metrics()
+        col_cache1, col_cache2, col_cache3, col_cache4 = st.columns(4)
+        
+        with col_cache1:
+            st.metric("Entries", f"{cache_metrics['entries']}/{cache_metrics['max_entries']}")
+        
+        with col_cache2:
+            st.metric("Memory", f"{cache_metrics['memory_bytes'] / 1024:.1f} KB")
+        
+        with col_cache3:
+            st.metric("Hit Ratio", f"{cache_metrics['hit_ratio'] * 100:.1f}%",
+                      f"{cache_metrics['hits']} hits / {cache_metrics['misses']} misses", delta_color="off")
+        
+        with col_cache4:
+            st.metric("Evictions", cache_metrics['evictions'],
+                      f"{cache_metrics['stale']} invalidated by writes", delta_color="off")
+        
+        if not cache_metrics['enabled']:
+            st.warning("Caching is disabled; every read goes to the database.")
+        
+        cache_namespaces = get_cache_namespaces()
+        if cache_namespaces:
+            st.dataframe(
+                [
+                    {'Namespace': name, 'Entries': ns['entries'], 'Memory (KB)': round(ns['memory_bytes'] / 1024, 1)}
+                    for name, ns in sorted(cache_namespaces.items())
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
         
         # Maintenance actions
         st.markdown("### 🛠️ Maintenance Actions")
@@ -367,21 +433,99 @@ def admin_settings_page():
         col_maint1, col_maint2, col_maint3 = st.columns(3)
         
         with col_maint1:
+            clear_target = st.selectbox(
+                "Cache to clear",
+                ["All"] + sorted(cache_namespaces),
+                label_visibility="collapsed"
+            )
             if st.button("Clear Cache", use_container_width=True):
-                st.info("Cache cleared successfully!")
+                cleared = clear_query_cache(None if clear_target == "All" else clear_target)
+                st.info(f"Cache cleared successfully! ({cleared} entries removed)")
         
         with col_maint2:
             if st.button("Optimize Database", use_container_width=True):
-                st.info("Database optimization started...")
+                job_id = enqueue_job('optimize_database', created_by=st.session_state.user_id)
+                if job_id:
+                    st.info(f"Database optimization queued (job #{job_id})")
+                else:
+                    st.error("Failed to queue database optimization")
         
         with col_maint3:
             if st.button("Run Cleanup", use_container_width=True):
-                st.info("Cleanup process started...")
+                job_id = enqueue_job('retention', {'force': True}, created_by=st.session_state.user_id)
+                if job_id:
+                    st.info(f"Cleanup queued (job #{job_id})")
+                else:
+                    st.error("Failed to queue cleanup")
+            
+            last_run = settings.get('retention.last_run')
+            if last_run:
+                rows = ", ".join(f"{table}: {count}" for table, count in last_run['rows'].items()) or "nothing to reclaim"
+                st.caption(f"Last cleanup {last_run['at']} ({rows})")
+        
+        # Background jobs
+        st.markdown("### ⏱️ Background Jobs")
+        
+        scheduler_metrics = get_scheduler_metrics()
+        if not scheduler_metrics['running']:
+            st.warning("The job worker is not running in this process.")
+        st.caption(f"Worker {scheduler_metrics['worker_id']}: {scheduler_metrics['runs']} runs, "
+                   f"{scheduler_metrics['failures']} failures, {scheduler_metrics['retries']} retries")
+        
+        jobs = get_jobs(limit=50)
+        if jobs:
+            st.dataframe(
+                [
+                    {
+                        'ID': job['id'],
+                        'Job': job['name'] or job['handler'],
+                        'Schedule': job['schedule'] or 'once',
+                        'Status': job['status'],
+                        'Next run (UTC)': job['next_run_at'] or '-',
+                        'Last run (UTC)': job['last_finished_at'] or '-',
+                        'Duration (ms)': job['last_duration_ms'],
+                        'Attempts': f"{job['attempts']}/{job['max_attempts']}",
+                        'Last error': job['last_error'] or '',
+                    }
+                    for job in jobs
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            col_job1, col_job2, col_job3 = st.columns([2, 1, 1])
+            with col_job1:
+                selected_job = st.selectbox(
+                    "Job",
+                    [job['id'] for job in jobs],
+                    format_func=lambda job_id: next(
+                        f"#{job['id']} {job['name'] or job['handler']} ({job['status']})"
+                        for job in jobs if job['id'] == job_id
+                    ),
+                    label_visibility="collapsed"
+                )
+            with col_job2:
+                if st.button("Run Now", use_container_width=True):
+                    if run_job_now(selected_job):
+                        st.success("Job queued to run now")
+                    else:
+                        st.warning("Job is already running")
+            with col_job3:
+                if st.button("Cancel Job", use_container_width=True):
+                    if cancel_job(selected_job):
+                        st.success("Job cancelled")
+                    else:
+                        st.warning("Only waiting or failed jobs can be cancelled")
+        else:
+            st.info("No background jobs yet.")
     
     with tab5:
         # Backup Settings
         st.subheader("💾 Backup & Restore")
         
+        settings = get_settings()
+        backup_frequencies = ["Daily", "Weekly", "Monthly"]
+        
         with st.form("backup_settings_form"):
             st.markdown("### Backup Configuration")
             
@@ -390,17 +534,19 @@ def admin_settings_page():
             with col_back1:
                 auto_backup = st.checkbox(
                     "Enable automatic backups",
-                    value=True
+                    value=settings['backup.enabled']
                 )
                 
                 if auto_backup:
                     backup_frequency = st.selectbox(
                         "Backup frequency",
-                        ["Daily", "Weekly", "Monthly"]
+                        backup_frequencies,
+                        index=backup_frequencies.index(settings['backup.frequency'])
                     )
                     
                     backup_time = st.time_input(
-                        "Backup time"
+                        "Backup time",
+                        value=datetime.strptime(settings['backup.time'], "%H:%M").time()
                     )
             
             with col_back2:
@@ -409,11 +555,18 @@ def admin_settings_page():
                     ["Local Server", "Cloud Storage", "Both"]
                 )
                 
+                backup_dir = st.text_input(
+                    "Backup folder",
+                    value=settings['backup.dir'],
+                    placeholder="backups/ next to the database",
+                    help="Leave empty to keep backups next to the database file"
+                )
+                
                 retain_backups = st.number_input(
                     "Number of backups to retain",
                     min_value=1,
                     max_value=100,
-                    value=30
+                    value=int(settings['backup.keep'])
                 )
             
             st.markdown("### Backup Contents")
@@ -430,7 +583,19 @@ def admin_settings_page():
             )
             
             if st.form_submit_button("Save Backup Settings", type="primary"):
-                st.success("Backup settings saved successfully!")
+                backup_settings = {
+                    'backup.enabled': auto_backup,
+                    'backup.keep': int(retain_backups),
+                    'backup.dir': backup_dir.strip(),
+                }
+                if auto_backup:
+                    backup_settings['backup.frequency'] = backup_frequency
+                    backup_settings['backup.time'] = backup_time.strftime("%H:%M")
+                if save_settings(backup_settings, updated_by=st.session_state.user_id):
+                    schedule_backups()
+                    st.success("Backup settings saved successfully!")
+                else:
+                    st.error("Failed to save backup settings")
         
         # Backup actions
         st.markdown("### 🔄 Backup Actions")
@@ -439,18 +604,27 @@ def admin_settings_page():
         
         with col_action1:
             if st.button("Create Backup Now", type="primary", use_container_width=True):
-                st.info("Backup creation started...")
-                # Simulate backup process
-                import time
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)
-                    progress_bar.progress(i + 1)
-                st.success("Backup created successfully!")
+                job_id = enqueue_job('backup_database', created_by=st.session_state.user_id)
+                if job_id:
+                    st.info(f"Backup queued (job #{job_id}); it appears in the history once written")
+                else:
+                    st.error("Failed to queue backup")
         
         with col_action2:
             if st.button("View Backup History", use_container_width=True):
-                st.info("Backup history coming soon!")
+                backups = list_backups()
+                if backups:
+                    st.dataframe(
+                        [
+                            {'File': backup['file'], 'Created': backup['created_at'],
+                             'Size (MB)': round(backup['bytes'] / 1024 / 1024, 2)}
+                            for backup in backups
+                        ],
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                else:
+                    st.info("No backups yet.")
         
         with col_action3:
             if st.button("Restore from Backup", use_container_width=True):
@@ -5,7 +5,7 @@ from datetime import datetime
 from utils.database import (
     get_alumni_profile, get_events, get_announcements,
     get_friends, get_all_users, get_job_postings,
-    get_contributions, get_user_by_id
+    get_contributions, get_user_by_id, get_badge_counts
 )
 
 def alumni_dashboard_page(user_id):
@@ -20,10 +20,11 @@ def alumni_dashboard_page(user_id):
         return
     
     # Welcome section with quick stats
+    badges = get_badge_counts(user_id)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Connections", len(get_friends(user_id)))
+        st.metric("Connections", badges['friends_count'])
     
     with col2:
         contributions = get_contributions(alumni_id=user_id)
@@ -35,9 +36,7 @@ def alumni_dashboard_page(user_id):
         st.metric("Jobs Posted", len(user_jobs))
     
     with col4:
-        from utils.database import get_notifications
-        notifications = get_notifications(user_id, unread_only=True)
-        st.metric("Notifications", len(notifications))
+        st.metric("Notifications", badges['unread_notifications'])
     
     st.markdown("---")
     
@@ -4,7 +4,7 @@ import io
 import base64
 from utils.database import (
     get_alumni_profile, update_user_profile,
-    get_friends, get_user_by_id
+    get_friends, get_user_by_id, get_badge_counts
 )
 
 def alumni_profile_page(user_id):
@@ -41,8 +41,7 @@ def alumni_profile_page(user_id):
                 st.markdown(f"[LinkedIn Profile]({profile['linkedin']})")
             
             # Quick stats
-            friends = get_friends(user_id)
-            st.metric("Connections", len(friends))
+            st.metric("Connections", get_badge_counts(user_id)['friends_count'])
         
         with col2:
             # Professional Information
@@ -58,14 +58,16 @@ def alumni_networking_page(user_id):
         if filtered_alumni:
             st.markdown(f"Found **{len(filtered_alumni)}** alumni to connect with")
             
+            shown = st.session_state.get('find_alumni_shown', 9)
             cols = st.columns(3)
-            for idx, alum in enumerate(filtered_alumni[:9]):  # Show max 9
+            for idx, alum in enumerate(filtered_alumni[:shown]):
                 with cols[idx % 3]:
                     display_alumni_card(alum, user_id)
             
-            if len(filtered_alumni) > 9:
+            if len(filtered_alumni) > shown:
                 if st.button("Load More Alumni", type="secondary"):
-                    st.info("Pagination feature coming soon!")
+                    st.session_state.find_alumni_shown = shown + 9
+                    st.rerun()
         else:
             st.info("No alumni found with the current filters.")
     
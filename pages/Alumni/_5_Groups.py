@@ -1,7 +1,8 @@
 import streamlit as st
 from utils.database import (
     get_groups, create_group, join_group, get_group_members,
-    get_group_messages, send_group_message, get_user_by_id
+    get_group_messages, send_group_message, get_user_by_id,
+    get_user_cards, search_group_messages
 )
 
 def alumni_groups_page(user_id):
@@ -366,6 +367,28 @@ def display_alumni_group_chat(group, user_id):
     
     st.markdown("---")
     
+    # Search this group's history
+    with st.expander("🔍 Search messages", expanded=False):
+        search_query = st.text_input(
+            "Search this group",
+            key=f"group_search_{group['id']}",
+            label_visibility="collapsed",
+            placeholder="Search this group's messages..."
+        )
+        if search_query:
+            results = search_group_messages(user_id, search_query, group_id=group['id'])
+            if results:
+                senders = get_user_cards(result['sender_id'] for result in results)
+                for result in results:
+                    sender = senders.get(result['sender_id'])
+                    sender_name = f"{sender['first_name']} {sender['last_name']}" if sender else "Unknown user"
+                    if result['sender_id'] == user_id:
+                        sender_name = "You"
+                    st.markdown(f"**{sender_name}** • {result['created_at'][:16]}")
+                    st.caption(result['snippet'])
+            else:
+                st.caption("No messages found.")
+    
     # Professional group info
     with st.expander("📋 Group Information", expanded=False):
         st.markdown(f"**Description:** {group.get('description', 'No description')}")
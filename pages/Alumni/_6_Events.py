@@ -2,7 +2,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 from utils.database import (
     get_events, add_event, register_for_event,
-    get_user_events, get_user_by_id
+    get_user_events, get_user_by_id, event_cursor
 )
 
 def alumni_events_page(user_id):
@@ -234,8 +234,11 @@ def alumni_events_page(user_id):
         # Past Events
         st.subheader("📜 Past Alumni Events")
         
-        # Get past events
+        # Get the first page of past events plus any pages loaded since
         past_events = get_events(upcoming=False, user_id=user_id)
+        has_more = len(past_events) == 20
+        more_past = st.session_state.setdefault('alumni_past_events', {'rows': [], 'done': False})
+        past_events = past_events + more_past['rows']
         
         # Filter for alumni events
         past_alumni_events = []
@@ -260,17 +263,22 @@ def alumni_events_page(user_id):
             # Display past events
             if filtered_past:
                 cols = st.columns(2)
-                for idx, event in enumerate(filtered_past[:6]):  # Show max 6
+                for idx, event in enumerate(filtered_past):
                     with cols[idx % 2]:
                         display_alumni_event_card(event, user_id, is_past=True)
-                
-                if len(filtered_past) > 6:
-                    if st.button("Load More Past Events", type="secondary"):
-                        st.info("Pagination feature coming soon!")
             else:
                 st.info("No past alumni events found with the current search.")
         else:
             st.info("No past alumni events available.")
+        
+        # Next page continues from the last event loaded, alumni or not
+        if has_more and not more_past['done']:
+            if st.button("Load More Past Events", type="secondary"):
+                next_page = get_events(upcoming=False, user_id=user_id,
+                                       after=event_cursor(past_events[-1]))
+                more_past['rows'].extend(next_page)
+                more_past['done'] = len(next_page) < 20
+                st.rerun()
 
 def display_alumni_event_card(event, user_id, is_organizer=False, is_past=False):
     """Display an alumni event card"""
@@ -0,0 +1,71 @@
+import html
+import streamlit as st
+from utils.database import get_chat_messages, message_bus, user_topic, MessageWindow
+
+# How often an open chat checks the message bus. A check only collects
+# events already published; it never blocks the session.
+CHAT_REFRESH_SECONDS = 1
+
+def _message_markup(msg, user_id, read_through):
+    """One message bubble and its time (and read ticks for our own)"""
+    if msg['sender_id'] == user_id:
+        message_class, align = "message-sent", "right"
+        ticks = ' • ✓✓' if msg['is_read'] or msg['id'] <= read_through else ' • ✓'
+    else:
+        message_class, align, ticks = "message-received", "left", ''
+    return (
+        f"<div class='message-bubble {message_class}'>{html.escape(msg['message'])}</div>"
+        f"<div style='text-align: {align}; font-size: 0.8em; opacity: 0.6;'>{msg['created_at'][11:16]}{ticks}</div>"
+    )
+
+@st.fragment(run_every=CHAT_REFRESH_SECONDS)
+def chat_history(user_id, other_user_id):
+    """Chat messages area; re-runs on its own and fetches only new messages
+
+    An idle run issues no queries and re-sends the markup built when the
+    conversation last changed instead of rebuilding every bubble.
+    """
+    view = st.session_state.get('chat_view')
+    markup = st.session_state.get('chat_markup')
+    refresh_page = False
+    
+    if view is None or view.key != other_user_id:
+        # Take the cursor first so a message sent during the query still wakes us
+        cursor = message_bus.cursor([user_topic(user_id)])
+        view = MessageWindow(other_user_id, get_chat_messages(user_id, other_user_id, limit=50), cursor)
+        st.session_state.chat_view = view
+        markup = None
+    else:
+        view.cursor, events = message_bus.wait(view.cursor, 0)
+        has_new = False
+        for event in events:
+            if event['type'] == 'read':
+                if event['reader_id'] == other_user_id:
+                    view.mark_read(event['message_id'])
+                    markup = None
+            elif other_user_id in (event['sender_id'], event['receiver_id']):
+                has_new = True
+            else:
+                # Another conversation changed; the list beside us is stale
+                refresh_page = True
+        
+        # Only rows past the high-water mark: usually one, without joins
+        while has_new:
+            newer = get_chat_messages(user_id, other_user_id, limit=50, after_id=view.high_water)
+            if view.append(newer):
+                markup = None
+            has_new = len(newer) == 50
+    
+    if markup is None:
+        markup = ''.join(_message_markup(msg, user_id, view.read_through) for msg in view.rows)
+        st.session_state.chat_markup = markup
+    
+    # Chat messages area
+    with st.container(height=400):
+        if markup:
+            st.markdown(markup, unsafe_allow_html=True)
+        else:
+            st.info("No messages yet. Start the conversation!")
+    
+    if refresh_page:
+        st.rerun()
@@ -6,7 +6,7 @@ from utils.database import (
     get_student_profile, get_events, get_confessions,
     get_friends, get_all_users, get_announcements,
     get_user_statistics, get_platform_statistics,
-    get_notifications, get_user_by_id
+    get_badge_counts, get_user_by_id
 )
 
 def student_dashboard_page(user_id):
@@ -21,10 +21,11 @@ def student_dashboard_page(user_id):
         return
     
     # Welcome section with quick stats
+    badges = get_badge_counts(user_id)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Friends", len(get_friends(user_id)))
+        st.metric("Friends", badges['friends_count'])
     
     with col2:
         events = get_events(upcoming=True, user_id=user_id)
@@ -35,8 +36,7 @@ def student_dashboard_page(user_id):
         st.metric("Confessions", len(confessions))
     
     with col4:
-        notifications = get_notifications(user_id, unread_only=True)
-        st.metric("Unread Notifications", len(notifications))
+        st.metric("Unread Notifications", badges['unread_notifications'])
     
     st.markdown("---")
     
@@ -4,7 +4,7 @@ import io
 import base64
 from utils.database import (
     get_student_profile, update_user_profile,
-    get_friends, get_user_by_id
+    get_friends, get_user_by_id, get_badge_counts
 )
 
 def student_profile_page(user_id):
@@ -38,8 +38,7 @@ def student_profile_page(user_id):
             st.markdown(f"**Phone:** {profile['phone'] or 'Not provided'}")
             
             # Quick stats
-            friends = get_friends(user_id)
-            st.metric("Friends", len(friends))
+            st.metric("Friends", get_badge_counts(user_id)['friends_count'])
         
         with col2:
             # Personal Information
@@ -187,8 +187,9 @@ def student_friends_page(user_id):
         if potential_friends:
             st.markdown(f"Found **{len(potential_friends)}** potential friends")
             
+            shown = st.session_state.get('friend_suggestions_shown', 9)
             cols = st.columns(3)
-            for idx, user in enumerate(potential_friends[:9]):  # Show max 9
+            for idx, user in enumerate(potential_friends[:shown]):
                 with cols[idx % 3]:
                     with st.container():
                         # User card
@@ -235,9 +236,10 @@ def student_friends_page(user_id):
                         st.markdown("---")
             
             # Show more button if there are more users
-            if len(potential_friends) > 9:
+            if len(potential_friends) > shown:
                 if st.button("Load More", type="secondary"):
-                    st.info("Pagination feature coming soon!")
+                    st.session_state.friend_suggestions_shown = shown + 9
+                    st.rerun()
         else:
             st.info("No potential friends found with the current filters.")
     
@@ -1,10 +1,10 @@
 import streamlit as st
-import time
 from datetime import datetime
 from utils.database import (
-    get_conversations, get_chat_messages, send_message,
-    get_user_by_id, get_friends
+    get_conversations, send_message, get_user_cards, get_friends,
+    search_messages
 )
+from pages.Shared._Chat import chat_history
 
 def student_chat_page(user_id):
     """Student Chat Page"""
@@ -15,8 +15,6 @@ def student_chat_page(user_id):
         st.session_state.chat_with = None
     if 'message_input' not in st.session_state:
         st.session_state.message_input = ""
-    if 'refresh_chat' not in st.session_state:
-        st.session_state.refresh_chat = False
     
     # Get conversations and friends
     conversations = get_conversations(user_id)
@@ -36,6 +34,32 @@ def student_chat_page(user_id):
         
         st.markdown("---")
         
+        # Message search across the user's conversations
+        search_query = st.text_input(
+            "🔍 Search messages",
+            key="chat_search",
+            placeholder="Search your conversations..."
+        )
+        if search_query:
+            results = search_messages(user_id, search_query)
+            if results:
+                partners = get_user_cards(result['other_user_id'] for result in results)
+                for result in results:
+                    partner = partners.get(result['other_user_id'])
+                    partner_name = f"{partner['first_name']} {partner['last_name']}" if partner else "Unknown user"
+                    if st.button(
+                        f"💬 {partner_name} • {result['created_at'][:10]}",
+                        key=f"search_result_{result['id']}",
+                        use_container_width=True
+                    ):
+                        st.session_state.chat_with = result['other_user_id']
+                        st.rerun()
+                    st.caption(result['snippet'])
+            else:
+                st.caption("No messages found.")
+            
+            st.markdown("---")
+        
         # List conversations
         if conversations:
             for conv in conversations:
@@ -58,7 +82,6 @@ def student_chat_page(user_id):
                             type="primary" if is_active else "secondary"
                         ):
                             st.session_state.chat_with = conv['user_id']
-                            st.session_state.refresh_chat = True
                             st.rerun()
                         
                         # Last message preview
@@ -104,7 +127,8 @@ def student_chat_page(user_id):
         # Chat area
         if st.session_state.chat_with:
             # Get user info
-            other_user = get_user_by_id(st.session_state.chat_with)
+            # Display fields only; the header needs no profile picture
+            other_user = get_user_cards([st.session_state.chat_with]).get(st.session_state.chat_with)
             
             if other_user:
                 # Chat header
@@ -119,40 +143,8 @@ def student_chat_page(user_id):
                 
                 st.markdown("---")
                 
-                # Chat messages area
-                chat_container = st.container(height=400)
-                
-                with chat_container:
-                    # Get and display messages
-                    messages = get_chat_messages(user_id, st.session_state.chat_with, limit=50)
-                    
-                    if messages:
-                        for msg in messages:
-                            # Determine message alignment
-                            is_sent = msg['sender_id'] == user_id
-                            
-                            # Create message bubble
-                            if is_sent:
-                                message_class = "message-sent"
-                                align = "right"
-                            else:
-                                message_class = "message-received"
-                                align = "left"
-                            
-                            # Display message
-                            col_msg1, col_msg2, col_msg3 = st.columns([1, 6, 1])
-                            
-                            if is_sent:
-                                with col_msg3:
-                                    st.markdown(f"<div class='message-bubble {message_class}' style='text-align: {align};'>{msg['message']}</div>", unsafe_allow_html=True)
-                                    st.caption(f"{msg['created_at'][11:16]} • {'✓✓' if msg['is_read'] else '✓'}")
-                            else:
-                                with col_msg2:
-                                    st.markdown(f"<div class='message-bubble {message_class}' style='text-align: {align};'>{msg['message']}</div>", unsafe_allow_html=True)
-                                    st.caption(f"{msg['created_at'][11:16]}")
-                    
-                    else:
-                        st.info("No messages yet. Start the conversation!")
+                # Renders the messages and keeps them current between page runs
+                chat_history(user_id, st.session_state.chat_with)
                 
                 # Message input area
                 st.markdown("---")
@@ -174,7 +166,6 @@ def student_chat_page(user_id):
                     
                     if send_btn and message:
                         if send_message(user_id, st.session_state.chat_with, message):
-                            st.session_state.refresh_chat = True
                             st.rerun()
                         else:
                             st.error("Failed to send message")
@@ -251,13 +242,3 @@ def student_chat_page(user_id):
                 if st.button("⚙️ Chat Settings", use_container_width=True):
                     st.session_state.current_page = "Student/Settings"
                     st.rerun()
-    
-    # Auto-refresh chat
-    if st.session_state.refresh_chat:
-        time.sleep(0.5)
-        st.session_state.refresh_chat = False
-        st.rerun()
-    
-    # Refresh button
-    if st.button("🔄 Refresh", type="secondary"):
-        st.rerun()
@@ -1,7 +1,8 @@
 import streamlit as st
 from utils.database import (
     get_groups, create_group, join_group, get_group_members,
-    get_group_messages, send_group_message, get_user_by_id
+    get_group_messages, send_group_message, get_user_by_id,
+    get_user_cards, search_group_messages
 )
 
 def student_groups_page(user_id):
@@ -80,14 +81,16 @@ def student_groups_page(user_id):
         if filtered_groups:
             st.markdown(f"Found **{len(filtered_groups)}** groups")
             
+            shown = st.session_state.get('discover_groups_shown', 9)
             cols = st.columns(3)
-            for idx, group in enumerate(filtered_groups[:9]):  # Show max 9
+            for idx, group in enumerate(filtered_groups[:shown]):
                 with cols[idx % 3]:
                     display_group_card(group, user_id, show_join=True)
             
-            if len(filtered_groups) > 9:
+            if len(filtered_groups) > shown:
                 if st.button("Load More", type="secondary"):
-                    st.info("Pagination feature coming soon!")
+                    st.session_state.discover_groups_shown = shown + 9
+                    st.rerun()
         else:
             st.info("No groups found with the current filters.")
     
@@ -301,6 +304,28 @@ def display_group_chat(group, user_id):
     
     st.markdown("---")
     
+    # Search this group's history
+    with st.expander("🔍 Search messages", expanded=False):
+        search_query = st.text_input(
+            "Search this group",
+            key=f"group_search_{group['id']}",
+            label_visibility="collapsed",
+            placeholder="Search this group's messages..."
+        )
+        if search_query:
+            results = search_group_messages(user_id, search_query, group_id=group['id'])
+            if results:
+                senders = get_user_cards(result['sender_id'] for result in results)
+                for result in results:
+                    sender = senders.get(result['sender_id'])
+                    sender_name = f"{sender['first_name']} {sender['last_name']}" if sender else "Unknown user"
+                    if result['sender_id'] == user_id:
+                        sender_name = "You"
+                    st.markdown(f"**{sender_name}** • {result['created_at'][:16]}")
+                    st.caption(result['snippet'])
+            else:
+                st.caption("No messages found.")
+    
     # Chat messages area
     chat_container = st.container(height=400)
     
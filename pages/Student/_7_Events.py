@@ -2,7 +2,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 from utils.database import (
     get_events, add_event, register_for_event,
-    get_user_events, get_user_by_id
+    get_user_events, get_user_by_id, event_cursor
 )
 
 def student_events_page(user_id):
@@ -222,8 +222,11 @@ def student_events_page(user_id):
         # Past Events
         st.subheader("📜 Past Events")
         
-        # Get past events
-        past_events = get_events(upcoming=False, user_id=user_id)
+        # Get the first page of past events plus any pages loaded since
+        past_events = get_events(upcoming=False, limit=10, user_id=user_id)
+        has_more = len(past_events) == 10
+        more_past = st.session_state.setdefault('student_past_events', {'rows': [], 'done': False})
+        past_events = past_events + more_past['rows']
         
         if past_events:
             # Search and filter
@@ -253,14 +256,19 @@ def student_events_page(user_id):
             
             # Display past events
             if filtered_past:
-                for event in filtered_past[:10]:  # Show first 10
+                for event in filtered_past:
                     display_event_card(event, user_id, is_past=True)
-                
-                if len(filtered_past) > 10:
-                    if st.button("Load More Past Events", type="secondary"):
-                        st.info("Pagination feature coming soon!")
             else:
                 st.info("No past events found with the current filters.")
+            
+            # Next page continues from the last event loaded
+            if has_more and not more_past['done']:
+                if st.button("Load More Past Events", type="secondary"):
+                    next_page = get_events(upcoming=False, limit=10, user_id=user_id,
+                                           after=event_cursor(past_events[-1]))
+                    more_past['rows'].extend(next_page)
+                    more_past['done'] = len(next_page) < 10
+                    st.rerun()
         else:
             st.info("No past events available.")
 
@@ -0,0 +1,204 @@
+"""
+MES-Connect Query Cache
+
+Process-wide cache for read-mostly data every session asks for (dashboard
+statistics, announcements, job postings, groups). Entries are keyed by
+function + arguments and record the version of each table they read; write
+functions bump those versions after committing, which makes dependent
+entries stale at once. A TTL covers anything a bump does not (e.g. time
+passing for DATE('now') filters), and the least recently used entries are
+evicted once the cache is full.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+class TableVersions:
+    """Monotonic per-table change counters"""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def snapshot(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        versions = self._versions
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def all(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._versions)
+
+def approximate_size(value: Any) -> int:
+    """Rough deep size in bytes of a cached result"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(item) for item in value)
+    elif hasattr(value, '_values'):
+        # Records share their class (and column names) per query
+        size += approximate_size(value._values)
+    return size
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'tables', 'versions', 'namespace', 'size')
+
+    def __init__(self, value, expires_at, tables, versions, namespace, size):
+        self.value = value
+        self.expires_at = expires_at
+        self.tables = tables
+        self.versions = versions
+        self.namespace = namespace
+        self.size = size
+
+class QueryCache:
+    """TTL + LRU cache whose entries are invalidated by table versions"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self.versions = TableVersions()
+
+        self._entries: 'OrderedDict[Tuple, _Entry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'expired': 0,
+            'evictions': 0,
+        }
+
+    def bump(self, *tables: str):
+        """Mark tables as changed; entries that read them become stale"""
+        self.versions.bump(*tables)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            if entry.versions != self.versions.snapshot(entry.tables):
+                self._remove(key)
+                self._stats['stale'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, entry.value
+
+    def put(self, key: Tuple, value: Any, tables: Tuple[str, ...], versions: Tuple[int, ...],
+            ttl: Optional[float] = None, namespace: Optional[str] = None):
+        # A function's own ttl is a freshness limit; the cache-wide ttl caps it
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        entry = _Entry(value, time.monotonic() + ttl, tables, versions, namespace or key[0],
+                       approximate_size(value))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def _remove(self, key: Tuple):
+        self._bytes -= self._entries.pop(key).size
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """Drop every entry, or only those of one namespace; returns how many"""
+        with self._lock:
+            if namespace is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return count
+            keys = [key for key, entry in self._entries.items() if entry.namespace == namespace]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def configure(self, enabled: Optional[bool] = None, ttl: Optional[float] = None,
+                  max_entries: Optional[int] = None):
+        """Change settings at runtime; disabling also drops every entry"""
+        if ttl is not None:
+            self.ttl = float(ttl)
+        if max_entries is not None:
+            self.max_entries = int(max_entries)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+            if not self.enabled:
+                self.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['memory_bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['enabled'] = self.enabled
+        stats['ttl'] = self.ttl
+        stats['max_entries'] = self.max_entries
+        return stats
+
+    def namespaces(self) -> Dict[str, Dict[str, int]]:
+        """Entries and approximate bytes held per namespace"""
+        summary: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for entry in self._entries.values():
+                ns = summary.setdefault(entry.namespace, {'entries': 0, 'memory_bytes': 0})
+                ns['entries'] += 1
+                ns['memory_bytes'] += entry.size
+        return summary
+
+    def cached(self, *tables: str, ttl: Optional[float] = None):
+        """Cache a read function's results until one of tables changes or ttl passes"""
+        def decorator(func):
+            name = func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                key = (name, args, tuple(sorted(kwargs.items())))
+                try:
+                    hash(key)
+                except TypeError:
+                    return func(*args, **kwargs)
+
+                found, value = self.get(key)
+                if not found:
+                    # Versions are read before the query, so a write that
+                    # lands while it runs leaves this entry already stale
+                    versions = self.versions.snapshot(tables)
+                    value = func(*args, **kwargs)
+                    self.put(key, value, tables, versions, ttl)
+                # Results are shared across sessions; callers get their own container
+                if isinstance(value, list):
+                    return list(value)
+                if isinstance(value, dict):
+                    return dict(value)
+                return value
+
+            wrapper.cache_tables = tables
+            return wrapper
+        return decorator
@@ -0,0 +1,121 @@
+"""
+MES-Connect Result Records
+
+Rows come back from the data layer as lightweight read-only records instead
+of one dict per row. Each distinct column list gets its own record class
+(built once and cached), so a row stores only its value tuple while still
+supporting row['column'], row.get('column'), `in`, iteration and dict(row).
+
+Analytics callers that feed results straight into pandas can ask for a
+columnar result instead: a dict of column name -> list of values.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, List, Tuple
+
+# Record classes kept per distinct column list before the cache is reset
+MAX_RECORD_TYPES = 1024
+
+class Record(Mapping):
+    """Read-only mapping over one result row"""
+
+    __slots__ = ('_values',)
+
+    # Set on each generated subclass
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __init__(self, values: Tuple):
+        self._values = values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        # Positional access, like sqlite3.Row
+        return self._values[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else self._values[index]
+
+    def keys(self):
+        return list(self._fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy into a plain (mutable) dict"""
+        return {name: self._values[i] for name, i in self._index.items()}
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self._fields == other._fields and self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (make_record, (self._columns, self._values))
+
+_record_types: Dict[Tuple[str, ...], type] = {}
+_record_types_lock = threading.Lock()
+
+def record_type(columns: Tuple[str, ...]) -> type:
+    """Get the record class for a column list, building it on first use"""
+    cls = _record_types.get(columns)
+    if cls is None:
+        # Later duplicates win, matching dict(row) on a join with clashing names
+        index = {name: i for i, name in enumerate(columns)}
+        cls = type('Record', (Record,), {
+            '__slots__': (),
+            '_columns': columns,
+            '_fields': tuple(index),
+            '_index': index,
+        })
+        with _record_types_lock:
+            if len(_record_types) >= MAX_RECORD_TYPES:
+                _record_types.clear()
+            cls = _record_types.setdefault(columns, cls)
+    return cls
+
+def make_record(columns: Tuple[str, ...], values: Tuple) -> Record:
+    """Build a record from column names and values (also used for unpickling)"""
+    return record_type(columns)(values)
+
+_last_type = (None, None)
+
+def record_factory(cursor: sqlite3.Cursor, row: Tuple) -> Record:
+    """sqlite3 row_factory producing Records"""
+    global _last_type
+    description = cursor.description
+    last_description, cls = _last_type
+    # description is built once per statement, so consecutive rows share it
+    if description is not last_description:
+        cls = record_type(tuple(column[0] for column in description))
+        _last_type = (description, cls)
+    return cls(row)
+
+def fetch_columns(cursor: sqlite3.Cursor) -> Dict[str, List]:
+    """Fetch the remaining rows of a cursor as column name -> list of values"""
+    # Plain tuples are enough here; skip building a record per row
+    cursor.row_factory = None
+    rows = cursor.fetchall()
+    if cursor.description is None:
+        return {}
+    columns = [column[0] for column in cursor.description]
+    if not rows:
+        return {name: [] for name in columns}
+    # Duplicate column names keep the last column, as records do
+    return dict(zip(columns, (list(values) for values in zip(*rows))))
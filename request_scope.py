@@ -0,0 +1,105 @@
+"""
+MES-Connect Request Scope
+
+A request scope lives for one Streamlit script run. Reads decorated with
+@memoized are answered once per scope: the sidebar, the notifications panel
+and the page asking for the same user cost one query between them. Outside
+a scope the decorator calls straight through.
+
+Any write made during the run clears the scope (see database.get_write_connection),
+so a page never reads back its own stale data after an update.
+"""
+
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+class RequestScope:
+    """Identity map of read results for one script run"""
+
+    def __init__(self):
+        self._memo: Dict[Tuple, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, args: Tuple, kwargs: Dict) -> Tuple:
+        return (name, args, tuple(sorted(kwargs.items())))
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        if key in self._memo:
+            self.hits += 1
+            return True, self._memo[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Tuple, value: Any):
+        self._memo[key] = value
+
+    def clear(self):
+        self._memo.clear()
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+# Streamlit runs each script run on its own thread
+_local = threading.local()
+
+def current_scope() -> Optional[RequestScope]:
+    """Get the scope of the script run on this thread, if any"""
+    return getattr(_local, 'scope', None)
+
+def begin_request() -> RequestScope:
+    """Start a fresh scope for this thread, discarding any previous one"""
+    _local.scope = RequestScope()
+    return _local.scope
+
+def end_request():
+    """Discard this thread's scope"""
+    _local.scope = None
+
+@contextmanager
+def request_scope():
+    """Run a block (one script run) inside its own scope"""
+    scope = begin_request()
+    try:
+        yield scope
+    finally:
+        end_request()
+
+def invalidate():
+    """Forget everything read in the current scope (called on writes)"""
+    scope = current_scope()
+    if scope is not None:
+        scope.clear()
+
+def memoized(func):
+    """Answer repeated calls with the same arguments once per request scope"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        scope = current_scope()
+        if scope is None:
+            return func(*args, **kwargs)
+        try:
+            key = scope.key(name, args, kwargs)
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        found, value = scope.get(key)
+        if not found:
+            value = func(*args, **kwargs)
+            scope.put(key, value)
+        # Callers may sort or filter a list in place; hand each one its own
+        return list(value) if isinstance(value, list) else value
+
+    return wrapper
+
+def remember(func, args: Tuple, value: Any):
+    """Seed the scope with a result of a @memoized function (for batched loaders)"""
+    scope = current_scope()
+    if scope is not None:
+        scope.put(scope.key(func.__name__, args, {}), value)
@@ -0,0 +1,374 @@
+"""
+MES-Connect Job Scheduler
+
+Periodic maintenance (counter reconciliation, retention, backups) and
+deferred work (scheduled announcements) run as jobs: rows in the jobs table
+picked up by one worker thread per server process, outside Streamlit's
+script threads, so a page only enqueues work and never waits for it.
+
+A job names a registered handler and carries JSON keyword arguments. It
+either runs once at next_run_at or repeats on a cron-like schedule
+("minute hour day-of-month month day-of-week", or @hourly/@daily/@weekly/
+@monthly), evaluated in server local time. Failed runs are retried with
+exponential backoff up to max_attempts; a recurring job that runs out of
+attempts waits for its next scheduled time instead.
+
+Claiming a job is an UPDATE under the database write lock, so processes
+sharing the database never run the same job twice. A claim is a lease: a
+job whose worker died is picked up again once locked_until has passed.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Stored timestamps are UTC, formatted like SQLite's CURRENT_TIMESTAMP
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def to_timestamp(moment: datetime) -> str:
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+def local_to_utc(moment: datetime) -> datetime:
+    """Convert a naive local time (as entered in a form) to naive UTC"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week"""
+
+    ALIASES = {
+        '@hourly': '0 * * * *',
+        '@daily': '0 0 * * *',
+        '@weekly': '0 0 * * 0',
+        '@monthly': '0 0 1 * *',
+    }
+
+    # (low, high) per field; day-of-week 0 and 7 are both Sunday
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = self.ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron schedule '{expression}' needs 5 fields")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Cron matches either day field when both are restricted
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(','):
+            spec, _, step = part.partition('/')
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = (int(bound) for bound in spec.split('-', 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            step = int(step) if step else 1
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron schedule '{self.expression}' never matches")
+
+    def next_run(self, after: Optional[datetime] = None) -> datetime:
+        """Next run as naive UTC, matching the schedule in local time"""
+        local = datetime.now() if after is None else after.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        return local_to_utc(self.next_after(local))
+
+class Scheduler:
+    """Persistent job queue with a single worker thread per process"""
+
+    def __init__(self, connect: Callable, connect_write: Callable, poll_interval: float = 5.0,
+                 lease: float = 3600.0, retry_delay: float = 30.0):
+        # connect() returns a read connection; connect_write() one with a
+        # write transaction open
+        self.connect = connect
+        self.connect_write = connect_write
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, Callable] = {}
+
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._stats = {
+            'runs': 0,
+            'failures': 0,
+            'retries': 0,
+        }
+
+    def handler(self, name: str):
+        """Register a function as the handler jobs refer to by name"""
+        def decorator(func):
+            self.handlers[name] = func
+            return func
+        return decorator
+
+    def enqueue(self, handler: str, args: Optional[Dict[str, Any]] = None, run_at: Optional[datetime] = None,
+                schedule: Optional[str] = None, name: Optional[str] = None, max_attempts: int = 3,
+                created_by: Optional[int] = None, reactivate: bool = False) -> int:
+        """Add a job; returns its id
+
+        run_at is naive UTC (default: now, or the schedule's next time). A
+        named job is defined once: enqueueing the name again updates it in
+        place, keeping its next run unless the schedule changed, and revives
+        a cancelled or failed one only with reactivate.
+        """
+        if handler not in self.handlers:
+            raise ValueError(f"Unknown job handler '{handler}'")
+        if run_at is None:
+            run_at = CronSchedule(schedule).next_run() if schedule else utcnow()
+        elif schedule:
+            CronSchedule(schedule)
+        params = (name, handler, json.dumps(args or {}), schedule, to_timestamp(run_at), max_attempts, created_by)
+
+        conn = self.connect_write()
+        try:
+            cursor = conn.cursor()
+            if name is None:
+                cursor.execute('''
+                    INSERT INTO jobs (name, handler, args, schedule, next_run_at, max_attempts, created_by)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', params)
+                job_id = cursor.lastrowid
+            else:
+                cursor.execute('''
+                    INSERT INTO jobs (name, handler, args, schedule, next_run_at, max_attempts, created_by)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        handler = excluded.handler,
+                        args = excluded.args,
+                        max_attempts = excluded.max_attempts,
+                        next_run_at = CASE
+                            WHEN schedule IS excluded.schedule AND status != 'done' THEN next_run_at
+                            ELSE excluded.next_run_at END,
+                        schedule = excluded.schedule,
+                        status = CASE
+                            WHEN status = 'done' OR (? AND status IN ('cancelled', 'failed')) THEN 'pending'
+                            ELSE status END,
+                        attempts = CASE WHEN status = 'running' THEN attempts ELSE 0 END
+                ''', params + (1 if reactivate else 0,))
+                cursor.execute('SELECT id FROM jobs WHERE name = ?', (name,))
+                job_id = cursor.fetchone()['id']
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._wake.set()
+        return job_id
+
+    def _update(self, sql: str, params) -> bool:
+        conn = self.connect_write()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            changed = cursor.rowcount > 0
+            conn.commit()
+        finally:
+            conn.close()
+        return changed
+
+    def cancel(self, job_id: int) -> bool:
+        """Stop a job from running again (a run in progress finishes)"""
+        return self._update('''
+            UPDATE jobs SET status = 'cancelled'
+            WHERE id = ? AND status IN ('pending', 'failed')
+        ''', (job_id,))
+
+    def run_now(self, job_id: int) -> bool:
+        """Make a job due immediately, resetting its attempts"""
+        changed = self._update('''
+            UPDATE jobs SET status = 'pending', next_run_at = ?, attempts = 0
+            WHERE id = ? AND status != 'running'
+        ''', (to_timestamp(utcnow()), job_id))
+        self._wake.set()
+        return changed
+
+    def jobs(self, status: Optional[str] = None, handler: Optional[str] = None, limit: int = 100) -> List:
+        """Jobs for a status view: running first, then by next run"""
+        conditions, params = [], []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if handler:
+            conditions.append('handler = ?')
+            params.append(handler)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT * FROM jobs {where}
+                ORDER BY status = 'running' DESC, next_run_at IS NULL, next_run_at, id DESC
+                LIMIT ?
+            ''', (*params, limit))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    def _claim(self):
+        """Lease the most overdue job, or return None"""
+        now = utcnow()
+        conn = self.connect_write()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM jobs
+                WHERE (status = 'pending' AND next_run_at <= ?)
+                   OR (status = 'running' AND locked_until <= ?)
+                ORDER BY next_run_at
+                LIMIT 1
+            ''', (to_timestamp(now), to_timestamp(now)))
+            job = cursor.fetchone()
+            if job is not None:
+                cursor.execute('''
+                    UPDATE jobs
+                    SET status = 'running', attempts = attempts + 1, last_started_at = ?,
+                        locked_by = ?, locked_until = ?
+                    WHERE id = ?
+                ''', (to_timestamp(now), self.worker_id,
+                      to_timestamp(now + timedelta(seconds=self.lease)), job['id']))
+            conn.commit()
+        finally:
+            conn.close()
+        return job
+
+    def _run(self, job):
+        start = time.perf_counter()
+        try:
+            result = self.handlers[job['handler']](**json.loads(job['args']))
+            error = None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        attempts = job['attempts'] + 1
+        now = utcnow()
+        if error is None:
+            status = 'pending' if job['schedule'] else 'done'
+            next_run = CronSchedule(job['schedule']).next_run(now) if job['schedule'] else None
+            attempts = 0
+        elif attempts < job['max_attempts']:
+            status = 'pending'
+            next_run = now + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+            self._stats['retries'] += 1
+        elif job['schedule']:
+            status = 'pending'
+            next_run = CronSchedule(job['schedule']).next_run(now)
+            attempts = 0
+        else:
+            status = 'failed'
+            next_run = None
+
+        self._update('''
+            UPDATE jobs
+            SET status = CASE WHEN status = 'cancelled' THEN status ELSE ? END,
+                next_run_at = ?, attempts = ?, run_count = run_count + 1,
+                last_finished_at = ?, last_duration_ms = ?,
+                last_result = COALESCE(?, last_result), last_error = ?,
+                locked_by = NULL, locked_until = NULL
+            WHERE id = ?
+        ''', (status, to_timestamp(next_run) if next_run else None, attempts,
+              to_timestamp(now), round(duration_ms, 1),
+              json.dumps(result, default=str) if error is None else None, error, job['id']))
+
+        self._stats['runs'] += 1
+        if error is not None:
+            self._stats['failures'] += 1
+            print(f"Job {job['id']} ({job['handler']}) failed: {error}")
+
+    def run_pending(self, max_jobs: Optional[int] = None) -> int:
+        """Run due jobs in this thread until none are left; returns how many ran"""
+        ran = 0
+        while max_jobs is None or ran < max_jobs:
+            job = self._claim()
+            if job is None:
+                break
+            if job['handler'] not in self.handlers:
+                # Left for a process that knows the handler; retried after the lease
+                print(f"Job {job['id']} has unknown handler '{job['handler']}'")
+                ran += 1
+                continue
+            self._run(job)
+            ran += 1
+        return ran
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Error running scheduled jobs: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self) -> bool:
+        """Start the worker thread (once per process)"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._loop, name="mes-scheduler", daemon=True)
+            self._worker.start()
+            return True
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker after the job it is running"""
+        self._stop.set()
+        self._wake.set()
+        worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of worker counters"""
+        stats = dict(self._stats)
+        stats['running'] = self._worker is not None and self._worker.is_alive()
+        stats['worker_id'] = self.worker_id
+        stats['handlers'] = sorted(self.handlers)
+        return stats
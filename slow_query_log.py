@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+MES-Connect Slow Query Log
+
+Statements slower than a threshold are written as JSON lines to a rotating
+log file, together with the shape of their bound parameters and the output
+of EXPLAIN QUERY PLAN. Run this module to rank logged statements:
+
+    python slow_query_log.py report [--top 20] [--log data/slow_queries.log]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LOG_PATH = "data/slow_queries.log"
+DEFAULT_THRESHOLD_MS = float(os.environ.get("MES_SLOW_QUERY_MS", "100"))
+
+# Statements EXPLAIN QUERY PLAN has nothing useful to say about
+_UNEXPLAINABLE = ('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA', 'CREATE', 'DROP', 'ALTER', 'ANALYZE', 'VACUUM', 'EXPLAIN')
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so the same statement always groups together"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def param_shape(params: Any) -> Any:
+    """Describe bound parameters by type only, never by value"""
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+def is_full_scan(plan: List[str]) -> bool:
+    """True if any plan step scans a table without an index"""
+    return any(step.startswith('SCAN ') and 'USING' not in step for step in plan)
+
+class SlowQueryLog:
+    """Threshold-based statement logger backed by a rotating JSONL file"""
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, threshold_ms: float = DEFAULT_THRESHOLD_MS,
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.enabled = True
+        self.explain_prefix = 'EXPLAIN QUERY PLAN'
+        self.logged = 0
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def _get_logger(self) -> logging.Logger:
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    logger = logging.getLogger(f"mes_connect.slow_queries.{id(self)}")
+                    logger.setLevel(logging.INFO)
+                    logger.propagate = False
+                    handler = logging.handlers.RotatingFileHandler(
+                        self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8'
+                    )
+                    handler.setFormatter(logging.Formatter('%(message)s'))
+                    logger.addHandler(handler)
+                    self._logger = logger
+        return self._logger
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+        """Get EXPLAIN QUERY PLAN detail lines for a statement"""
+        if sql.lstrip().upper().startswith(_UNEXPLAINABLE):
+            return []
+        try:
+            # A plain cursor, so explaining does not re-enter the statement hook
+            cursor = sqlite3.Cursor(conn)
+            try:
+                cursor.execute(f"{self.explain_prefix} {sql}", params)
+                return [row[3] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            return [f"<explain failed: {e}>"]
+
+    def record(self, conn: sqlite3.Connection, sql: str, params: Any, seconds: float):
+        """Statement hook: log the statement if it ran over the threshold"""
+        duration_ms = seconds * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+
+        plan = self.explain(conn, sql, params)
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_ms': round(duration_ms, 3),
+            'sql': normalize_sql(sql),
+            'params': param_shape(params),
+            'plan': plan,
+            'full_scan': is_full_scan(plan),
+        }
+        self._get_logger().info(json.dumps(entry))
+        self.logged += 1
+
+def read_entries(path: str = DEFAULT_LOG_PATH) -> List[Dict]:
+    """Read entries from the log and its rotated backups"""
+    entries = []
+    for log_file in sorted(glob.glob(f"{glob.escape(path)}*")):
+        if not re.fullmatch(re.escape(path) + r'(\.\d+)?', log_file):
+            continue
+        with open(log_file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries
+
+def build_report(entries: List[Dict]) -> List[Dict]:
+    """Group entries by statement and rank them by total time"""
+    groups: Dict[str, Dict] = {}
+    for entry in entries:
+        group = groups.setdefault(entry['sql'], {
+            'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'full_scan': False, 'plan': entry.get('plan', []),
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        group['full_scan'] = group['full_scan'] or entry.get('full_scan', False)
+    return sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="MES-Connect slow query log")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help="Rank logged statements by total time")
+    report_parser.add_argument('--log', default=DEFAULT_LOG_PATH, help="Path to the slow query log")
+    report_parser.add_argument('--top', type=int, default=20, help="Number of statements to show")
+    args = parser.parse_args(argv)
+
+    report = build_report(read_entries(args.log))
+    if not report:
+        print(f"No slow queries logged in {args.log}")
+        return
+
+    for rank, group in enumerate(report[:args.top], start=1):
+        flag = "  ⚠️ FULL SCAN" if group['full_scan'] else ""
+        print(f"#{rank}  total {group['total_ms']:.1f} ms  "
+              f"count {group['count']}  avg {group['total_ms'] / group['count']:.1f} ms  "
+              f"max {group['max_ms']:.1f} ms{flag}")
+        print(f"    {group['sql'][:200]}")
+        for step in group['plan']:
+            print(f"      {step}")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+MES-Connect Storage Backends
+
+A backend is the connection factory plus the dialect hooks the data layer
+needs from one storage engine. Selected with the MES_DB_BACKEND environment
+variable:
+
+    sqlite  (default) file-backed SQLite at MES_DB_PATH, WAL mode
+    memory  shared-cache in-memory SQLite named MES_DB_NAME, for load
+            tests and CI benchmarks; contents vanish with the process
+"""
+
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+from urllib.request import pathname2url
+from connection_pool import DEFAULT_PRAGMAS, READ_ONLY_PRAGMAS
+
+class StorageBackend:
+    """Connection factory and dialect hooks for one storage engine"""
+
+    name = 'base'
+
+    # Statement that opens a transaction holding the write lock
+    begin_write_sql = 'BEGIN IMMEDIATE'
+
+    # Prefix that turns a statement into a plan description
+    explain_prefix = 'EXPLAIN QUERY PLAN'
+
+    @property
+    def key(self) -> str:
+        """Identifies the underlying database (used for once-per-database work)"""
+        raise NotImplementedError
+
+    def prepare(self):
+        """Make the database reachable before the first connection is opened"""
+
+    def pool_options(self, kind: str) -> Dict[str, Any]:
+        """Get ConnectionPool(database, uri, pragmas) arguments for the 'reader' or 'writer' pool"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release anything prepare() acquired"""
+
+    def describe(self) -> str:
+        return f"{self.name}:{self.key}"
+
+class SQLiteFileBackend(StorageBackend):
+    """File-backed SQLite in WAL mode with read-only reader connections"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def key(self) -> str:
+        return os.path.abspath(self.path)
+
+    def prepare(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+    def pool_options(self, kind: str) -> Dict[str, Any]:
+        if kind == 'writer':
+            return {'database': self.path, 'uri': False, 'pragmas': DEFAULT_PRAGMAS}
+        return {
+            'database': f"file:{pathname2url(self.key)}?mode=ro",
+            'uri': True,
+            'pragmas': READ_ONLY_PRAGMAS,
+        }
+
+class SQLiteMemoryBackend(StorageBackend):
+    """Shared-cache in-memory SQLite, kept alive by an anchor connection"""
+
+    name = 'memory'
+
+    def __init__(self, name: str = 'mes_connect'):
+        self.database_name = name
+        self._anchor: Optional[sqlite3.Connection] = None
+
+    @property
+    def key(self) -> str:
+        return self.uri
+
+    @property
+    def uri(self) -> str:
+        return f"file:{self.database_name}?mode=memory&cache=shared"
+
+    def prepare(self):
+        # The database is dropped when its last connection closes
+        if self._anchor is None:
+            self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    def pool_options(self, kind: str) -> Dict[str, Any]:
+        # No WAL or mmap in memory. Shared-cache table locks ignore
+        # busy_timeout, so readers skip read locks instead of failing
+        # with "database table is locked" while the writer is active.
+        pragmas = {'busy_timeout': 5000, 'cache_size': DEFAULT_PRAGMAS['cache_size']}
+        if kind != 'writer':
+            pragmas.update({'query_only': 1, 'read_uncommitted': 1})
+        return {'database': self.uri, 'uri': True, 'pragmas': pragmas}
+
+    def close(self):
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+BACKENDS = {
+    SQLiteFileBackend.name: SQLiteFileBackend,
+    SQLiteMemoryBackend.name: SQLiteMemoryBackend,
+}
+
+def backend_from_config(default_path: str, environ: Optional[Dict[str, str]] = None) -> StorageBackend:
+    """Build the backend selected by MES_DB_BACKEND"""
+    environ = os.environ if environ is None else environ
+    name = environ.get('MES_DB_BACKEND', SQLiteFileBackend.name).lower()
+    if name == SQLiteMemoryBackend.name:
+        return SQLiteMemoryBackend(environ.get('MES_DB_NAME', 'mes_connect'))
+    if name == SQLiteFileBackend.name:
+        return SQLiteFileBackend(environ.get('MES_DB_PATH', default_path))
+    raise ValueError(f"Unknown MES_DB_BACKEND '{name}' (expected one of: {', '.join(BACKENDS)})")
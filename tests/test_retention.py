@@ -0,0 +1,53 @@
+import unittest
+
+import database
+from storage import SQLiteMemoryBackend
+
+class RetentionTest(unittest.TestCase):
+    """Retention purges old rows without rewriting the daily rollups"""
+
+    @classmethod
+    def setUpClass(cls):
+        database.configure_backend(SQLiteMemoryBackend('test_retention'))
+        database.ensure_schema()
+        database.scheduler.stop()
+
+    @classmethod
+    def tearDownClass(cls):
+        database.configure_backend(SQLiteMemoryBackend('test_retention_done'))
+
+    def test_rollups_survive_retention(self):
+        conn = database.get_write_connection()
+        try:
+            conn.execute('''
+                INSERT INTO users (email, password, role, first_name, last_name, is_verified)
+                VALUES ('retention@example.com', 'x', 'student', 'Re', 'Tention', 1)
+            ''')
+            conn.execute('''
+                INSERT INTO confessions (user_id, content, is_anonymous, status, created_at)
+                VALUES (1, 'old', 1, 'rejected', DATETIME('now', '-30 months'))
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+        database.bump_table_versions('users', 'confessions')
+
+        before = {metric: database.get_rollup_totals(metric)
+                  for metric in ('confessions.status', 'confessions.posted')}
+        self.assertEqual(before, {'confessions.status': {'rejected': 1},
+                                  'confessions.posted': {'anonymous': 1}})
+
+        reclaimed = database.run_retention(pause=0)
+        self.assertEqual(reclaimed.get('confessions'), 1)
+        after = {metric: database.get_rollup_totals(metric)
+                 for metric in ('confessions.status', 'confessions.posted')}
+        self.assertEqual(after, before)
+
+        conn = database.get_connection()
+        try:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM rollup_purge').fetchone()[0], 0)
+        finally:
+            conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+MES-Connect Write-Behind Queue
+
+Secondary writes the user does not wait on (follow-up notifications,
+last_login, read flags) are queued here and written by a background thread
+in grouped transactions, so they stay off the request's critical path.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+class WriteBehindQueue:
+    """Batches (sql, params) writes and applies them from a worker thread"""
+
+    def __init__(self, connect: Callable, flush_interval: float = 0.05, max_batch: int = 500,
+                 max_pending: int = 10000, max_retries: int = 3):
+        # connect() must return a connection with a write transaction open
+        self.connect = connect
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+        self._pending: List[Tuple[str, Sequence[Any]]] = []
+        self._submitted = 0
+        self._completed = 0
+        self._closed = False
+        self._urgent = False
+        self._worker = None
+        self._cond = threading.Condition()
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'retries': 0,
+            'peak_pending': 0,
+        }
+
+    def submit(self, sql: str, params: Sequence[Any] = ()):
+        """Queue a write; blocks only if max_pending writes are already waiting"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            while len(self._pending) >= self.max_pending:
+                self._cond.wait()
+            self._pending.append((sql, tuple(params)))
+            self._submitted += 1
+            self._stats['submitted'] += 1
+            self._stats['peak_pending'] = max(self._stats['peak_pending'], len(self._pending))
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+            self._ensure_worker()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every write submitted so far has been applied"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            self._urgent = True
+            self._cond.notify_all()
+            while self._completed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if self._worker is None or not self._worker.is_alive():
+                    # No worker (e.g. during shutdown): drain in this thread
+                    self._cond.release()
+                    try:
+                        self._drain_once()
+                    finally:
+                        self._cond.acquire()
+                    continue
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Flush outstanding writes and stop accepting new ones"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        return flushed
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="mes-write-behind", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                # Let a burst accumulate unless the batch is already full
+                if len(self._pending) < self.max_batch and not (self._closed or self._urgent):
+                    self._cond.wait(self.flush_interval)
+            self._drain_once()
+
+    def _drain_once(self):
+        """Write one batch in a single transaction"""
+        with self._cond:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            if not self._pending:
+                self._urgent = False
+            self._cond.notify_all()
+        if not batch:
+            return
+
+        for attempt in range(self.max_retries):
+            try:
+                self._write(batch)
+                self._stats['written'] += len(batch)
+                break
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    self._stats['failed'] += len(batch)
+                    print(f"Error applying deferred writes: {e}")
+                else:
+                    self._stats['retries'] += 1
+                    time.sleep(0.1 * 2 ** attempt)
+
+        with self._cond:
+            self._completed += len(batch)
+            self._stats['batches'] += 1
+            self._cond.notify_all()
+
+    def _write(self, batch: List[Tuple[str, Sequence[Any]]]):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            # Consecutive writes of the same statement go through executemany
+            run_sql, run_params = None, []
+            for sql, params in batch:
+                if sql != run_sql and run_params:
+                    cursor.executemany(run_sql, run_params)
+                    run_params = []
+                run_sql = sql
+                run_params.append(params)
+            if run_params:
+                cursor.executemany(run_sql, run_params)
+            conn.commit()
+        finally:
+            conn.close()